@@ -0,0 +1,187 @@
+"""Пакетный разбор уровней: решаемость, число решений, ветвление, тупики, сложность.
+
+Каждый уровень разбирается полным перебором состояний (позиция капли и
+посещённые клетки) из всех стартовых клеток; уровни разбираются параллельно
+на пуле процессов. Сложность - сколько бит удачи нужно случайной игре:
+-log2 вероятности победы, если старт и каждый ход выбираются наугад.
+
+Пример:
+    python analyze.py                       # встроенные уровни
+    python analyze.py levels.pack -o analysis.json --workers 4
+    python analyze.py levels.json --write-pack rated.pack
+"""
+
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+from engine import Board
+from levelpack import LevelInfo, level_boards, write_pack
+from levels import LEVELS, load_levels
+from solver import StateLimit
+
+# Предел числа состояний на уровень: дальше разбор прерывается
+MAX_STATES = 2_000_000
+
+FIELDS = ("level", "width", "height", "free_cells", "solvable_starts", "solutions", "min_moves",
+          "states", "branching", "dead_end_fraction", "win_probability", "difficulty",
+          "elapsed_ms", "truncated")
+
+
+def analyze_board(board, max_states=MAX_STATES):
+    """Разбор одного поля; словарь с полями FIELDS (кроме level и elapsed_ms)"""
+    free = board.free
+    obstacles = board.obstacles
+    successors = board.successors
+    shift = board.size.bit_length()
+    # Состояние -> (минимум ходов до победы, число выигрышных продолжений, вероятность победы)
+    memo = {}
+    counters = {"moves": 0, "dead_ends": 0}
+
+    def visit(pos, visited):
+        if visited == free:
+            return 0, 1, 1.0
+        key = (visited << shift) | pos
+        result = memo.get(key)
+        if result is not None:
+            return result
+        options = successors(pos, obstacles | visited)
+        counters["moves"] += len(options)
+        if not options:
+            counters["dead_ends"] += 1
+        best = math.inf
+        solutions = 0
+        chance = 0.0
+        for _, end, mask in options:
+            moves, count, probability = visit(end, visited | mask)
+            if count:
+                solutions += count
+                best = min(best, moves + 1)
+            chance += probability
+        result = (best, solutions, chance / len(options) if options else 0.0)
+        memo[key] = result
+        if len(memo) > max_states:
+            raise StateLimit
+        return result
+
+    row = {"width": board.width, "height": board.height, "free_cells": board.free_count,
+           "solvable_starts": None, "solutions": None, "min_moves": None, "states": None,
+           "branching": None, "dead_end_fraction": None, "win_probability": None,
+           "difficulty": None, "truncated": False}
+    if not board.free_count:
+        return row
+
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, board.free_count + 100))
+    try:
+        starts = []
+        for cell in board.cells(free):
+            pos = board.index(cell)
+            starts.append((pos, visit(pos, 1 << pos)))
+    except StateLimit:
+        row["truncated"] = True
+        row["states"] = len(memo)
+        return row
+    finally:
+        sys.setrecursionlimit(limit)
+
+    solvable = [(pos, result) for pos, result in starts if result[1]]
+    states = len(memo)
+    probability = sum(result[2] for _, result in starts) / len(starts)
+    row.update({
+        "solvable_starts": len(solvable),
+        "solutions": sum(result[1] for _, result in solvable),
+        "min_moves": min((result[0] for _, result in solvable), default=None),
+        "states": states,
+        "branching": round(counters["moves"] / states, 4) if states else 0.0,
+        "dead_end_fraction": round(counters["dead_ends"] / states, 4) if states else 0.0,
+        "win_probability": round(probability, 10),
+        "difficulty": round(-math.log2(probability), 3) if probability > 0 else None,
+    })
+    row["start_mask"] = sum(1 << pos for pos, _ in solvable)
+    return row
+
+
+def analyze_task(task):
+    """Задача для процесса пула: (номер, ширина, высота, препятствия, предел состояний)"""
+    number, width, height, obstacles, max_states = task
+    started = time.perf_counter()
+    row = analyze_board(Board(width, height, obstacles), max_states)
+    row["level"] = number
+    row["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return row
+
+
+def analyze_levels(levels, workers=None, max_states=MAX_STATES, progress=None):
+    """Разбор всех уровней на пуле процессов; строки в порядке уровней"""
+    tasks = [(number, board.width, board.height, board.obstacles, max_states)
+             for number, board in enumerate(level_boards(levels))]
+    workers = workers or os.cpu_count() or 1
+    rows = []
+
+    def collect(results):
+        for row in results:
+            rows.append(row)
+            if progress:
+                progress(len(rows), len(tasks))
+
+    if workers == 1:
+        collect(map(analyze_task, tasks))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            collect(pool.imap(analyze_task, tasks, chunksize=max(1, len(tasks) // (workers * 8))))
+    return rows
+
+
+def save_rows(path, rows):
+    """Запись результатов в CSV или JSON (по расширению файла)"""
+    if path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump([{field: row[field] for field in FIELDS} for row in rows], file, indent=1)
+        return
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетный разбор уровней")
+    parser.add_argument("input", nargs="?", help="набор уровней (.pack или JSON), по умолчанию встроенные")
+    parser.add_argument("-o", "--output", default="analysis.csv", help="файл результата (.csv или .json)")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов")
+    parser.add_argument("--max-states", type=int, default=MAX_STATES,
+                        help="предел состояний на уровень; при превышении разбор уровня прерывается")
+    parser.add_argument("--write-pack", metavar="FILE",
+                        help="сохранить уровни в двоичный набор с выигрышными стартами, минимумом ходов и сложностью")
+    args = parser.parse_args()
+
+    levels = load_levels(args.input) if args.input else LEVELS
+
+    def progress(done, total):
+        print(f"\r{done}/{total} уровней", end="", flush=True)
+
+    started = time.perf_counter()
+    rows = analyze_levels(levels, args.workers, args.max_states, progress)
+    elapsed = time.perf_counter() - started
+    print()
+    save_rows(args.output, rows)
+
+    if args.write_pack:
+        infos = [None if row["truncated"] else
+                 LevelInfo(row.get("start_mask"), row["min_moves"], row["difficulty"]) for row in rows]
+        write_pack(args.write_pack, level_boards(levels), infos)
+
+    solvable = sum(1 for row in rows if row["solvable_starts"])
+    truncated = sum(1 for row in rows if row["truncated"])
+    print(f"Готово: {len(rows)} уровней за {elapsed:.2f} с, решаемых {solvable}, "
+          f"прерванных {truncated} -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
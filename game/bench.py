@@ -0,0 +1,433 @@
+"""Набор замеров производительности; результаты сохраняются в JSON.
+
+Группы:
+    engine     ходы, проверки победы и тупика
+    solver     решатель по размерам поля
+    generator  генератор по размерам поля
+    frames     время кадра draw_board, draw_menu, draw_level_select
+    particles  обновление и отрисовка тысяч частиц
+    env        шаги DropletEnv и BatchEnv со случайными ходами
+    idle       загрузка процессора главным циклом (обычный режим и режим простоя)
+    startup    время запуска в отдельном процессе: импорт pygame, импорт игры, создание окна, первый кадр
+
+Пример:
+    python bench.py -o bench.json
+    python bench.py --groups engine frames --sizes 4 5 6
+Без дисплея запускается с SDL_VIDEODRIVER=dummy.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pygame
+
+import main
+from engine import Board, GameState
+from env import BatchEnv, DropletEnv
+from generator import draw_layouts, random_obstacles, solve_batch
+from levels import LEVELS
+from replay import RESULT_DEAD_END, random_replay
+from solver import Solver, start_candidates
+from symmetry import Symmetry
+
+GROUPS = ("engine", "solver", "generator", "frames", "particles", "env", "idle", "startup")
+DENSITY = 0.2
+
+
+def rate(func, seconds):
+    """Число вызовов func() в секунду; func возвращает, сколько операций сделано"""
+    operations = 0
+    started = time.perf_counter()
+    while True:
+        operations += func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return round(operations / elapsed, 1)
+
+
+def timings(func, seconds, min_runs=5):
+    """Статистика времени одного вызова func() в миллисекундах"""
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < min_runs or time.perf_counter() - started < seconds:
+        before = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - before) * 1000)
+    samples.sort()
+    return {
+        "runs": len(samples),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p50_ms": round(samples[len(samples) // 2], 4),
+        "p95_ms": round(samples[min(len(samples) - 1, len(samples) * 95 // 100)], 4),
+        "max_ms": round(samples[-1], 4),
+    }
+
+
+def bench_engine(seconds, rng):
+    """Ходы GameState, проверка победы и поиск проигранных состояний"""
+    boards = [Board.from_grid(grid) for grid in LEVELS]
+    replays = [random_replay(board, number, rng) for number, board in enumerate(boards)
+               for _ in range(50)]
+    states = [GameState(board) for board in boards]
+
+    def moves():
+        done = 0
+        for replay in replays:
+            state = states[replay.level]
+            state.reset()
+            state.start(replay.start)
+            for direction in replay.directions:
+                state.move(direction)
+            done += len(replay.directions)
+        return done
+
+    # Состояния по ходу случайных партий: (поле, позиция, посещённые клетки)
+    positions = []
+    for replay in replays:
+        board = boards[replay.level]
+        state = GameState(board)
+        state.start(replay.start)
+        positions.append((board, state.pos, state.visited))
+        for direction in replay.directions:
+            state.move(direction)
+            positions.append((board, state.pos, state.visited))
+
+    def wins():
+        won = 0
+        for board, _, visited in positions:
+            won += visited == board.free
+        return len(positions)
+
+    def dead_ends():
+        for board, pos, visited in positions:
+            board.is_stuck(pos, board.obstacles | visited)
+        return len(positions)
+
+    def lost():
+        for board, pos, visited in positions:
+            board.is_lost(pos, visited)
+        return len(positions)
+
+    def successors():
+        for board, pos, visited in positions:
+            board.successors(pos, board.obstacles | visited)
+        return len(positions)
+
+    return {
+        "moves_per_s": rate(moves, seconds),
+        "win_checks_per_s": rate(wins, seconds),
+        "dead_end_checks_per_s": rate(dead_ends, seconds),
+        "lost_checks_per_s": rate(lost, seconds),
+        "successor_lists_per_s": rate(successors, seconds),
+    }
+
+
+def solvable_boards(size, count, rng):
+    """Случайные поля size x size, не отброшенные проверками связности"""
+    boards = []
+    while len(boards) < count:
+        board = Board(size, size, random_obstacles(rng, size, size, DENSITY))
+        if board.free_count and start_candidates(board):
+            boards.append(board)
+    return boards
+
+
+def bench_solver(seconds, rng, sizes):
+    """Полное решение (все старты) случайных полей каждого размера"""
+    results = {}
+    for size in sizes:
+        boards = solvable_boards(size, 20, rng)
+        position = [0]
+
+        def solve():
+            board = boards[position[0] % len(boards)]
+            position[0] += 1
+            Solver(board).solve()
+            return 1
+
+        results[f"{size}x{size}"] = {"levels_per_s": rate(solve, seconds)}
+    return results
+
+
+def bench_generator(seconds, rng, sizes):
+    """Попытки генератора в одном процессе (без накладных расходов пула)"""
+    results = {}
+    for size in sizes:
+        found = [0]
+        symmetry = Symmetry.for_size(size, size)
+        known = set()
+
+        def batch():
+            layouts, attempts = draw_layouts(rng, symmetry, size, size, DENSITY, known, 50, 50)
+            found[0] += len(solve_batch((size, size, layouts)))
+            return attempts
+
+        started = time.perf_counter()
+        attempts = rate(batch, seconds)
+        elapsed = time.perf_counter() - started
+        results[f"{size}x{size}"] = {
+            "attempts_per_s": attempts,
+            "solvable_per_s": round(found[0] / elapsed, 1),
+        }
+    return results
+
+
+def solved_game(game, level):
+    """Партия уровня level, доведённая до победы по решению решателя"""
+    game.load_level(level)
+    results = Solver(game.board).solve()
+    result = next(result for result in results.values() if result.solvable)
+    game.state.start(result.cell)
+    for direction in result.path:
+        game.state.move(direction)
+    game.droplet_pos = game.state.cell
+
+
+def scripted_states(game):
+    """Сценарии кадра поля: имя -> функция подготовки"""
+    def empty():
+        game.load_level(0)
+
+    def playing():
+        game.load_level(0)
+        game.state.start((0, 0))
+        game.droplet_pos = (0, 0)
+
+    def animating():
+        playing()
+        game.move_droplet(main.DOWN)
+        game.update_animation(game.slide_tween.duration / 2)
+
+    def won():
+        solved_game(game, 0)
+
+    def dead_end():
+        rng = random.Random(0)
+        game.load_level(0)
+        replay = random_replay(game.board, 0, rng)
+        while replay.result != RESULT_DEAD_END:
+            replay = random_replay(game.board, 0, rng)
+        game.state.start(replay.start)
+        for direction in replay.directions:
+            game.state.move(direction)
+        game.droplet_pos = game.state.cell
+        game.game_over = True
+
+    return {"empty": empty, "playing": playing, "animating": animating,
+            "won": won, "dead_end": dead_end}
+
+
+def bench_frames(seconds):
+    """Время отрисовки кадра для заранее подготовленных состояний"""
+    results = {}
+    for dirty_rects in (False, True):
+        mode = "dirty_rects" if dirty_rects else "flip"
+        game = main.DropletGame(dirty_rects=dirty_rects)
+        game.game_state = main.STATE_PLAYING
+        for name, prepare in scripted_states(game).items():
+            prepare()
+            results[f"draw_board/{name}/{mode}"] = timings(game.draw_board, seconds)
+
+        game.game_state = main.STATE_MENU
+        results[f"draw_menu/{mode}"] = timings(game.draw_menu, seconds)
+        game.game_state = main.STATE_LEVEL_SELECT
+        results[f"draw_level_select/{mode}"] = timings(game.draw_level_select, seconds)
+
+    # Большое поле: рисуется только то, что попало в камеру
+    rng = random.Random(1)
+    size = 500
+    grid = Board(size, size, random_obstacles(rng, size, size, 0.1) & ~1).to_grid()
+    game = main.DropletGame(levels=[grid])
+    game.game_state = main.STATE_PLAYING
+    game.state.start((0, 0))
+    game.droplet_pos = (0, 0)
+    results[f"draw_board/{size}x{size}/fit"] = timings(game.draw_board, seconds)
+    game.camera.zoom(4)
+    results[f"draw_board/{size}x{size}/zoomed"] = timings(game.draw_board, seconds)
+    return results
+
+
+def bench_particles(seconds, counts=(1000, 5000, 8000)):
+    """Шаг частиц и их отрисовка при постоянном числе живых частиц"""
+    game = main.DropletGame()
+    particles = game.particles
+    results = {}
+    for count in counts:
+        particles.clear()
+        for _ in range(count // 100):
+            particles.emit(100, 250, 330, 400, game.confetti_colors)
+
+        def frame():
+            particles.update(0.0001)  # частицы почти не стареют, их число не падает
+            particles.draw(game.screen, game.camera.viewport)
+
+        results[f"{count}"] = timings(frame, seconds)
+    return results
+
+
+def bench_env(seconds, seed, counts=(1024, 4096, 16384)):
+    """Шаги в секунду: одна партия и пакеты партий, ходы случайные"""
+    env = DropletEnv(seed=seed)
+    env.reset()
+    actions = np.random.default_rng(seed).integers(4, size=4096)
+    position = [0]
+
+    def single():
+        action = actions[position[0] % len(actions)]
+        position[0] += 1
+        _, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            env.reset()
+        return 1
+
+    results = {"single_steps_per_s": rate(single, seconds)}
+    for count in counts:
+        batch = BatchEnv(count=count, seed=seed)
+        batch.reset()
+        batch_actions = np.random.default_rng(seed).integers(4, size=(16, count))
+
+        def step():
+            batch.step(batch_actions[position[0] % len(batch_actions)])
+            position[0] += 1
+            return count
+
+        results[f"batch_{count}_steps_per_s"] = rate(step, seconds)
+    return results
+
+
+IDLE_SCREENS = {
+    "menu": main.STATE_MENU,
+    "level_select": main.STATE_LEVEL_SELECT,
+    "playing": main.STATE_PLAYING,
+}
+
+
+def measure_idle(idle, screen, seconds):
+    """Доля процессорного времени и число кадров за seconds секунд на одном экране"""
+    game = main.DropletGame(idle=idle)
+    game.game_state = IDLE_SCREENS[screen]
+    if screen == "playing":
+        # Капля стоит на поле, анимаций хода нет
+        free = next(game.board.cells(game.board.free))
+        game.state.start(free)
+        game.droplet_pos = free
+
+    frames = 0
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    while time.perf_counter() - wall_start < seconds:
+        game.tick()
+        frames += 1
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    return {"cpu_percent": round(100 * cpu / wall, 1), "fps": round(frames / wall, 1)}
+
+
+def bench_idle(seconds):
+    """Все экраны в обычном режиме и в режиме простоя"""
+    results = {}
+    for screen in IDLE_SCREENS:
+        for idle in (False, True):
+            mode = "idle" if idle else "full"
+            results[f"{screen}/{mode}"] = measure_idle(idle, screen, seconds)
+    return results
+
+
+# Замер запуска внутри нового интерпретатора. Импорт pygame считается отдельно:
+# он сам загружает numpy (pygame.surfarray) и pkg_resources (pygame.pkgdata) и
+# занимает почти всё время импорта, а import_ms - только модули игры
+STARTUP_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import pygame
+pygame_imported = time.perf_counter()
+import main
+imported = time.perf_counter()
+game = main.DropletGame()
+created = time.perf_counter()
+game.draw_menu()
+drawn = time.perf_counter()
+print(json.dumps({"pygame_import_ms": (pygame_imported - started) * 1000,
+                  "import_ms": (imported - pygame_imported) * 1000, "init_ms": (created - imported) * 1000,
+                  "first_frame_ms": (drawn - created) * 1000}))
+"""
+
+
+def bench_startup(runs=5):
+    """Медианы времени запуска по runs новым процессам"""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        sample = json.loads(output.strip().splitlines()[-1])
+        sample["process_ms"] = (time.perf_counter() - started) * 1000
+        samples.append(sample)
+    return {key: round(statistics.median(sample[key] for sample in samples), 2) for key in samples[0]}
+
+
+def run(groups=GROUPS, seconds=1.0, sizes=(4, 5, 6), seed=0):
+    """Выбранные группы замеров; результат готов к сохранению в JSON"""
+    # Окно создаётся только в DropletGame (pygame.display.init), поэтому драйвер
+    # достаточно выбрать здесь; процессы замера запуска наследуют его
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    rng = random.Random(seed)
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+            "seconds": seconds,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+    }
+    for group in groups:
+        started = time.perf_counter()
+        if group == "engine":
+            results[group] = bench_engine(seconds, rng)
+        elif group == "solver":
+            results[group] = bench_solver(seconds, rng, sizes)
+        elif group == "generator":
+            results[group] = bench_generator(seconds, rng, sizes)
+        elif group == "frames":
+            results[group] = bench_frames(seconds)
+        elif group == "particles":
+            results[group] = bench_particles(seconds)
+        elif group == "env":
+            results[group] = bench_env(seconds, seed)
+        elif group == "idle":
+            results[group] = bench_idle(seconds)
+        elif group == "startup":
+            results[group] = bench_startup()
+        print(f"{group}: {time.perf_counter() - started:.1f} с", flush=True)
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Замеры производительности игры")
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--seconds", type=float, default=1.0, help="длительность каждого замера")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 5, 6],
+                        help="размеры поля для решателя и генератора")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="bench.json")
+    args = parser.parse_args()
+
+    results = run(args.groups, args.seconds, args.sizes, args.seed)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2, ensure_ascii=False)
+    print(f"Результаты -> {args.output}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main_cli()
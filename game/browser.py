@@ -0,0 +1,176 @@
+"""Список уровней для экрана выбора: прокрутка, страницы и миниатюры.
+
+BrowserLayout - геометрия сетки плиток: по смещению прокрутки сразу даёт
+видимые плитки и плитку под курсором, поэтому рисуются и проверяются на
+клик только они, сколько бы уровней ни было в наборе.
+
+ThumbnailCache - миниатюры полей. Их рисует фоновый поток, а главный
+только забирает готовые, так что прокрутка не ждёт отрисовки. Хранится
+ограниченное число миниатюр, давно не показанные вытесняются.
+"""
+
+import queue
+import threading
+from collections import OrderedDict
+
+import pygame
+
+# Цвета миниатюры: свободная клетка и препятствие
+THUMB_FREE = (235, 240, 250)
+THUMB_OBSTACLE = (200, 50, 50)
+THUMB_CAPACITY = 256
+
+
+class BrowserLayout:
+    """Сетка плиток columns в ряд внутри прямоугольника view с вертикальной прокруткой"""
+
+    def __init__(self, view, count, columns, tile, gap):
+        self.view = pygame.Rect(view)
+        self.count = count
+        self.columns = columns
+        self.tile = tile
+        self.gap = gap
+        self.step = tile + gap
+        self.left = self.view.x + (self.view.width - (columns * tile + (columns - 1) * gap)) // 2
+        self.rows = -(-count // columns)
+        self.rows_per_page = max(1, (self.view.height + gap) // self.step)
+        self.offset = 0  # прокрутка в пикселях
+
+    @property
+    def max_offset(self):
+        return max(0, self.rows * self.step - self.gap - self.view.height)
+
+    @property
+    def page_height(self):
+        return self.rows_per_page * self.step
+
+    @property
+    def pages(self):
+        return max(1, -(-self.rows // self.rows_per_page))
+
+    @property
+    def page(self):
+        """Текущая страница (с нуля): та, на которую приходится верх области"""
+        if self.offset >= self.max_offset:
+            return self.pages - 1
+        return self.offset // self.page_height
+
+    def scroll(self, pixels):
+        self.offset = max(0, min(self.max_offset, self.offset + pixels))
+
+    def show_page(self, page):
+        page = max(0, min(self.pages - 1, page))
+        self.offset = min(self.max_offset, page * self.page_height)
+
+    def show_index(self, index):
+        """Прокрутка так, чтобы плитка index была видна целиком"""
+        top = index // self.columns * self.step
+        if top < self.offset:
+            self.offset = top
+        elif top + self.tile > self.offset + self.view.height:
+            self.offset = top + self.tile - self.view.height
+        self.scroll(0)
+
+    def tile_rect(self, index):
+        row, col = divmod(index, self.columns)
+        return pygame.Rect(self.left + col * self.step,
+                           self.view.y + row * self.step - self.offset,
+                           self.tile, self.tile)
+
+    def visible(self):
+        """Номера уровней, плитки которых хотя бы частично видны"""
+        first_row = self.offset // self.step
+        last_row = min(self.rows, (self.offset + self.view.height) // self.step + 1)
+        return range(first_row * self.columns, min(self.count, last_row * self.columns))
+
+    def index_at(self, point):
+        """Номер уровня под точкой или None (промежутки между плитками не считаются)"""
+        x, y = point
+        if not self.view.collidepoint(x, y):
+            return None
+        col, dx = divmod(x - self.left, self.step)
+        row, dy = divmod(y - self.view.y + self.offset, self.step)
+        if not 0 <= col < self.columns or dx >= self.tile or dy >= self.tile:
+            return None
+        index = row * self.columns + col
+        return index if index < self.count else None
+
+
+def render_thumbnail(board, size):
+    """Миниатюра поля в квадрате size x size (без convert, можно в фоновом потоке)"""
+    width, height = board.width, board.height
+    # Поле переводится в 8-битную картинку одним проходом по маске, а не по клеткам
+    bits = format(board.obstacles, f"0{board.size}b")[::-1] if board.size else ""
+    pixels = bits.encode("ascii").translate(bytes.maketrans(b"01", b"\x00\x01"))
+    image = pygame.image.frombuffer(pixels, (width, height), "P")
+    image.set_palette([THUMB_FREE, THUMB_OBSTACLE] + [(0, 0, 0)] * 254)
+    scale = size / max(width, height)
+    target = (max(1, round(width * scale)), max(1, round(height * scale)))
+    # Копия нужна и при совпадении размеров: frombuffer ссылается на pixels
+    return pygame.transform.scale(image, target)
+
+
+class ThumbnailCache:
+    """Ограниченный LRU-кэш миниатюр, которые рисует фоновый поток"""
+
+    def __init__(self, load_board, size, capacity=THUMB_CAPACITY):
+        self.load_board = load_board  # номер уровня -> Board
+        self.size = size
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.requested = set()
+        self.wanted = set()  # номера, видимые сейчас; остальные запросы пропускаются
+        self._requests = queue.LifoQueue()
+        self._ready = queue.Queue()
+        self._worker = None
+
+    def get(self, index):
+        """Готовая миниатюра или None (тогда она ставится в очередь)"""
+        surface = self.surfaces.get(index)
+        if surface is not None:
+            self.surfaces.move_to_end(index)
+            return surface
+        if index not in self.requested:
+            self.requested.add(index)
+            self._requests.put(index)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="thumbnails", daemon=True)
+                self._worker.start()
+        return None
+
+    def want(self, indices):
+        """Номера, которые сейчас на экране"""
+        self.wanted = set(indices)
+
+    def collect(self):
+        """Перенос готовых миниатюр из фонового потока; True, если что-то добавилось"""
+        added = False
+        while True:
+            try:
+                index, surface = self._ready.get_nowait()
+            except queue.Empty:
+                return added
+            self.requested.discard(index)
+            if surface is None:
+                continue
+            self.surfaces[index] = surface.convert()
+            added = True
+            if len(self.surfaces) > self.capacity:
+                self.surfaces.popitem(last=False)
+
+    @property
+    def pending(self):
+        """Есть ли ещё не готовые миниатюры"""
+        return bool(self.requested)
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def _run(self):
+        while True:
+            index = self._requests.get()
+            if index not in self.wanted:
+                # Уровень уже прокручен за край: рисовать незачем
+                self._ready.put((index, None))
+                continue
+            self._ready.put((index, render_thumbnail(self.load_board(index), self.size)))
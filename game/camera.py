@@ -0,0 +1,117 @@
+"""Камера поля: масштаб, прокрутка и видимая область.
+
+Координаты мира - пиксели поля при текущем размере клетки, экранные
+координаты отличаются сдвигом (x, y) и положением области вывода.
+"""
+
+# Пределы размера клетки в пикселях
+MIN_CELL_SIZE = 4
+MAX_CELL_SIZE = 100
+
+
+class Camera:
+    """Окно просмотра поля rows x cols клеток в прямоугольнике viewport"""
+
+    def __init__(self, viewport, rows, cols, cell_size=MAX_CELL_SIZE):
+        self.viewport = viewport  # (x, y, ширина, высота) области поля на экране
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = cell_size
+        self.x = 0  # сдвиг мира относительно области вывода в пикселях
+        self.y = 0
+
+    @property
+    def key(self):
+        """Всё, от чего зависит картинка статичных слоёв"""
+        return self.viewport, self.cell_size, self.x, self.y
+
+    def fit(self):
+        """Масштаб, при котором поле целиком помещается (но не мельче MIN_CELL_SIZE)"""
+        _, _, width, height = self.viewport
+        size = min(width // max(1, self.cols), height // max(1, self.rows))
+        self.cell_size = max(MIN_CELL_SIZE, min(MAX_CELL_SIZE, size))
+        self.x = 0
+        self.y = 0
+        self.clamp()
+
+    def clamp(self):
+        """Не даёт увести поле за край; поле меньше области вывода стоит по центру"""
+        _, _, width, height = self.viewport
+        world_width = self.cols * self.cell_size
+        world_height = self.rows * self.cell_size
+        if world_width <= width:
+            self.x = -((width - world_width) // 2)
+        else:
+            self.x = max(0, min(self.x, world_width - width))
+        if world_height <= height:
+            self.y = -((height - world_height) // 2)
+        else:
+            self.y = max(0, min(self.y, world_height - height))
+
+    def pan(self, dx, dy):
+        """Сдвиг на (dx, dy) экранных пикселей"""
+        self.x += dx
+        self.y += dy
+        self.clamp()
+
+    def zoom(self, factor, anchor=None):
+        """Изменение масштаба с неподвижной точкой anchor (экранные координаты)"""
+        vx, vy, width, height = self.viewport
+        if anchor is None:
+            anchor = (vx + width // 2, vy + height // 2)
+        ax, ay = anchor[0] - vx, anchor[1] - vy
+        old = self.cell_size
+        new = max(MIN_CELL_SIZE, min(MAX_CELL_SIZE, int(round(old * factor))))
+        if new == old and factor != 1:
+            new = max(MIN_CELL_SIZE, min(MAX_CELL_SIZE, old + (1 if factor > 1 else -1)))
+        self.x = (self.x + ax) * new // old - ax
+        self.y = (self.y + ay) * new // old - ay
+        self.cell_size = new
+        self.clamp()
+
+    def follow(self, cell, margin=1):
+        """Прокрутка так, чтобы клетка (с запасом margin клеток) была видна"""
+        _, _, width, height = self.viewport
+        row, col = cell
+        size = self.cell_size
+        left = (col - margin) * size
+        right = (col + 1 + margin) * size
+        top = (row - margin) * size
+        bottom = (row + 1 + margin) * size
+        if left < self.x:
+            self.x = left
+        elif right > self.x + width:
+            self.x = right - width
+        if top < self.y:
+            self.y = top
+        elif bottom > self.y + height:
+            self.y = bottom - height
+        self.clamp()
+
+    def cell_origin(self, cell):
+        """Экранные координаты левого верхнего угла клетки"""
+        row, col = cell
+        return (self.viewport[0] + col * self.cell_size - self.x,
+                self.viewport[1] + row * self.cell_size - self.y)
+
+    def cell_at(self, point):
+        """Клетка под экранной точкой или None"""
+        vx, vy, width, height = self.viewport
+        x, y = point
+        if not (vx <= x < vx + width and vy <= y < vy + height):
+            return None
+        row = (y - vy + self.y) // self.cell_size
+        col = (x - vx + self.x) // self.cell_size
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row, col
+        return None
+
+    def visible(self):
+        """Видимые клетки: (range строк, range столбцов)"""
+        _, _, width, height = self.viewport
+        size = self.cell_size
+        first_row = max(0, self.y // size)
+        first_col = max(0, self.x // size)
+        last_row = min(self.rows, (self.y + height + size - 1) // size)
+        last_col = min(self.cols, (self.x + width + size - 1) // size)
+        return range(first_row, last_row), range(first_col, last_col)
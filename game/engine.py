@@ -0,0 +1,472 @@
+"""Правила игры без pygame: препятствия и посещённые клетки хранятся как битовые маски.
+
+Клетка (row, col) соответствует биту с номером row * width + col.
+"""
+
+# Направления движения
+UP = 0
+DOWN = 1
+LEFT = 2
+RIGHT = 3
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+DELTAS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+# Для полей не больше этого числа клеток лучи и соседи считаются заранее
+TABLE_LIMIT = 1024
+
+# Поля со сторонами не больше этого заливаются по одной клетке за шаг
+SMALL_SIDE = 16
+
+
+def iter_bits(mask):
+    """Номера установленных битов маски по возрастанию"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Board:
+    """Неизменяемая геометрия уровня: размеры и маска препятствий"""
+
+    __slots__ = ("width", "height", "size", "full", "obstacles", "free", "free_count",
+                 "_column", "_no_left", "_no_right", "_rays", "_neighbours")
+
+    def __init__(self, width, height, obstacles=0):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.full = (1 << self.size) - 1
+        self.obstacles = obstacles & self.full
+        self.free = self.full & ~self.obstacles
+        self.free_count = self.free.bit_count()
+        # Биты 0, width, 2 * width, ... - первый столбец поля
+        self._column = self.full // ((1 << width) - 1)
+        # Маски без первого и последнего столбца - для сдвига всей маски на клетку
+        self._no_left = self.full & ~self._column
+        self._no_right = self.full & ~(self._column << (width - 1))
+
+        self._rays = None
+        self._neighbours = None
+        if self.size <= TABLE_LIMIT:
+            self._rays = tuple([self._ray(index, direction) for index in range(self.size)]
+                               for direction in DIRECTIONS)
+            self._neighbours = [self._neighbour_mask(index) for index in range(self.size)]
+
+    @classmethod
+    def from_grid(cls, grid):
+        """Создание поля из списка строк, где 1 - препятствие"""
+        height = len(grid)
+        width = len(grid[0]) if height else 0
+        # Маска собирается из строки битов: на больших полях это линейно по числу клеток
+        bits = "".join("1" if value == 1 else "0" for line in reversed(grid) for value in reversed(line))
+        return cls(width, height, int(bits or "0", 2))
+
+    def to_grid(self):
+        """Обратное преобразование в список строк"""
+        return [[(self.obstacles >> (row * self.width + col)) & 1 for col in range(self.width)]
+                for row in range(self.height)]
+
+    def index(self, cell):
+        """Номер бита клетки (row, col)"""
+        return cell[0] * self.width + cell[1]
+
+    def cell(self, index):
+        """Клетка (row, col) по номеру бита"""
+        return divmod(index, self.width)
+
+    def cells(self, mask):
+        """Клетки маски в порядке возрастания номеров"""
+        width = self.width
+        for index in iter_bits(mask):
+            yield divmod(index, width)
+
+    def window_cells(self, mask, rows, cols):
+        """Клетки маски внутри прямоугольника rows x cols (диапазоны строк и столбцов).
+
+        Работа пропорциональна размеру окна, а не всего поля: на каждую строку
+        окна берётся только её кусок маски.
+        """
+        if not rows or not cols:
+            return
+        width = self.width
+        first_col = cols.start
+        span = (1 << len(cols)) - 1
+        mask >>= rows.start * width + first_col
+        for row in rows:
+            bits = mask & span
+            while bits:
+                low = bits & -bits
+                yield row, first_col + low.bit_length() - 1
+                bits ^= low
+            mask >>= width
+
+    def is_free(self, cell):
+        """Клетка внутри поля и не занята препятствием"""
+        row, col = cell
+        return (0 <= row < self.height and 0 <= col < self.width and
+                not (self.obstacles >> (row * self.width + col)) & 1)
+
+    def _ray(self, index, direction):
+        """Все клетки от index до края поля в направлении direction (без самой index)"""
+        width = self.width
+        col = index % width
+        if direction == RIGHT:
+            return ((1 << (width - col - 1)) - 1) << (index + 1)
+        if direction == LEFT:
+            return ((1 << col) - 1) << (index - col)
+        if direction == DOWN:
+            return (self._column << (index + width)) & self.full
+        return (self._column << col) & ((1 << index) - 1)
+
+    def _neighbour_mask(self, index):
+        """Маска соседних клеток по четырём направлениям"""
+        width = self.width
+        row, col = divmod(index, width)
+        mask = 0
+        if row > 0:
+            mask |= 1 << (index - width)
+        if row < self.height - 1:
+            mask |= 1 << (index + width)
+        if col > 0:
+            mask |= 1 << (index - 1)
+        if col < width - 1:
+            mask |= 1 << (index + 1)
+        return mask
+
+    def ray(self, index, direction):
+        """Луч из клетки index до края поля"""
+        if self._rays is not None:
+            return self._rays[direction][index]
+        return self._ray(index, direction)
+
+    def neighbours(self, index):
+        """Маска соседей клетки index"""
+        if self._neighbours is not None:
+            return self._neighbours[index]
+        return self._neighbour_mask(index)
+
+    def step(self, mask, direction):
+        """Сдвиг всех клеток маски на одну клетку в направлении direction"""
+        if direction == RIGHT:
+            return (mask & self._no_right) << 1
+        if direction == LEFT:
+            return (mask & self._no_left) >> 1
+        if direction == DOWN:
+            return (mask << self.width) & self.full
+        return mask >> self.width
+
+    def spread(self, mask):
+        """Клетки, соседние хотя бы с одной клеткой маски"""
+        width = self.width
+        return (((mask & self._no_right) << 1) | ((mask & self._no_left) >> 1) |
+                ((mask << width) & self.full) | (mask >> width))
+
+    def fill(self, seed, within, direction):
+        """Протяжка клеток seed вдоль направления direction по клеткам within.
+
+        Сдвиги на 1, 2, 4, ... клетки (заполнение Когге-Стоуна), поэтому луч
+        любой длины заполняется за логарифмическое число операций.
+        """
+        if direction == RIGHT or direction == LEFT:
+            # Перенос через край строки запрещён
+            if direction == RIGHT:
+                within &= self._no_left
+            else:
+                within &= self._no_right
+            step, limit = 1, self.width
+        else:
+            step, limit = self.width, self.size
+        if direction == RIGHT or direction == DOWN:
+            while step < limit:
+                seed |= within & (seed << step)
+                within &= within << step
+                step <<= 1
+        else:
+            while step < limit:
+                seed |= within & (seed >> step)
+                within &= within >> step
+                step <<= 1
+        return seed
+
+    def flood(self, seed, within, target=0):
+        """Связная область маски within, содержащая клетки seed.
+
+        Если задан target, заливка останавливается, как только область
+        накрыла все его клетки (тогда возвращается часть области).
+        """
+        region = seed & within
+        if self.width <= SMALL_SIDE and self.height <= SMALL_SIDE:
+            # На маленьком поле дешевле расширять область по одной клетке
+            while True:
+                grown = (region | self.spread(region)) & within
+                if grown == region or target and grown & target == target:
+                    return grown
+                region = grown
+        while True:
+            grown = region
+            for direction in DIRECTIONS:
+                grown = self.fill(grown, within, direction)
+            if grown == region or target and grown & target == target:
+                return grown
+            region = grown
+
+    def dead_ends(self, area):
+        """Клетки маски area, у которых ровно один сосед в area.
+
+        Войдя в такую клетку, капля уже не может из неё выйти, поэтому ею
+        путь может только начинаться или заканчиваться.
+        """
+        up, down, left, right = (self.step(area, direction) & area for direction in (DOWN, UP, RIGHT, LEFT))
+        any_side = up | down | left | right
+        two_sides = (up & down) | (up & left) | (up & right) | (down & left) | (down & right) | (left & right)
+        return area & any_side & ~two_sides
+
+    def is_lost(self, index, visited):
+        """Победа из состояния невозможна по соображениям связности.
+
+        Непосещённые клетки вместе с каплей должны образовывать одну связную
+        область, и среди них может быть не больше одной клетки-тупика
+        (в ней путь закончится). Проверка необходимая, но не достаточная.
+        """
+        rest = self.free & ~visited
+        if not rest:
+            return False
+        area = rest | (1 << index)
+        if (self.dead_ends(area) & rest).bit_count() > 1:
+            return True
+        return self.flood(1 << index, area) != area
+
+    def is_lost_after(self, index, visited, removed):
+        """То же, что is_lost, для состояния после хода из непроигранного состояния.
+
+        removed - клетки, ушедшие за ход из области капли (прошлая позиция и
+        путь без конечной клетки). Область до хода была связной, а каждая
+        связная часть новой области граничит с removed, поэтому достаточно,
+        чтобы соседи removed лежали в одной части. Заливка идёт от одного
+        соседа и останавливается, накрыв остальных, - обычно рядом с ходом,
+        а не по всему полю.
+        """
+        rest = self.free & ~visited
+        if not rest:
+            return False
+        area = rest | (1 << index)
+        if (self.dead_ends(area) & rest).bit_count() > 1:
+            return True
+        border = self.spread(removed) & area
+        if not border & (border - 1):
+            return False
+        return self.flood(border & -border, area, border) & border != border
+
+    def slide(self, index, blocked, direction):
+        """Скольжение из index до первой занятой клетки.
+
+        Возвращает (конечная клетка, маска пройденных клеток без стартовой).
+        Если сдвинуться нельзя, маска равна 0, а клетка остаётся index.
+        """
+        ray = self.ray(index, direction)
+        hit = ray & blocked
+        if direction == RIGHT or direction == DOWN:
+            if hit:
+                ray &= (hit & -hit) - 1
+            if not ray:
+                return index, 0
+            return ray.bit_length() - 1, ray
+        if hit:
+            ray = ray >> hit.bit_length() << hit.bit_length()
+        if not ray:
+            return index, 0
+        return (ray & -ray).bit_length() - 1, ray
+
+    def successors(self, index, blocked):
+        """Все возможные ходы из index: список (направление, конечная клетка, маска пути)"""
+        if self._rays is None:
+            result = []
+            for direction in DIRECTIONS:
+                end, mask = self.slide(index, blocked, direction)
+                if mask:
+                    result.append((direction, end, mask))
+            return result
+
+        up, down, left, right = self._rays
+        result = []
+        ray = up[index]
+        hit = ray & blocked
+        if hit:
+            ray = ray >> hit.bit_length() << hit.bit_length()
+        if ray:
+            result.append((UP, (ray & -ray).bit_length() - 1, ray))
+        ray = down[index]
+        hit = ray & blocked
+        if hit:
+            ray &= (hit & -hit) - 1
+        if ray:
+            result.append((DOWN, ray.bit_length() - 1, ray))
+        ray = left[index]
+        hit = ray & blocked
+        if hit:
+            ray = ray >> hit.bit_length() << hit.bit_length()
+        if ray:
+            result.append((LEFT, (ray & -ray).bit_length() - 1, ray))
+        ray = right[index]
+        hit = ray & blocked
+        if hit:
+            ray &= (hit & -hit) - 1
+        if ray:
+            result.append((RIGHT, ray.bit_length() - 1, ray))
+        return result
+
+    def path_cells(self, index, mask, direction):
+        """Клетки пути в порядке движения, начиная со стартовой"""
+        indices = list(iter_bits(mask))
+        if direction == UP or direction == LEFT:
+            indices.reverse()
+        width = self.width
+        return [divmod(index, width)] + [divmod(i, width) for i in indices]
+
+    def is_stuck(self, index, blocked):
+        """Из клетки index нельзя сдвинуться ни в одну сторону"""
+        return not self.neighbours(index) & ~blocked
+
+
+class GameState:
+    """Состояние партии: позиция капли, маска посещённых клеток и число ходов.
+
+    Производные величины (число посещённых клеток, победа, тупик, проигранность,
+    доступные ходы) хранятся готовыми и пересчитываются только при start, move,
+    undo, redo и reset, поэтому чтение их в каждом кадре ничего не стоит.
+
+    Для отмены ходов хранятся снимки (позиция, посещённые клетки, проигранность,
+    направление хода): отмена и повтор - одна операция со стеком, без
+    переигрывания партии.
+    """
+
+    __slots__ = ("board", "pos", "visited", "moves", "history", "future",
+                 "visited_count", "won", "dead_end", "lost", "options")
+
+    def __init__(self, board):
+        self.board = board
+        self.reset()
+
+    def reset(self):
+        """Возврат к началу уровня"""
+        self.pos = None
+        self.visited = 0
+        self.moves = 0
+        self.lost = False
+        self.history = []  # снимки до каждого сделанного хода
+        self.future = []   # снимки после отменённых ходов, для повтора
+        self._refresh()
+
+    def _refresh(self, removed=None, lost_known=False):
+        """Пересчёт производных величин после изменения позиции или посещённых клеток.
+
+        removed - клетки, ушедшие из области капли за сделанный ход: тогда
+        проигранность проверяется только вокруг хода. lost_known - она уже
+        взята из снимка (отмена и повтор).
+        """
+        board = self.board
+        self.visited_count = self.visited.bit_count()
+        if self.pos is None:
+            self.won = False
+            self.dead_end = False
+            self.options = {}
+            return
+        self.won = self.visited == board.free
+        # Доступные ходы: направление -> (конечная клетка, маска пути)
+        self.options = {direction: (end, mask) for direction, end, mask
+                        in board.successors(self.pos, board.obstacles | self.visited)}
+        self.dead_end = not self.won and not self.options
+        # Проигранное состояние остаётся проигранным, повторно проверять не нужно
+        if self.won or self.dead_end:
+            self.lost = self.dead_end
+        elif self.lost or lost_known:
+            pass
+        elif removed is not None:
+            self.lost = board.is_lost_after(self.pos, self.visited, removed)
+        else:
+            self.lost = board.is_lost(self.pos, self.visited)
+
+    @property
+    def cell(self):
+        """Позиция капли как (row, col) или None до начала игры"""
+        if self.pos is None:
+            return None
+        return divmod(self.pos, self.board.width)
+
+    @property
+    def free_count(self):
+        return self.board.free_count
+
+    def start(self, cell):
+        """Установка капли на свободную клетку"""
+        if self.pos is not None or not self.board.is_free(cell):
+            return False
+        self.pos = self.board.index(cell)
+        self.visited = 1 << self.pos
+        self._refresh()
+        return True
+
+    def path(self, direction):
+        """Клетки, через которые пройдёт капля, начиная с текущей (ход не выполняется)"""
+        if self.pos is None:
+            return []
+        option = self.options.get(direction)
+        if option is None:
+            return [self.cell]
+        return self.board.path_cells(self.pos, option[1], direction)
+
+    def move(self, direction):
+        """Выполнение хода; возвращает маску новых посещённых клеток (0, если хода нет)"""
+        option = self.options.get(direction)
+        if option is None:
+            return 0
+        self.history.append((self.pos, self.visited, self.lost, direction))
+        self.future.clear()
+        end, mask = option
+        # Из области капли уходят прошлая позиция и путь без конечной клетки
+        removed = ((1 << self.pos) | mask) & ~(1 << end)
+        self.pos = end
+        self.visited |= mask
+        self.moves += 1
+        self._refresh(removed)
+        return mask
+
+    def undo(self):
+        """Отмена последнего хода; возвращает его направление или None, если отменять нечего"""
+        if not self.history:
+            return None
+        pos, visited, lost, direction = self.history.pop()
+        self.future.append((self.pos, self.visited, self.lost, direction))
+        self.pos, self.visited, self.lost = pos, visited, lost
+        self.moves -= 1
+        self._refresh(lost_known=True)
+        return direction
+
+    @property
+    def redo_direction(self):
+        """Направление хода, который вернёт redo(), или None"""
+        return self.future[-1][3] if self.future else None
+
+    def redo(self):
+        """Повтор отменённого хода; возвращает его направление или None"""
+        if not self.future:
+            return None
+        pos, visited, lost, direction = self.future.pop()
+        self.history.append((self.pos, self.visited, self.lost, direction))
+        self.pos, self.visited, self.lost = pos, visited, lost
+        self.moves += 1
+        self._refresh(lost_known=True)
+        return direction
+
+    def is_won(self):
+        """Все свободные клетки посещены"""
+        return self.won
+
+    def is_lost(self):
+        """Победа уже невозможна, даже если ходы ещё есть"""
+        return self.lost
+
+    def is_dead_end(self):
+        """Капля в тупике: клетки ещё остались, а сдвинуться некуда"""
+        return self.dead_end
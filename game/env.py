@@ -0,0 +1,289 @@
+"""Среда для автоматических игроков: интерфейс в духе Gym поверх правил engine.
+
+DropletEnv - одна партия: reset / step / action_mask / observation. Ход
+делается через GameState, поэтому правила те же, что в игре (путь хода как
+в calculate_movement_path, тупик как в check_game_over).
+
+BatchEnv - тысячи партий сразу. Поля до 64 клеток хранятся как uint64, и
+ход всех партий - несколько операций NumPy над массивами: луч из таблицы,
+обрезка лучом по первой занятой клетке, подсчёт пройденных клеток. Партии,
+которые закончились, сразу начинаются заново со случайного уровня и
+случайной стартовой клетки.
+
+Действие - направление (UP, DOWN, LEFT, RIGHT). Награда за ход - доля
+свободных клеток уровня, закрашенных этим ходом, плюс WIN_REWARD за победу;
+невозможный ход ничего не меняет и даёт 0. Партия заканчивается победой или
+тупиком (terminated) либо превышением max_steps (truncated).
+
+Пример:
+    env = DropletEnv(seed=0)
+    observation, info = env.reset()
+    while True:
+        action = random.choice(np.flatnonzero(env.action_mask()))
+        observation, reward, terminated, truncated, info = env.step(action)
+        if terminated or truncated:
+            break
+"""
+
+import numpy as np
+
+from engine import Board, DIRECTIONS, DOWN, GameState, RIGHT
+from levelpack import level_boards
+from levels import LEVELS
+
+WIN_REWARD = 1.0
+# Предел ходов партии по умолчанию - столько-то ходов на свободную клетку
+STEPS_PER_CELL = 4
+# Наибольшее поле BatchEnv: маска должна помещаться в uint64
+BATCH_MAX_CELLS = 64
+
+# Число единичных битов в байте - для NumPy без bitwise_count (до 2.0)
+BYTE_BITS = np.array([bin(value).count("1") for value in range(256)], np.uint8)
+
+# Слои наблюдения
+PLANE_OBSTACLES = 0
+PLANE_VISITED = 1
+PLANE_DROPLET = 2
+
+
+def as_boards(levels):
+    """Поля из Board, списка Board, списка сеток или двоичного набора"""
+    if levels is None:
+        levels = LEVELS
+    if isinstance(levels, Board):
+        return [levels]
+    if isinstance(levels, list) and levels and isinstance(levels[0], Board):
+        return levels
+    return list(level_boards(levels))
+
+
+def bit_counts(masks):
+    """Число единичных битов каждой маски uint64"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks).astype(np.int64)
+    return BYTE_BITS[masks.astype("<u8").view(np.uint8).reshape(-1, 8)].sum(axis=1, dtype=np.int64)
+
+
+def mask_planes(masks, width, height):
+    """Маски uint64 формы (n,) -> слои uint8 формы (n, height, width)"""
+    bits = np.unpackbits(masks.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    return bits[:, :width * height].reshape(-1, height, width)
+
+
+class DropletEnv:
+    """Одна партия на одном из уровней"""
+
+    def __init__(self, levels=None, max_steps=None, seed=None):
+        self.boards = as_boards(levels)
+        self.max_steps = max_steps
+        self.rng = np.random.default_rng(seed)
+        self.level = 0
+        self.state = None
+        self.steps = 0
+
+    @property
+    def board(self):
+        return self.boards[self.level]
+
+    def reset(self, seed=None, options=None):
+        """Новая партия; options: level - номер уровня, start - стартовая клетка (row, col).
+
+        Без них уровень и старт выбираются случайно. Возвращает (наблюдение, info).
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        options = options or {}
+        level = options.get("level")
+        self.level = int(self.rng.integers(len(self.boards))) if level is None else level
+        board = self.board
+        if not board.free_count:
+            raise ValueError(f"на уровне {self.level} нет свободных клеток")
+        self.state = GameState(board)
+        start = options.get("start")
+        if start is None:
+            start = board.cell(self._random_free())
+        if not self.state.start(start):
+            raise ValueError(f"клетка {start} занята или вне поля")
+        self.steps = 0
+        return self.observation(), self._info()
+
+    def _random_free(self):
+        """Номер бита случайной свободной клетки"""
+        board = self.board
+        target = int(self.rng.integers(board.free_count))
+        mask = board.free
+        for _ in range(target):
+            mask &= mask - 1
+        return (mask & -mask).bit_length() - 1
+
+    def step(self, action):
+        """Ход в направлении action: (наблюдение, награда, terminated, truncated, info)"""
+        state = self.state
+        if state is None:
+            raise RuntimeError("перед step нужен reset")
+        mask = state.move(int(action))
+        self.steps += 1
+        reward = mask.bit_count() / state.free_count
+        if state.won:
+            reward += WIN_REWARD
+        terminated = state.won or state.dead_end
+        limit = self.max_steps or STEPS_PER_CELL * state.free_count
+        truncated = not terminated and self.steps >= limit
+        return self.observation(), reward, terminated, truncated, self._info()
+
+    def action_mask(self):
+        """Возможные ходы: массив bool из четырёх направлений"""
+        mask = np.zeros(len(DIRECTIONS), bool)
+        for direction in self.state.options:
+            mask[direction] = True
+        return mask
+
+    def observation(self):
+        """Слои uint8 формы (3, высота, ширина): препятствия, посещённые клетки, капля"""
+        board = self.board
+        planes = np.zeros((3, board.height, board.width), np.uint8)
+        for row, col in board.cells(board.obstacles):
+            planes[PLANE_OBSTACLES, row, col] = 1
+        for row, col in board.cells(self.state.visited):
+            planes[PLANE_VISITED, row, col] = 1
+        row, col = self.state.cell
+        planes[PLANE_DROPLET, row, col] = 1
+        return planes
+
+    def _info(self):
+        state = self.state
+        return {"level": self.level, "moves": state.moves, "visited": state.visited_count,
+                "won": state.won, "dead_end": state.dead_end, "action_mask": self.action_mask()}
+
+
+class BatchEnv:
+    """count партий на уровнях одного размера, ходы которых делаются одновременно"""
+
+    def __init__(self, levels=None, count=4096, max_steps=None, seed=None):
+        boards = as_boards(levels)
+        width, height = boards[0].width, boards[0].height
+        if any(board.width != width or board.height != height for board in boards):
+            raise ValueError("все уровни BatchEnv должны быть одного размера")
+        if width * height > BATCH_MAX_CELLS:
+            raise ValueError(f"BatchEnv поддерживает поля до {BATCH_MAX_CELLS} клеток")
+        boards = [board for board in boards if board.free_count]
+        if not boards:
+            raise ValueError("нет уровней со свободными клетками")
+        self.boards = boards
+        self.width, self.height = width, height
+        self.count = count
+        self.rng = np.random.default_rng(seed)
+        size = width * height
+        geometry = boards[0]
+
+        # Таблицы геометрии: лучи до края поля и соседняя клетка по направлениям
+        self.rays = np.array([[geometry.ray(index, direction) for index in range(size)]
+                              for direction in DIRECTIONS], np.uint64)
+        self.neighbour = np.zeros((len(DIRECTIONS), size), np.uint64)
+        for direction, ray in enumerate(self.rays):
+            for index in range(size):
+                ray_mask = int(ray[index])
+                if ray_mask:
+                    if direction in (DOWN, RIGHT):
+                        self.neighbour[direction, index] = ray_mask & -ray_mask
+                    else:
+                        self.neighbour[direction, index] = 1 << (ray_mask.bit_length() - 1)
+        # Сдвиг номера клетки на один шаг в направлении
+        self.delta = np.array([-width, width, -1, 1], np.int64)
+        self.forward = np.array([direction in (DOWN, RIGHT) for direction in DIRECTIONS])
+
+        # Уровни: препятствия, свободные клетки и список свободных клеток для выбора старта
+        self.level_obstacles = np.array([board.obstacles for board in boards], np.uint64)
+        self.level_free = np.array([board.free for board in boards], np.uint64)
+        self.level_free_count = np.array([board.free_count for board in boards], np.int64)
+        self.level_cells = np.zeros((len(boards), size), np.int64)
+        for number, board in enumerate(boards):
+            cells = [row * width + col for row, col in board.cells(board.free)]
+            self.level_cells[number, :len(cells)] = cells
+        self.max_steps = max_steps
+
+        # Состояние партий
+        self.level = np.zeros(count, np.int64)
+        self.obstacles = np.zeros(count, np.uint64)
+        self.free = np.zeros(count, np.uint64)
+        self.free_count = np.zeros(count, np.int64)
+        self.pos = np.zeros(count, np.int64)
+        self.visited = np.zeros(count, np.uint64)
+        self.steps = np.zeros(count, np.int64)
+        self.limit = np.zeros(count, np.int64)
+
+    def reset(self, seed=None):
+        """Все партии заново; возвращает (наблюдение, info)"""
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self._restart(np.ones(self.count, bool))
+        return self.observation(), {"action_mask": self.action_mask()}
+
+    def _restart(self, done):
+        """Новые партии на местах done: случайный уровень и случайная свободная клетка"""
+        count = int(done.sum())
+        if not count:
+            return
+        level = self.rng.integers(len(self.boards), size=count)
+        choice = (self.rng.random(count) * self.level_free_count[level]).astype(np.int64)
+        pos = self.level_cells[level, choice]
+        self.level[done] = level
+        self.obstacles[done] = self.level_obstacles[level]
+        self.free[done] = self.level_free[level]
+        self.free_count[done] = self.level_free_count[level]
+        self.pos[done] = pos
+        self.visited[done] = np.left_shift(np.uint64(1), pos.astype(np.uint64))
+        self.steps[done] = 0
+        self.limit[done] = self.max_steps or STEPS_PER_CELL * self.level_free_count[level]
+
+    def slide(self, actions):
+        """Маски путей ходов actions из текущих позиций (0 - хода нет)"""
+        blocked = self.obstacles | self.visited
+        ray = self.rays[actions, self.pos]
+        hit = ray & blocked
+        # Вниз и вправо: луч до младшего занятого бита
+        ahead = ray & ((hit & -hit) - np.uint64(1))
+        # Вверх и влево: луч выше старшего занятого бита; все биты до старшего получаются
+        # «размазыванием» hit вниз сдвигами
+        for shift in (1, 2, 4, 8, 16, 32):
+            hit |= hit >> np.uint64(shift)
+        behind = ray & ~hit
+        return np.where(self.forward[actions], ahead, behind)
+
+    def step(self, actions):
+        """Ход во всех партиях: (наблюдение, награда, terminated, truncated, info)
+
+        Закончившиеся партии сразу начинаются заново; наблюдение для них - уже
+        новой партии, а победы и тупики перечислены в info.
+        """
+        actions = np.asarray(actions, np.int64)
+        path = self.slide(actions)
+        cells = bit_counts(path)
+        self.pos += self.delta[actions] * cells
+        self.visited |= path
+        self.steps += 1
+
+        won = self.visited == self.free
+        reward = cells / self.free_count + won * WIN_REWARD
+        terminated = won | ~self.action_mask().any(axis=1)
+        truncated = ~terminated & (self.steps >= self.limit)
+        info = {"won": won, "dead_end": terminated & ~won}
+        self._restart(terminated | truncated)
+        info["action_mask"] = self.action_mask()
+        return self.observation(), reward, terminated, truncated, info
+
+    def action_mask(self):
+        """Возможные ходы: массив bool формы (count, 4)"""
+        blocked = self.obstacles | self.visited
+        return (self.neighbour[:, self.pos].T & ~blocked[:, None]) != 0
+
+    def observation(self):
+        """Компактное наблюдение: uint64 формы (count, 3) - препятствия, посещённые клетки, капля"""
+        return np.stack((self.obstacles, self.visited,
+                         np.left_shift(np.uint64(1), self.pos.astype(np.uint64))), axis=1)
+
+    def planes(self):
+        """Наблюдение слоями: uint8 формы (count, 3, высота, ширина), как у DropletEnv"""
+        masks = self.observation()
+        return mask_planes(masks.reshape(-1), self.width, self.height).reshape(
+            self.count, 3, self.height, self.width)
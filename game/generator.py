@@ -0,0 +1,178 @@
+"""Процедурная генерация решаемых уровней на пуле процессов.
+
+Случайные расположения препятствий тянет главный процесс: он приводит их к
+канонической форме (с точностью до поворотов и отражений) и помнит все уже
+проверенные, поэтому повторы отбрасываются до решателя. Процессам пула
+уходят порции только новых расположений, а они проверяют решаемость.
+
+Пример:
+    python generator.py --size 5 --density 0.2 --count 20000 -o levels.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+from collections import deque
+
+from engine import Board
+from levelpack import write_pack
+from solver import is_solvable
+from symmetry import Symmetry
+
+# Порция, для которой за SATURATION * batch_size попыток не набралось новых
+# расположений, означает, что почти все расположения уже проверены
+SATURATION = 50
+
+
+def random_obstacles(rng, width, height, density):
+    """Случайная маска препятствий: каждая клетка занята с вероятностью density"""
+    obstacles = 0
+    for index in range(width * height):
+        if rng.random() < density:
+            obstacles |= 1 << index
+    return obstacles
+
+
+def draw_layouts(rng, symmetry, width, height, density, known, count, max_draws):
+    """До count новых канонических расположений, которых нет в known (known пополняется).
+
+    Возвращает (список масок, число попыток).
+    """
+    layouts = []
+    draws = 0
+    while len(layouts) < count and draws < max_draws:
+        draws += 1
+        # Повороты и отражения уже проверенного расположения не решаются заново
+        obstacles = symmetry.canonical(random_obstacles(rng, width, height, density))[0]
+        if obstacles not in known:
+            known.add(obstacles)
+            layouts.append(obstacles)
+    return layouts, draws
+
+
+def solve_batch(task):
+    """Одна порция работы для процесса: решаемые из присланных расположений"""
+    width, height, layouts = task
+    found = []
+    for obstacles in layouts:
+        board = Board(width, height, obstacles)
+        if board.free_count and is_solvable(board):
+            found.append(obstacles)
+    return found
+
+
+class GeneratorStats:
+    """Счётчики одного запуска генератора"""
+
+    def __init__(self):
+        self.attempts = 0
+        self.checked = 0        # расположений, отправленных решателю
+        self.solvable = 0
+        self.duplicates = 0     # попыток, отброшенных как уже проверенные
+        self.saturated = False  # новые расположения почти перестали попадаться
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def rate(self, levels):
+        return levels / self.elapsed if self.elapsed else 0.0
+
+
+def generate_levels(width, height, density, count, workers=None, seed=None,
+                    batch_size=200, max_attempts=None, progress=None):
+    """Генерация count различных решаемых уровней.
+
+    Уровни сравниваются с точностью до поворотов и отражений и возвращаются
+    в канонической форме. Возвращает (список масок препятствий, GeneratorStats).
+    Если max_attempts исчерпан раньше или новые расположения перестали
+    попадаться (stats.saturated, например при малой плотности), уровней
+    будет меньше count.
+    """
+    workers = workers or os.cpu_count() or 1
+    seed = random.randrange(1 << 32) if seed is None else seed
+    if max_attempts is None:
+        max_attempts = count * 1000
+    rng = random.Random(seed)
+    symmetry = Symmetry.for_size(width, height)
+    stats = GeneratorStats()
+    known = set()  # все проверенные канонические расположения, решаемые и нет
+    levels = []
+    pending = deque()
+
+    with multiprocessing.Pool(workers) as pool:
+        while True:
+            # У каждого процесса в очереди до двух порций
+            while (len(pending) < 2 * workers and not stats.saturated and
+                   stats.attempts < max_attempts):
+                limit = min(SATURATION * batch_size, max_attempts - stats.attempts)
+                layouts, draws = draw_layouts(rng, symmetry, width, height, density, known,
+                                              batch_size, limit)
+                stats.attempts += draws
+                stats.checked += len(layouts)
+                stats.duplicates += draws - len(layouts)
+                if len(layouts) < batch_size and draws == SATURATION * batch_size:
+                    stats.saturated = True
+                if layouts:
+                    pending.append(pool.apply_async(solve_batch, ((width, height, layouts),)))
+            if not pending:
+                break
+            found = pending.popleft().get()
+            stats.solvable += len(found)
+            levels.extend(found[:count - len(levels)])
+            if progress:
+                progress(len(levels), stats)
+            if len(levels) >= count:
+                pool.terminate()
+                break
+
+    return levels, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генерация решаемых уровней")
+    parser.add_argument("--size", type=int, default=5, help="размер квадратного поля")
+    parser.add_argument("--width", type=int, help="ширина поля (по умолчанию --size)")
+    parser.add_argument("--height", type=int, help="высота поля (по умолчанию --size)")
+    parser.add_argument("--density", type=float, default=0.2, help="доля клеток с препятствиями")
+    parser.add_argument("--count", type=int, default=1000, help="сколько уровней нужно")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--batch", type=int, default=200, help="попыток на одну задачу процесса")
+    parser.add_argument("-o", "--output", default="generated_levels.json",
+                        help="файл результата; с расширением .pack - двоичный набор")
+    args = parser.parse_args()
+
+    width = args.width or args.size
+    height = args.height or args.size
+
+    def progress(done, stats):
+        print(f"\r{done}/{args.count} уровней, {stats.rate(done):.0f} ур/с, "
+              f"попыток {stats.attempts}", end="", flush=True)
+
+    levels, stats = generate_levels(width, height, args.density, args.count,
+                                    workers=args.workers, seed=args.seed,
+                                    batch_size=args.batch, progress=progress)
+    print()
+
+    boards = [Board(width, height, obstacles) for obstacles in levels]
+    if args.output.endswith(".pack"):
+        write_pack(args.output, boards)
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump([board.to_grid() for board in boards], file)
+
+    print(f"Готово: {len(levels)} уровней за {stats.elapsed:.2f} с "
+          f"({stats.rate(len(levels)):.0f} ур/с), решаемых {stats.solvable}/{stats.checked}, "
+          f"попыток {stats.attempts}, повторов {stats.duplicates} -> {args.output}")
+    if stats.saturated and len(levels) < args.count:
+        print("Почти все расположения такого размера и плотности уже проверены: "
+              "решаемых уровней меньше, чем запрошено")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""Эвристический решатель больших полей (20x20 - 50x50) с ограничением по времени.
+
+Точный перебор (solver.py) хранит таблицу всех состояний и на таких полях
+невозможен. Здесь поиск лучом: все состояния с одинаковым числом ходов
+образуют слой, из следующего слоя оставляется width лучших. Ходы те же, что
+в игре (Board.successors, то есть скольжение до первой занятой клетки).
+
+Отбор состояний:
+    - быстрая оценка: число посещённых клеток и число тупиков (клеток с одним
+      непосещённым соседом) - в каждом тупике путь может только закончиться;
+    - для лучших по быстрой оценке - связность: непосещённые клетки вне
+      области капли уже не посетить. Граница покрытия - посещённые клетки
+      плюс область капли минус лишние тупики; по ней и отбираются состояния.
+
+Поиск «в любой момент»: проходы повторяются с удвоенной шириной луча, пока
+не найдено полное покрытие или не вышло время, и в ответ идёт лучшее покрытие
+из всех проходов. Ширина ограничена бюджетом памяти. Процессы пула ведут
+поиск с разными начальными ширинами и случайными добавками к оценке, и
+первое полное покрытие останавливает остальных.
+
+Пример:
+    python heuristic.py --size 30 --seconds 20
+    python heuristic.py --levels challenge.pack --level 3 --workers 4 --memory-mb 1024
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+from engine import Board, DELTAS, iter_bits
+from generator import random_obstacles
+from levelpack import LevelPack
+from levels import load_levels
+from replay import RESULT_WON, play
+from solver import DIRECTION_NAMES, start_candidates
+
+WIDTH = 64            # начальная ширина луча
+SECONDS = 10.0
+MEMORY_MB = 512       # на все процессы вместе
+# Грубая оценка памяти состояния сверх маски: кортежи, узел пути, место в множестве
+STATE_OVERHEAD = 300
+# Во сколько раз больше состояний, чем ширина луча, проходит быструю оценку к проверке связности
+CONNECTIVITY_SHARE = 2
+NOISE = 0.5           # случайная добавка к оценке (разнообразие между проходами и процессами)
+# Построение полей с известным решением: число пробных путей и доля скольжений до упора
+PLANT_WALKS = 20
+PLANT_FULL_SLIDE = 0.85
+
+
+class HeuristicResult:
+    """Лучшее найденное покрытие"""
+
+    __slots__ = ("cell", "path", "covered", "free", "elapsed", "states", "width")
+
+    def __init__(self, cell, path, covered, free, elapsed=0.0, states=0, width=0):
+        self.cell = cell        # стартовая клетка
+        self.path = path        # список направлений
+        self.covered = covered  # посещено клеток
+        self.free = free        # свободных клеток на поле
+        self.elapsed = elapsed
+        self.states = states    # разобрано состояний
+        self.width = width      # ширина луча прохода, давшего результат
+
+    @property
+    def solved(self):
+        return self.covered == self.free
+
+    @property
+    def coverage(self):
+        return self.covered / self.free if self.free else 1.0
+
+    def better_than(self, other):
+        if other is None:
+            return True
+        return (self.covered, -len(self.path)) > (other.covered, -len(other.path))
+
+    def __repr__(self):
+        names = "".join(DIRECTION_NAMES[d] for d in self.path)
+        return (f"HeuristicResult({self.cell}, covered={self.covered}/{self.free}, "
+                f"moves={len(self.path)}, path={names})")
+
+
+def node_path(node):
+    """Направления от старта по цепочке узлов (родитель, направление)"""
+    path = []
+    while node is not None:
+        node, direction = node
+        path.append(direction)
+    path.reverse()
+    return path
+
+
+def beam_search(board, width, deadline, rng, starts=None):
+    """Один проход лучом ширины width; (HeuristicResult, число разобранных состояний)"""
+    free = board.free
+    free_count = board.free_count
+    obstacles = board.obstacles
+    successors = board.successors
+    dead_ends = board.dead_ends
+    flood = board.flood
+    random_value = rng.random
+
+    if starts is None:
+        starts = start_candidates(board) or free
+    # Слой: (позиция, посещённые клетки, стартовая клетка, узел пути)
+    layer = [(pos, 1 << pos, pos, None) for pos in iter_bits(starts)]
+    best = (1, layer[0][2], None) if layer else None
+    states = 0
+
+    while layer and best[0] < free_count and time.perf_counter() < deadline:
+        seen = set()
+        children = []
+        for pos, visited, start, node in layer:
+            for direction, end, mask in successors(pos, obstacles | visited):
+                reached = visited | mask
+                key = (reached, end)
+                if key in seen:
+                    continue
+                seen.add(key)
+                rest = free & ~reached
+                covered = free_count - rest.bit_count()
+                if covered > best[0]:
+                    best = (covered, start, (node, direction))
+                ends = (dead_ends(rest | (1 << end)) & rest).bit_count()
+                quick = covered - 2 * max(0, ends - 1) + NOISE * random_value()
+                children.append((quick, end, reached, rest, ends, start, (node, direction)))
+        states += len(children)
+        if best[0] == free_count:
+            break
+
+        # Связность проверяется только у лучших по быстрой оценке
+        if len(children) > CONNECTIVITY_SHARE * width:
+            children.sort(key=lambda child: child[0], reverse=True)
+            del children[CONNECTIVITY_SHARE * width:]
+        ranked = []
+        for quick, end, reached, rest, ends, start, node in children:
+            if time.perf_counter() >= deadline:
+                break
+            area = rest | (1 << end)
+            region = flood(1 << end, area) & rest
+            if region != rest:
+                ends = (dead_ends(region | (1 << end)) & region).bit_count()
+            bound = free_count - rest.bit_count() + region.bit_count() - max(0, ends - 1)
+            ranked.append((bound + NOISE * random_value(), quick, end, reached, start, node))
+        ranked.sort(key=lambda child: child[:2], reverse=True)
+        layer = [(end, reached, start, node) for _, _, end, reached, start, node in ranked[:width]]
+
+    if best is None:
+        return None, states
+    covered, start, node = best
+    return HeuristicResult(board.cell(start), node_path(node), covered, free_count, states=states,
+                           width=width), states
+
+
+def state_budget(board, memory_mb):
+    """Сколько состояний помещается в memory_mb мегабайт"""
+    return max(1, memory_mb * 1024 * 1024 // (board.size // 8 + STATE_OVERHEAD))
+
+
+def anytime_search(board, seconds=SECONDS, width=WIDTH, seed=None, memory_mb=MEMORY_MB):
+    """Проходы лучом с удвоением ширины до полного покрытия или конца времени"""
+    started = time.perf_counter()
+    deadline = started + seconds
+    rng = random.Random(seed)
+    # В памяти одновременно слой и его потомки - до пяти ширин луча (у состояния до четырёх ходов)
+    max_width = max(1, state_budget(board, memory_mb) // 5)
+    width = min(width, max_width)
+    best = None
+    states = 0
+    while time.perf_counter() < deadline:
+        result, expanded = beam_search(board, width, deadline, rng)
+        states += expanded
+        if result is None:
+            break
+        if result.better_than(best):
+            best = result
+        if best.solved:
+            break
+        width = min(width * 2, max_width)
+    if best is not None:
+        best.elapsed = time.perf_counter() - started
+        best.states = states
+    return best
+
+
+def search_task(task):
+    """Задача процесса пула: (ширина, высота, препятствия, секунды, ширина луча, зерно, память)"""
+    width, height, obstacles, seconds, beam, seed, memory_mb = task
+    return anytime_search(Board(width, height, obstacles), seconds, beam, seed, memory_mb)
+
+
+def solve_large(board, seconds=SECONDS, workers=None, width=WIDTH, seed=None, memory_mb=MEMORY_MB):
+    """Лучшее покрытие за seconds секунд на workers процессах"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return anytime_search(board, seconds, width, seed, memory_mb)
+    rng = random.Random(seed)
+    # Разные начальные ширины: узкий луч быстрее доходит до конца, широкий реже ошибается
+    tasks = [(board.width, board.height, board.obstacles, seconds, width << (number % 3),
+              rng.randrange(1 << 32), max(1, memory_mb // workers)) for number in range(workers)]
+    best = None
+    started = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(search_task, tasks):
+            if result is not None and result.better_than(best):
+                best = result
+            if best is not None and best.solved:
+                pool.terminate()
+                break
+    if best is not None:
+        best.elapsed = time.perf_counter() - started
+    return best
+
+
+def _open_runs(pos, blocked, width, height):
+    """Клетки до первой занятой по каждому направлению из pos (только непустые)"""
+    row, col = divmod(pos, width)
+    runs = []
+    for dr, dc in DELTAS:
+        cells = []
+        r, c = row + dr, col + dc
+        while 0 <= r < height and 0 <= c < width and not blocked >> (r * width + c) & 1:
+            cells.append(r * width + c)
+            r, c = r + dr, c + dc
+        if cells:
+            runs.append(cells)
+    return runs
+
+
+def _carve_walk(width, height, rng):
+    """Маска клеток одного случайного пути скольжений"""
+    size = width * height
+    pos = rng.randrange(size)
+    carved = 1 << pos
+    reserved = 0  # клетки за концом скольжений: навсегда остаются препятствиями
+    while True:
+        runs = _open_runs(pos, carved | reserved, width, height)
+        if not runs:
+            return carved
+        moves = []
+        for cells in runs:
+            # Скольжение до упора ничего не резервирует, поэтому оно чаще
+            length = len(cells) if rng.random() < PLANT_FULL_SLIDE else rng.randint(1, len(cells))
+            blocked = carved | reserved | sum(1 << index for index in cells[:length])
+            if length < len(cells):
+                blocked |= 1 << cells[length]
+            moves.append((bool(_open_runs(cells[length - 1], blocked, width, height)), cells, length))
+        # Ход, после которого путь упирается в тупик, - только если других нет
+        alive = [move for move in moves if move[0]]
+        _, cells, length = rng.choice(alive or moves)
+        for index in cells[:length]:
+            carved |= 1 << index
+        if length < len(cells):
+            reserved |= 1 << cells[length]
+        pos = cells[length - 1]
+
+
+def planted_board(width, height, rng, walks=PLANT_WALKS):
+    """Поле с гарантированным полным покрытием: свободны только клетки случайного пути скольжений.
+
+    Клетка за концом каждого скольжения остаётся препятствием, поэтому на
+    готовом поле путь проходится теми же ходами. Из walks путей берётся
+    самый длинный.
+    """
+    carved = max((_carve_walk(width, height, rng) for _ in range(walks)), key=int.bit_count)
+    return Board(width, height, ((1 << (width * height)) - 1) & ~carved)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Эвристический решатель больших полей")
+    parser.add_argument("--levels", help="набор уровней (.pack или JSON)")
+    parser.add_argument("--level", type=int, default=0, help="номер уровня в наборе")
+    parser.add_argument("--size", type=int, default=30, help="сторона случайного поля, если набор не задан")
+    parser.add_argument("--density", type=float, default=None,
+                        help="плотность препятствий случайного поля; без неё поле строится вокруг пути")
+    parser.add_argument("--seconds", type=float, default=SECONDS)
+    parser.add_argument("--workers", type=int, default=None, help="число процессов")
+    parser.add_argument("--width", type=int, default=WIDTH, help="начальная ширина луча")
+    parser.add_argument("--memory-mb", type=int, default=MEMORY_MB, help="бюджет памяти на все процессы")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.levels:
+        levels = load_levels(args.levels)
+        if isinstance(levels, LevelPack):
+            board = levels.load_level(args.level)
+        else:
+            board = Board.from_grid(levels[args.level])
+    else:
+        rng = random.Random(args.seed)
+        if args.density is None:
+            board = planted_board(args.size, args.size, rng)
+        else:
+            board = Board(args.size, args.size, random_obstacles(rng, args.size, args.size, args.density))
+
+    print(f"Поле {board.width}x{board.height}, свободных клеток {board.free_count}", flush=True)
+    result = solve_large(board, args.seconds, args.workers, args.width, args.seed, args.memory_mb)
+    if result is None:
+        print("Свободных клеток нет")
+        return
+    outcome, moves = play(board, result.cell, result.path)
+    status = "полное покрытие" if outcome == RESULT_WON else f"лучшее покрытие {result.coverage:.1%}"
+    print(f"{status}: {result.covered}/{result.free} клеток, старт {result.cell}, ходов {moves}, "
+          f"{result.elapsed:.2f} с")
+    print("".join(DIRECTION_NAMES[d] for d in result.path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Подсказки: следующий ход кратчайшего выигрышного пути.
+
+Для уровня заводится HintTable - таблица точного решателя, которую фоновый
+поток заполняет сразу после загрузки уровня (и заранее для следующего).
+Ответ на запрос - несколько чтений словаря, поэтому укладывается в кадр;
+пока нужная часть таблицы не посчитана, ответ - HINT_PENDING. Таблицы
+хранятся в HintCache и переживают перезагрузку уровня, а при превышении
+лимита состояний вытесняются давно не использованные - в том числе прямо во
+время расчёта, когда растущей таблице не хватает места. Расчёт таблицы
+текущего уровня прерывает заблаговременный расчёт соседнего.
+"""
+
+import itertools
+import math
+import queue
+import threading
+from collections import OrderedDict
+
+from engine import iter_bits
+from solver import Solver, StateLimit, UNSOLVABLE
+
+# Поля с большим числом свободных клеток точным решателем не разбираются
+MAX_HINT_CELLS = 48
+# Суммарный лимит состояний во всех таблицах кэша
+MAX_CACHED_STATES = 500_000
+
+# Приоритеты фонового расчёта
+PRIORITY_CURRENT = 0
+PRIORITY_PREFETCH = 1
+
+# Виды ответа
+HINT_PENDING = 0       # таблица ещё считается
+HINT_MOVE = 1          # direction - следующий ход, moves - ходов до победы
+HINT_START = 2         # cell - лучшая стартовая клетка, moves - ходов до победы
+HINT_LOST = 3          # победа уже невозможна
+HINT_WON = 4
+HINT_UNAVAILABLE = 5   # поле слишком большое для точного решателя
+
+
+class Hint:
+    """Ответ на запрос подсказки"""
+
+    __slots__ = ("status", "direction", "cell", "moves")
+
+    def __init__(self, status, direction=None, cell=None, moves=None):
+        self.status = status
+        self.direction = direction
+        self.cell = cell
+        self.moves = moves
+
+    def __repr__(self):
+        return f"Hint({self.status}, direction={self.direction}, cell={self.cell}, moves={self.moves})"
+
+
+class HintTable:
+    """Таблица ходов до победы для одного уровня"""
+
+    def __init__(self, board):
+        self.board = board
+        self.available = board.free_count <= MAX_HINT_CELLS
+        self.solver = Solver(board) if self.available else None
+        self.done = not self.available
+        self.cancelled = False
+
+    @property
+    def size(self):
+        """Число состояний в таблице"""
+        solver = self.solver
+        return len(solver.table) if solver else 0
+
+    def compute(self, room):
+        """Заполнение таблицы из всех стартовых клеток (выполняется в фоновом потоке)
+
+        room(table) задаёт solver.max_states - сколько состояний таблице можно
+        занять. Когда таблица упирается в предел, room вызывается снова; если
+        места не прибавилось, расчёт прерывается. Возвращает True, если
+        таблица готова.
+        """
+        if self.done:
+            return True
+        solver = self.solver
+        for pos in iter_bits(self.board.free):
+            while True:
+                if room(self) <= len(solver.table):
+                    return False
+                try:
+                    solver.remaining(pos, 1 << pos)
+                    break
+                except StateLimit:
+                    pass
+        solver.max_states = math.inf
+        self.done = True
+        return True
+
+    def interrupt(self):
+        """Остановка расчёта на ближайшей новой записи таблицы"""
+        if self.solver:
+            self.solver.max_states = 0
+
+    def give_up(self):
+        """Таблица не помещается в лимит: подсказки для уровня недоступны"""
+        self.available = False
+        self.solver = None
+        self.done = True
+
+    def _value(self, solver, pos, visited):
+        """Ходов до победы из состояния или None, если состояние ещё не посчитано"""
+        if visited == self.board.free:
+            return 0
+        return solver.table.get(solver.key(pos, visited))
+
+    def query(self, pos, visited):
+        """Подсказка для капли в pos с посещёнными клетками visited"""
+        board = self.board
+        if visited == board.free:
+            return Hint(HINT_WON)
+        solver = self.solver
+        if not solver:
+            return Hint(HINT_LOST if board.is_lost(pos, visited) else HINT_UNAVAILABLE)
+        # Запись в таблице появляется, когда разобрано всё поддерево состояния,
+        # поэтому её наличие означает, что готовы и записи всех ходов из него
+        total = self._value(solver, pos, visited)
+        if total is None:
+            # Решатель не заходит дальше проигранных состояний: если таблица
+            # готова, а состояния в ней нет, то проигран один из его предков
+            if self.done or board.is_lost(pos, visited):
+                return Hint(HINT_LOST)
+            return Hint(HINT_PENDING)
+        if total >= UNSOLVABLE:
+            return Hint(HINT_LOST)
+        for direction, end, mask in board.successors(pos, board.obstacles | visited):
+            if self._value(solver, end, visited | mask) == total - 1:
+                return Hint(HINT_MOVE, direction=direction, moves=total)
+        return Hint(HINT_PENDING)
+
+    def best_start(self):
+        """Стартовая клетка с самым коротким решением"""
+        solver = self.solver
+        if not solver:
+            return Hint(HINT_UNAVAILABLE)
+        if not self.done:
+            return Hint(HINT_PENDING)
+        best = None
+        for pos in iter_bits(self.board.free):
+            moves = self._value(solver, pos, 1 << pos)
+            if moves < UNSOLVABLE and (best is None or moves < best[1]):
+                best = (pos, moves)
+        if best is None:
+            return Hint(HINT_LOST)
+        return Hint(HINT_START, cell=self.board.cell(best[0]), moves=best[1])
+
+
+class HintCache:
+    """Таблицы подсказок по уровням с вытеснением давно не использованных"""
+
+    def __init__(self, max_states=MAX_CACHED_STATES):
+        self.max_states = max_states
+        self.tables = OrderedDict()
+        # Сначала текущий уровень (из нескольких - последний запрошенный), потом заблаговременные
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._worker = None
+        # Таблицы меняют оба потока: главный при запросах, фоновый при вытеснении во время расчёта
+        self._lock = threading.Lock()
+        self._running = None          # таблица, которую сейчас считает фоновый поток
+        self._running_priority = None
+        self._preempted = False
+
+    @staticmethod
+    def _key(board):
+        return board.width, board.height, board.obstacles
+
+    def table(self, board):
+        """Таблица уровня; новая ставится в очередь фонового расчёта"""
+        key = self._key(board)
+        with self._lock:
+            table = self.tables.get(key)
+            if table is None:
+                table = HintTable(board)
+                self.tables[key] = table
+            self.tables.move_to_end(key)
+            self._schedule(table, PRIORITY_CURRENT)
+            self._evict()
+        return table
+
+    def prefetch(self, board):
+        """Заблаговременный расчёт таблицы уровня, который скоро понадобится"""
+        key = self._key(board)
+        with self._lock:
+            if key not in self.tables:
+                table = HintTable(board)
+                self.tables[key] = table
+                self.tables.move_to_end(key, last=False)
+                self._schedule(table, PRIORITY_PREFETCH)
+
+    def _schedule(self, table, priority):
+        if table.done:
+            return
+        running = self._running
+        if running is table:
+            self._running_priority = min(self._running_priority, priority)
+            return
+        self._queue.put((priority, -next(self._order), table))
+        if running is not None and priority == PRIORITY_CURRENT:
+            # Текущий уровень не ждёт расчёта другой таблицы: тот прерывается, и
+            # таблица возвращается в очередь как заблаговременная (посчитанные
+            # записи сохраняются)
+            self._preempted = True
+            running.interrupt()
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="hints", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            priority, _, table = self._queue.get()
+            with self._lock:
+                if table.cancelled or table.done:
+                    continue
+                self._running, self._running_priority = table, priority
+            finished = table.compute(self._room)
+            with self._lock:
+                priority = self._running_priority
+                preempted = self._preempted
+                self._running = self._running_priority = None
+                self._preempted = False
+                if finished or table.cancelled:
+                    continue
+                if preempted:
+                    self._queue.put((PRIORITY_PREFETCH, -next(self._order), table))
+                elif priority == PRIORITY_CURRENT:
+                    # Одна таблица больше всего лимита
+                    table.give_up()
+                else:
+                    # Заблаговременной таблице места не нашлось: она посчитается,
+                    # когда уровень станет текущим
+                    self._drop(table)
+
+    def _room(self, table):
+        """Предел состояний считаемой таблицы; 0 - расчёт прерывается
+
+        Когда таблице не хватает места, вытесняются более старые таблицы.
+        """
+        with self._lock:
+            if table.cancelled or self._preempted:
+                limit = 0
+            else:
+                used = sum(other.size for other in self.tables.values() if other is not table)
+                while used + table.size >= self.max_states:
+                    key, oldest = next(iter(self.tables.items()))
+                    if oldest is table:
+                        break
+                    del self.tables[key]
+                    oldest.cancelled = True
+                    used -= oldest.size
+                limit = self.max_states - used
+            table.solver.max_states = limit
+            return limit
+
+    def _drop(self, table):
+        for key, other in self.tables.items():
+            if other is table:
+                del self.tables[key]
+                break
+        table.cancelled = True
+
+    def _evict(self):
+        """Вытеснение старых таблиц, пока суммарный размер выше лимита"""
+        total = sum(table.size for table in self.tables.values())
+        while total > self.max_states and len(self.tables) > 1:
+            _, table = self.tables.popitem(last=False)
+            table.cancelled = True
+            table.interrupt()
+            total -= table.size
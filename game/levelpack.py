@@ -0,0 +1,235 @@
+"""Компактный двоичный формат наборов уровней.
+
+Файл состоит из заголовка, записей уровней и индекса смещений в конце:
+
+    заголовок  MAGIC, версия, флаги, число уровней, смещение индекса
+    записи     препятствия упакованы по биту на клетку (бит row * width + col),
+               за ними необязательные метаданные
+    индекс     на каждый уровень: смещение записи, длина, ширина, высота
+
+Файл читается через mmap, поэтому load_level разбирает только нужную запись,
+а не весь набор. Пример конвертации встроенных уровней:
+    python levelpack.py -o levels.pack --solve
+"""
+
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+
+from engine import Board
+
+MAGIC = b"DROPPACK"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHHIQ")   # magic, версия, флаги, число уровней, смещение индекса
+ENTRY = struct.Struct("<QIHH")      # смещение записи, длина, ширина, высота
+META = struct.Struct("<Bif")        # флаги метаданных, минимум ходов, сложность
+
+# Флаги метаданных записи
+META_MOVES = 1
+META_DIFFICULTY = 2
+META_STARTS = 4
+
+
+def mask_bytes(size):
+    """Число байт на маску поля из size клеток"""
+    return (size + 7) // 8
+
+
+class LevelInfo:
+    """Метаданные уровня; неизвестные поля равны None"""
+
+    __slots__ = ("starts", "moves", "difficulty")
+
+    def __init__(self, starts=None, moves=None, difficulty=None):
+        self.starts = starts          # маска выигрышных стартовых клеток
+        self.moves = moves            # минимальное число ходов
+        self.difficulty = difficulty  # оценка сложности
+
+    def __repr__(self):
+        starts = None if self.starts is None else self.starts.bit_count()
+        return f"LevelInfo(starts={starts}, moves={self.moves}, difficulty={self.difficulty})"
+
+
+def encode_level(board, info=None):
+    """Запись одного уровня в байтах"""
+    nbytes = mask_bytes(board.size)
+    data = board.obstacles.to_bytes(nbytes, "little")
+    if info is None:
+        return data
+    flags = 0
+    if info.moves is not None:
+        flags |= META_MOVES
+    if info.difficulty is not None:
+        flags |= META_DIFFICULTY
+    if info.starts is not None:
+        flags |= META_STARTS
+    moves = -1 if info.moves is None else info.moves
+    difficulty = math.nan if info.difficulty is None else info.difficulty
+    data += META.pack(flags, moves, difficulty)
+    if info.starts is not None:
+        data += info.starts.to_bytes(nbytes, "little")
+    return data
+
+
+def write_pack(path, levels, infos=None):
+    """Запись набора уровней (сеток или Board) с метаданными infos (LevelInfo или None)
+
+    levels и infos читаются потоком, поэтому подходят и генераторы.
+    Возвращает число записанных уровней.
+    """
+    if infos is None:
+        infos = iter(lambda: None, 0)
+    entries = []
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        offset = HEADER.size
+        for level, info in zip(levels, infos):
+            board = level if isinstance(level, Board) else Board.from_grid(level)
+            data = encode_level(board, info)
+            file.write(data)
+            entries.append(ENTRY.pack(offset, len(data), board.width, board.height))
+            offset += len(data)
+        file.write(b"".join(entries))
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, 0, len(entries), offset))
+    return len(entries)
+
+
+def is_pack(path):
+    """Начинается ли файл с сигнатуры набора уровней"""
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class LevelPack:
+    """Набор уровней из файла; уровни разбираются по запросу
+
+    Поддерживает len() и индексирование (сетка уровня), поэтому подставляется
+    вместо списка LEVELS.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            # Пустой файл mmap не отображает, а из короткого не прочитать заголовок
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise ValueError(f"{path}: не набор уровней")
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, count, index = HEADER.unpack_from(self._data, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path}: не набор уровней")
+            if version != VERSION:
+                raise ValueError(f"{path}: неподдерживаемая версия {version}")
+            if index + count * ENTRY.size > len(self._data):
+                raise ValueError(f"{path}: файл обрезан")
+        except ValueError:
+            self.close()
+            raise
+        self.count = count
+        self._index = index
+
+    def close(self):
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _entry(self, number):
+        if not 0 <= number < self.count:
+            raise IndexError(f"уровень {number} вне набора из {self.count}")
+        return ENTRY.unpack_from(self._data, self._index + number * ENTRY.size)
+
+    def load_level(self, number):
+        """Board уровня number"""
+        offset, _, width, height = self._entry(number)
+        nbytes = mask_bytes(width * height)
+        obstacles = int.from_bytes(self._data[offset:offset + nbytes], "little")
+        return Board(width, height, obstacles)
+
+    def info(self, number):
+        """LevelInfo уровня number или None, если метаданных нет"""
+        offset, length, width, height = self._entry(number)
+        nbytes = mask_bytes(width * height)
+        if length <= nbytes:
+            return None
+        flags, moves, difficulty = META.unpack_from(self._data, offset + nbytes)
+        info = LevelInfo()
+        if flags & META_MOVES:
+            info.moves = moves
+        if flags & META_DIFFICULTY:
+            info.difficulty = difficulty
+        if flags & META_STARTS:
+            start = offset + nbytes + META.size
+            info.starts = int.from_bytes(self._data[start:start + nbytes], "little")
+        return info
+
+    def __getitem__(self, number):
+        if number < 0:
+            number += self.count
+        return self.load_level(number).to_grid()
+
+    def __iter__(self):
+        for number in range(self.count):
+            yield self[number]
+
+
+def level_boards(levels):
+    """Поля уровней из списка сеток или двоичного набора"""
+    if isinstance(levels, LevelPack):
+        return (levels.load_level(number) for number in range(len(levels)))
+    return (Board.from_grid(grid) for grid in levels)
+
+
+def load_level(path, number):
+    """Один уровень из файла набора без чтения остальных"""
+    with LevelPack(path) as pack:
+        return pack.load_level(number)
+
+
+def solve_info(board):
+    """Метаданные уровня по точному решателю: выигрышные старты и минимум ходов"""
+    from solver import Solver
+
+    starts = 0
+    best = None
+    for cell, result in Solver(board).solve().items():
+        if result.solvable:
+            starts |= 1 << board.index(cell)
+            best = result.moves if best is None else min(best, result.moves)
+    return LevelInfo(starts, best)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Конвертация уровней в двоичный набор")
+    parser.add_argument("input", nargs="?", help="JSON со списком уровней (по умолчанию встроенные LEVELS)")
+    parser.add_argument("-o", "--output", default="levels.pack")
+    parser.add_argument("--solve", action="store_true",
+                        help="записать выигрышные старты и минимум ходов (точный решатель)")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as file:
+            levels = json.load(file)
+    else:
+        from levels import LEVELS
+        levels = LEVELS
+
+    boards = [Board.from_grid(grid) for grid in levels]
+    infos = [solve_info(board) for board in boards] if args.solve else None
+    count = write_pack(args.output, boards, infos)
+    print(f"Готово: {count} уровней -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
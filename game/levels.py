@@ -0,0 +1,74 @@
+"""Встроенные уровни игры"""
+
+import json
+
+from levelpack import LevelPack, is_pack
+
+LEVELS = [
+    # Уровень 1
+    [
+        [0, 1, 0, 0, 0],
+        [0, 1, 0, 1, 0],
+        [0, 0, 0, 1, 0],
+        [1, 0, 0, 0, 0],
+        [1, 0, 0, 0, 0]
+    ],
+    # Уровень 2
+    [
+        [0, 0, 0, 1, 1],
+        [0, 1, 0, 0, 1],
+        [0, 0, 1, 0, 0],
+        [0, 0, 0, 1, 0],
+        [0, 0, 0, 0, 0]
+    ],
+    # Уровень 3
+    [
+        [0, 0, 0, 0, 0],
+        [0, 1, 1, 0, 0],
+        [0, 1, 1, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0]
+    ],
+    # Уровень 4
+    [
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1],
+        [0, 0, 0, 0, 0],
+        [1, 1, 1, 0, 0]
+    ],
+    # Уровень 5
+    [
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 1, 0, 0],
+        [0, 0, 1, 0, 0],
+        [0, 0, 1, 0, 0]
+    ],
+    # Уровень 6
+    [
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0]
+    ]
+]
+
+
+def load_levels(path):
+    """Уровни из файла: двоичный набор (levelpack) или JSON-список сеток 0/1 (формат generator.py)"""
+    if is_pack(path):
+        pack = LevelPack(path)
+        if not len(pack):
+            pack.close()
+            raise ValueError(f"{path}: нет уровней")
+        return pack
+    with open(path, encoding="utf-8") as file:
+        levels = json.load(file)
+    if not levels:
+        raise ValueError(f"{path}: нет уровней")
+    for number, grid in enumerate(levels, 1):
+        if not grid or any(len(line) != len(grid[0]) for line in grid):
+            raise ValueError(f"{path}: уровень {number} не прямоугольный")
+    return levels
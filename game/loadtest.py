@@ -0,0 +1,185 @@
+"""Нагрузочный клиент сервера партий (server.py).
+
+Сначала открывается idle партий, которые так и остаются без ходов, потом
+clients соединений seconds секунд играют случайные партии: ход в случайную
+сторону, после победы или тупика - иногда отмена хода, иначе новая партия.
+В конце печатаются запросы в секунду, задержки и статистика сервера.
+
+Без --port и --unix сервер запускается в этом же процессе на свободном
+порту, и тогда печатается ещё память процесса.
+
+Пример:
+    python loadtest.py --idle 20000 --clients 50 --seconds 10
+    python loadtest.py --unix /tmp/droplet.sock --clients 200
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from levels import LEVELS, load_levels
+from replay import DIRECTION_NAMES
+from server import GameServer
+
+# Сколько запросов открытия партий отправляется одной пачкой
+IDLE_BATCH = 1000
+UNDO_CHANCE = 0.3
+
+
+class Client:
+    """Соединение с сервером: запрос - строка JSON, ответ - строка JSON"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host, port, unix):
+        if unix:
+            reader, writer = await asyncio.open_unix_connection(unix)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, **request):
+        self.writer.write((json.dumps(request) + "\n").encode())
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def pipeline(self, requests):
+        """Пачка запросов без ожидания ответов между ними"""
+        self.writer.write("".join(json.dumps(request) + "\n" for request in requests).encode())
+        await self.writer.drain()
+        return [json.loads(await self.reader.readline()) for _ in requests]
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def open_idle(client, count, levels, rng):
+    """count партий без ходов"""
+    opened = 0
+    while opened < count:
+        batch = min(IDLE_BATCH, count - opened)
+        responses = await client.pipeline([{"cmd": "start", "level": rng.randrange(levels)}
+                                           for _ in range(batch)])
+        opened += sum(1 for response in responses if response["ok"])
+        if len(responses) != batch or not all(response["ok"] for response in responses):
+            raise RuntimeError(f"сервер отказал в открытии партии: {responses[-1]}")
+    return opened
+
+
+async def play(client, levels, deadline, rng, latencies, results):
+    """Случайные партии до deadline; задержки запросов - в latencies"""
+    session = None
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        if session is None:
+            response = await client.request(cmd="start", level=rng.randrange(levels))
+        else:
+            response = await client.request(cmd="move", session=session,
+                                            direction=rng.choice(DIRECTION_NAMES))
+        latencies.append(time.perf_counter() - started)
+        if not response["ok"]:
+            results["errors"] += 1
+            session = None
+            continue
+        if session is None:
+            session = response["session"]
+        if response["won"] or response["dead_end"]:
+            results["won" if response["won"] else "dead_end"] += 1
+            if response["dead_end"] and rng.random() < UNDO_CHANCE:
+                started = time.perf_counter()
+                await client.request(cmd="undo", session=session)
+            else:
+                started = time.perf_counter()
+                await client.request(cmd="close", session=session)
+                session = None
+            latencies.append(time.perf_counter() - started)
+    if session is not None:
+        await client.request(cmd="close", session=session)
+
+
+def process_memory():
+    """Резидентная память процесса в МБ (только Linux) или None"""
+    try:
+        with open("/proc/self/status", encoding="ascii") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+async def run(args):
+    listener = None
+    host, port, unix = args.host, args.port, args.unix
+    if port is None and unix is None:
+        levels = load_levels(args.levels) if args.levels else LEVELS
+        listener = await GameServer(levels).listen(host, 0)
+        port = listener.sockets[0].getsockname()[1]
+
+    rng = random.Random(args.seed)
+    control = await Client.connect(host, port, unix)
+    levels = (await control.request(cmd="stats"))["levels"]
+
+    memory_before = process_memory()
+    started = time.perf_counter()
+    await open_idle(control, args.idle, levels, rng)
+    idle_elapsed = time.perf_counter() - started
+    memory_idle = process_memory()
+
+    clients = [await Client.connect(host, port, unix) for _ in range(args.clients)]
+    latencies = []
+    results = {"won": 0, "dead_end": 0, "errors": 0}
+    started = time.perf_counter()
+    deadline = started + args.seconds
+    await asyncio.gather(*(play(client, levels, deadline, random.Random(rng.random()), latencies, results)
+                           for client in clients))
+    elapsed = time.perf_counter() - started
+    stats = await control.request(cmd="stats")
+    for client in clients + [control]:
+        await client.close()
+    if listener:
+        listener.close()
+        await listener.wait_closed()
+
+    latencies.sort()
+
+    def percentile(point):
+        return latencies[min(len(latencies) - 1, len(latencies) * point // 100)] * 1000 if latencies else 0.0
+
+    print(f"Открыто {args.idle} партий без ходов за {idle_elapsed:.2f} с "
+          f"({args.idle / idle_elapsed if idle_elapsed else 0:.0f} в секунду)")
+    print(f"Игра: {args.clients} соединений, {len(latencies)} запросов за {elapsed:.2f} с "
+          f"({len(latencies) / elapsed:.0f} запросов/с), побед {results['won']}, "
+          f"тупиков {results['dead_end']}, ошибок {results['errors']}")
+    print(f"Задержка, мс: p50 {percentile(50):.3f}, p95 {percentile(95):.3f}, p99 {percentile(99):.3f}")
+    sessions = stats["sessions"]
+    print(f"Сервер: партий {sessions}, запросов {stats['requests']}, "
+          f"память партий {stats['session_bytes'] / 1024 / 1024:.2f} МБ "
+          f"({stats['session_bytes'] / sessions if sessions else 0:.0f} байт на партию)")
+    if listener and memory_before is not None and args.idle:
+        print(f"Память процесса: {memory_idle:.1f} МБ, на партию без ходов "
+              f"{(memory_idle - memory_before) * 1024 * 1024 / args.idle:.0f} байт")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный клиент сервера партий")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="порт сервера; без него и --unix сервер запускается здесь же")
+    parser.add_argument("--unix", metavar="PATH", help="Unix-сокет сервера")
+    parser.add_argument("--levels", help="уровни для встроенного сервера")
+    parser.add_argument("--idle", type=int, default=20000, help="партий без ходов")
+    parser.add_argument("--clients", type=int, default=50, help="играющих соединений")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=None)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,743 +1,1138 @@
-import pygame
-import sys
-import math
-import random
-
-# Инициализация Pygame
-pygame.init()
-
-# Константы
-BOARD_SIZE = 5
-CELL_SIZE = 100
-INFO_HEIGHT = 80
-WINDOW_WIDTH = BOARD_SIZE * CELL_SIZE
-WINDOW_HEIGHT = BOARD_SIZE * CELL_SIZE + INFO_HEIGHT
-FPS = 60
-
-# Цвета
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-GRAY = (150, 150, 150)
-LIGHT_GRAY = (230, 230, 230)
-BLUE = (65, 105, 225)
-DARK_BLUE = (30, 70, 180)
-RED = (220, 60, 60)
-DARK_RED = (180, 30, 30)
-LIGHT_BLUE = (135, 206, 250)
-GREEN = (60, 180, 75)
-DARK_GREEN = (30, 130, 45)
-GOLD = (255, 215, 0)
-ORANGE = (255, 140, 0)
-DARK_ORANGE = (200, 100, 0)
-PURPLE = (128, 0, 128)
-LIGHT_PURPLE = (200, 160, 255)
-
-# Состояния игры
-STATE_MENU = 0
-STATE_PLAYING = 1
-STATE_LEVEL_SELECT = 2
-
-# Предопределенные уровни
-LEVELS = [
-    # Уровень 1
-    [
-        [0, 1, 0, 0, 0],
-        [0, 1, 0, 1, 0],
-        [0, 0, 0, 1, 0],
-        [1, 0, 0, 0, 0],
-        [1, 0, 0, 0, 0]
-    ],
-    # Уровень 2
-    [
-        [0, 0, 0, 1, 1],
-        [0, 1, 0, 0, 1],
-        [0, 0, 1, 0, 0],
-        [0, 0, 0, 1, 0],
-        [0, 0, 0, 0, 0]
-    ],
-    # Уровень 3
-    [
-        [0, 0, 0, 0, 0],
-        [0, 1, 1, 0, 0],
-        [0, 1, 1, 0, 0],
-        [0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0]
-    ],
-    # Уровень 4
-    [
-        [0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 1],
-        [0, 0, 0, 0, 0],
-        [1, 1, 1, 0, 0]
-    ],
-    # Уровень 5
-    [
-        [0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0],
-        [0, 0, 1, 0, 0],
-        [0, 0, 1, 0, 0],
-        [0, 0, 1, 0, 0]
-    ],
-    # Уровень 6
-    [
-        [0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0]
-    ]
-]
-
-
-class DropletGame:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-        pygame.display.set_caption("Путешествие капли")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 32)
-        self.small_font = pygame.font.Font(None, 25)
-        self.bold_font = pygame.font.Font(None, 36)
-        self.win_font = pygame.font.Font(None, 30)
-        self.title_font = pygame.font.Font(None, 48)
-
-        # Состояние игры
-        self.game_state = STATE_MENU
-
-        # Текущий уровень
-        self.current_level = 0
-        self.total_levels = len(LEVELS)
-
-        # Игровое поле
-        self.board = [[0 for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
-        self.droplet_pos = None
-        self.visited = set()
-        self.moves = 0
-
-        # Анимация движения
-        self.is_animating = False
-        self.animation_path = []
-        self.current_animation_index = 0
-        self.animation_speed = 10  # кадров на клетку
-
-        # Эффекты
-        self.win_animation_time = 0
-        self.game_over = False
-        self.game_over_time = 0
-
-        # Загрузка уровня
-        self.load_level(self.current_level)
-
-    def load_level(self, level_index):
-        """Загрузка уровня по индексу"""
-        self.current_level = level_index % self.total_levels
-        self.board = [row[:] for row in LEVELS[self.current_level]]
-        self.droplet_pos = None
-        self.visited = set()
-        self.moves = 0
-        self.is_animating = False
-        self.win_animation_time = 0
-        self.game_over = False
-        self.game_over_time = 0
-        self.cells_to_fill = set()
-        self.filling_cells = {}
-
-    def check_game_over(self):
-        """Проверка на поражение (игрок в тупике)"""
-        if not self.droplet_pos or self.is_animating:
-            return False
-
-        free_cells = sum(1 for row in range(BOARD_SIZE) for col in range(BOARD_SIZE)
-                         if self.board[row][col] == 0)
-
-        # Если не все клетки посещены, и двигаться некуда
-        if len(self.visited) < free_cells:
-            row, col = self.droplet_pos
-
-            # Проверяем все направления
-            directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-            can_move = False
-
-            for dr, dc in directions:
-                new_row, new_col = row + dr, col + dc
-
-                # Правильная проверка границ и условий
-                if (0 <= new_row < BOARD_SIZE and
-                        0 <= new_col < BOARD_SIZE and
-                        self.board[new_row][new_col] == 0 and
-                        (new_row, new_col) not in self.visited):
-                    can_move = True
-                    break
-
-            return not can_move
-
-        return False
-
-    def get_cell_from_mouse(self, mouse_pos):
-        """Преобразование координат мыши в координаты клетки"""
-        x, y = mouse_pos
-        if y < INFO_HEIGHT:
-            return None
-
-        col = x // CELL_SIZE
-        row = (y - INFO_HEIGHT) // CELL_SIZE
-
-        if 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE:
-            return (row, col)
-        return None
-
-    def calculate_movement_path(self, direction):
-        """Вычисление полного пути движения"""
-        if not self.droplet_pos:
-            return []
-
-        row, col = self.droplet_pos
-        dr, dc = direction
-        path = [(row, col)]
-
-        while True:
-            new_row, new_col = row + dr, col + dc
-
-            if not (0 <= new_row < BOARD_SIZE and 0 <= new_col < BOARD_SIZE):
-                break
-            if self.board[new_row][new_col] == 1:
-                break
-            if (new_row, new_col) in self.visited:
-                break
-
-            row, col = new_row, new_col
-            path.append((row, col))
-
-        return path
-
-    def start_animation(self, path):
-        """Запуск анимации движения"""
-        if len(path) > 1:
-            self.is_animating = True
-            self.animation_path = path
-            self.current_animation_index = 0
-
-            # Определяем клетки для закрашивания (все кроме стартовой)
-            self.cells_to_fill = set(path[1:])
-            self.filling_cells = {cell: 0 for cell in self.cells_to_fill}
-
-            self.moves += 1
-
-    def update_animation(self):
-        """Обновление анимации движения и закрашивания"""
-        if not self.is_animating:
-            return False
-
-        self.current_animation_index += 1
-        total_frames = len(self.animation_path) * self.animation_speed
-
-        # Обновляем прогресс закрашивания для всех клеток пути
-        total_progress = self.current_animation_index / total_frames
-
-        for cell in self.cells_to_fill:
-            # Клетка начинает закрашиваться, когда капля ее достигает
-            cell_index = self.animation_path.index(cell)
-            cell_start_progress = cell_index / len(self.animation_path)
-            if total_progress >= cell_start_progress:
-                cell_progress = (total_progress - cell_start_progress) * 2.0
-                self.filling_cells[cell] = min(1.0, cell_progress)
-
-        if self.current_animation_index >= total_frames:
-            # Анимация завершена
-            self.is_animating = False
-            final_pos = self.animation_path[-1]
-            self.droplet_pos = final_pos
-
-            # Добавляем все клетки пути в посещенные
-            for cell in self.animation_path:
-                self.visited.add(cell)
-
-            self.cells_to_fill.clear()
-            self.filling_cells.clear()
-            return False
-
-        # Обновляем позицию капли
-        progress = self.current_animation_index / total_frames
-        path_index = min(int(progress * len(self.animation_path)), len(self.animation_path) - 1)
-        self.droplet_pos = self.animation_path[path_index]
-
-        return True
-
-    def move_droplet(self, direction):
-        """Запуск движения капли в заданном направлении"""
-        if not self.droplet_pos or self.is_animating or self.game_over:
-            return False
-
-        path = self.calculate_movement_path(direction)
-        if len(path) > 1:
-            self.start_animation(path)
-            return True
-        return False
-
-    def check_win(self):
-        """Проверка условия победы"""
-        free_cells = sum(1 for row in range(BOARD_SIZE) for col in range(BOARD_SIZE)
-                         if self.board[row][col] == 0)
-        return len(self.visited) == free_cells
-
-    def draw_info_panel(self):
-        """Отрисовка верхней панели"""
-        # Фон панели с градиентом
-        for i in range(INFO_HEIGHT):
-            color_value = 200 + (i * 55 // INFO_HEIGHT)
-            pygame.draw.line(self.screen, (color_value, color_value, color_value),
-                             (0, i), (WINDOW_WIDTH, i))
-
-        pygame.draw.line(self.screen, DARK_BLUE, (0, INFO_HEIGHT), (WINDOW_WIDTH, INFO_HEIGHT), 3)
-
-        if not self.droplet_pos:
-            text = self.small_font.render("Кликните на свободную клетку для начала игры", True, DARK_BLUE)
-            self.screen.blit(text, (WINDOW_WIDTH // 2 - text.get_width() // 2, 15))
-        else:
-            # Счетчик ходов
-            moves_text = self.small_font.render(f"Ходы: {self.moves}", True, BLACK)
-            self.screen.blit(moves_text, (10, 10))
-
-            # Прогресс
-            free_cells = sum(1 for row in range(BOARD_SIZE) for col in range(BOARD_SIZE)
-                             if self.board[row][col] == 0)
-            visited_count = len(self.visited)
-            progress = f"Прогресс: {visited_count}/{free_cells}"
-            progress_text = self.small_font.render(progress, True, BLACK)
-            self.screen.blit(progress_text, (180, 10))
-
-            # Уровень
-            level_text = self.small_font.render(f"Уровень: {self.current_level + 1}/{self.total_levels}", True, BLACK)
-            self.screen.blit(level_text, (WINDOW_WIDTH - 120, 10))
-
-            # Индикаторы
-            if self.game_over:
-                game_over_text = self.small_font.render("Нажмите R для перезапуска", True, RED)
-                self.screen.blit(game_over_text, (WINDOW_WIDTH // 2 - 120, 30))
-            elif visited_count == free_cells:
-                complete_text = self.small_font.render("ВСЕ КЛЕТКИ ПОСЕЩЕНЫ!", True, GREEN)
-                self.screen.blit(complete_text, (WINDOW_WIDTH // 2 - 110, 40))
-            elif self.is_animating:
-                moving_text = self.small_font.render("Движение...", True, BLUE)
-                self.screen.blit(moving_text, (WINDOW_WIDTH // 2 - 50, 30))
-
-    def draw_board(self):
-        """Отрисовка игрового поля"""
-        # Фон поля
-        self.screen.fill(LIGHT_GRAY)
-
-        # Отрисовка верхней панели
-        self.draw_info_panel()
-
-        # Отрисовка препятствий с тенью
-        for row in range(BOARD_SIZE):
-            for col in range(BOARD_SIZE):
-                if self.board[row][col] == 1:
-                    # Тень
-                    pygame.draw.rect(self.screen, DARK_RED,
-                                     (col * CELL_SIZE + 3,
-                                      row * CELL_SIZE + INFO_HEIGHT + 3,
-                                      CELL_SIZE - 6, CELL_SIZE - 6))
-                    # Основной блок
-                    pygame.draw.rect(self.screen, RED,
-                                     (col * CELL_SIZE,
-                                      row * CELL_SIZE + INFO_HEIGHT,
-                                      CELL_SIZE - 6, CELL_SIZE - 6))
-                    # Детали
-                    pygame.draw.rect(self.screen, (255, 100, 100),
-                                     (col * CELL_SIZE + 10,
-                                      row * CELL_SIZE + INFO_HEIGHT + 10,
-                                      CELL_SIZE - 20, CELL_SIZE - 20), 2)
-
-        # Рендер следа капли с анимацией
-        for i, (row, col) in enumerate(self.visited):
-            # Плавное изменение цвета следа
-            alpha = min(200, 100 + (i % 5) * 20)
-            color = (LIGHT_BLUE[0], LIGHT_BLUE[1], LIGHT_BLUE[2])
-
-            pygame.draw.rect(self.screen, color,
-                             (col * CELL_SIZE + 2,
-                              row * CELL_SIZE + INFO_HEIGHT + 2,
-                              CELL_SIZE - 4, CELL_SIZE - 4))
-
-            # Эффект волн при победе
-            if self.check_win() and not self.is_animating:
-                wave = math.sin(pygame.time.get_ticks() * 0.01 + i * 0.5) * 0.3 + 0.7
-                size = int((CELL_SIZE - 4) * wave)
-                offset = (CELL_SIZE - 4 - size) // 2
-                pygame.draw.rect(self.screen, BLUE,
-                                 (col * CELL_SIZE + 2 + offset,
-                                  row * CELL_SIZE + INFO_HEIGHT + 2 + offset,
-                                  size, size))
-        for (row, col), progress in self.filling_cells.items():
-            if progress < 1.0:
-                # Анимация закрашивания (клетки заполняются градиентом)
-                wave = math.sin(pygame.time.get_ticks() * 0.01) * 0.1 + 1.0
-                base_size = int((CELL_SIZE - 4) * progress)
-                animated_size = int(base_size * wave)
-                offset = (CELL_SIZE - 4 - animated_size) // 2
-
-                # Плавное изменение цвета от белого к голубому
-                r = int(LIGHT_BLUE[0] * progress)
-                g = int(LIGHT_BLUE[1] * progress)
-                c = int(LIGHT_BLUE[2] * progress)
-                color = (r, g, c)
-
-                pygame.draw.rect(self.screen, color,
-                                 (col * CELL_SIZE + 2 + offset,
-                                  row * CELL_SIZE + INFO_HEIGHT + 2 + offset,
-                                  animated_size, animated_size))
-            else:
-                # Полностью закрашенная клетка
-                pygame.draw.rect(self.screen, LIGHT_BLUE,
-                                 (col * CELL_SIZE + 2,
-                                  row * CELL_SIZE + INFO_HEIGHT + 2,
-                                  CELL_SIZE - 4, CELL_SIZE - 4))
-
-        # Отрисовка сетки
-        for x in range(0, WINDOW_WIDTH, CELL_SIZE):
-            pygame.draw.line(self.screen, GRAY, (x, INFO_HEIGHT), (x, WINDOW_HEIGHT), 2)
-        for y in range(INFO_HEIGHT, WINDOW_HEIGHT, CELL_SIZE):
-            pygame.draw.line(self.screen, GRAY, (0, y), (WINDOW_WIDTH, y), 2)
-
-        # Отрисовка капли с анимацией
-        if self.droplet_pos:
-            row, col = self.droplet_pos
-            center_x = col * CELL_SIZE + CELL_SIZE // 2
-            center_y = row * CELL_SIZE + INFO_HEIGHT + CELL_SIZE // 2
-
-            # Пульсация капли
-            pulse = math.sin(pygame.time.get_ticks() * 0.01) * 0.1 + 0.9
-            radius = int(CELL_SIZE // 3 * pulse)
-
-            # Капля с градиентом
-            for i in range(radius, 0, -2):
-                alpha = 255 * (i / radius)
-                color = (int(BLUE[0] * (i / radius)),
-                         int(BLUE[1] * (i / radius)),
-                         int(BLUE[2] * (i / radius)))
-                pygame.draw.circle(self.screen, color, (center_x, center_y), i)
-
-            # Блик на капле
-            pygame.draw.circle(self.screen, (255, 255, 255),
-                               (center_x - radius // 3, center_y - radius // 3),
-                               radius // 4)
-
-        # Анимация победы
-        if self.droplet_pos and self.check_win() and not self.is_animating:
-            self.win_animation_time += 1
-
-            # Мигающая надпись
-            alpha = (math.sin(pygame.time.get_ticks() * 0.01) + 1) * 127 + 128
-            win_color = (int(GREEN[0]), int(GREEN[1]), int(GREEN[2]))
-
-            # Разделяем текст на две строки
-            win_text1 = self.win_font.render("ПОБЕДА!", True, win_color)
-            win_text2 = self.win_font.render("Нажмите ПРОБЕЛ для следующего уровня", True, win_color)
-
-            # Вычисляем общий размер для фона
-            text_width = max(win_text1.get_width(), win_text2.get_width()) + 40
-            text_height = win_text1.get_height() + win_text2.get_height() + 30
-
-            # Создаем общий прямоугольник для фона
-            background_rect = pygame.Rect(0, 0, text_width, text_height)
-            background_rect.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
-
-            # Фон надписи (общая рамка)
-            pygame.draw.rect(self.screen, (255, 255, 255, 200),
-                             background_rect, border_radius=15)
-            pygame.draw.rect(self.screen, win_color,
-                             background_rect, 3, border_radius=15)
-
-            # Располагаем текст внутри фона
-            text1_rect = win_text1.get_rect(center=(WINDOW_WIDTH // 2, background_rect.top + 25))
-            text2_rect = win_text2.get_rect(center=(WINDOW_WIDTH // 2, background_rect.top + 47))
-
-            self.screen.blit(win_text1, text1_rect)
-            self.screen.blit(win_text2, text2_rect)
-
-            # Эффект хлопушек
-            if self.win_animation_time % 10 == 0:
-                for _ in range(5):
-                    x = random.randint(0, WINDOW_WIDTH)
-                    y = random.randint(INFO_HEIGHT, WINDOW_HEIGHT)
-                    color = random.choice([GOLD, GREEN, BLUE, RED])
-                    pygame.draw.circle(self.screen, color, (x, y), 4)
-
-        # Анимация поражения
-        if self.game_over:
-            self.game_over_time += 1
-
-            # Пульсация надпись
-            pulse = (math.sin(pygame.time.get_ticks() * 0.02) + 1) * 0.3 + 0.7
-            game_over_color = (
-                min(255, int(RED[0] * pulse)),
-                min(255, int(RED[1] * pulse)),
-                min(255, int(RED[2] * pulse))
-            )
-
-            game_over_text = self.bold_font.render("ТУПИК! Нажмите R для перезапуска", True, game_over_color)
-            text_rect = game_over_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
-
-            # Фон надписи
-            pygame.draw.rect(self.screen, (255, 255, 255, 200),
-                             text_rect.inflate(30, 20),
-                             border_radius=15)
-            pygame.draw.rect(self.screen, game_over_color,
-                             text_rect.inflate(30, 20),
-                             3, border_radius=15)
-
-            self.screen.blit(game_over_text, text_rect)
-
-        # Кнопка возврата в меню активная
-        if self.game_state == STATE_PLAYING:
-            back_button = pygame.Rect(WINDOW_WIDTH - 110, INFO_HEIGHT - 40, 100, 30)
-            pygame.draw.rect(self.screen, PURPLE, back_button, border_radius=10)
-            pygame.draw.rect(self.screen, DARK_BLUE, back_button, 2, border_radius=10)
-            back_text = self.small_font.render("В меню", True, WHITE)
-            self.screen.blit(back_text, (back_button.centerx - back_text.get_width() // 2,
-                                        back_button.centery - back_text.get_height() // 2))
-
-        pygame.display.flip()
-
-    def draw_menu(self):
-        """Отрисовка главного меню"""
-        # Фон с градиентом
-        for y in range(WINDOW_HEIGHT):
-            color_value = 150 + (y * 105 // WINDOW_HEIGHT)
-            pygame.draw.line(self.screen, (color_value, color_value, 255),
-                             (0, y), (WINDOW_WIDTH, y))
-
-        # Заголовок
-        title_text = self.title_font.render("ПУТЕШЕСТВИЕ КАПЛИ", True, DARK_BLUE)
-        self.screen.blit(title_text, (WINDOW_WIDTH // 2 - title_text.get_width() // 2, 50))
-
-        # Кнопки
-        button_width, button_height = 200, 50
-        button_x = WINDOW_WIDTH // 2 - button_width // 2
-
-        # Кнопка "Продолжить"
-        continue_button = pygame.Rect(button_x, 150, button_width, button_height)
-        pygame.draw.rect(self.screen, BLUE, continue_button, border_radius=15)
-        pygame.draw.rect(self.screen, DARK_BLUE, continue_button, 3, border_radius=15)
-        continue_text = self.font.render("Продолжить", True, WHITE)
-        self.screen.blit(continue_text, (continue_button.centerx - continue_text.get_width() // 2,
-                                         continue_button.centery - continue_text.get_height() // 2))
-
-        # Кнопка "Выбор уровня"
-        level_select_button = pygame.Rect(button_x, 220, button_width, button_height)
-        pygame.draw.rect(self.screen, GREEN, level_select_button, border_radius=15)
-        pygame.draw.rect(self.screen, DARK_GREEN, level_select_button, 3, border_radius=15)
-        level_select_text = self.font.render("Выбор уровня", True, WHITE)
-        self.screen.blit(level_select_text, (level_select_button.centerx - level_select_text.get_width() // 2,
-                                             level_select_button.centery - level_select_text.get_height() // 2))
-
-        # Кнопка "Выход"
-        exit_button = pygame.Rect(button_x, 290, button_width, button_height)
-        pygame.draw.rect(self.screen, RED, exit_button, border_radius=15)
-        pygame.draw.rect(self.screen, DARK_RED, exit_button, 3, border_radius=15)
-        exit_text = self.font.render("Выход", True, WHITE)
-        self.screen.blit(exit_text, (exit_button.centerx - exit_text.get_width() // 2,
-                                     exit_button.centery - exit_text.get_height() // 2))
-
-        # Информация об управлении
-        controls_text1 = self.small_font.render("Управление:",True, BLACK)
-        controls_text2 = self.small_font.render("Стрелки - для движения",True, BLACK)
-        controls_text3 = self.small_font.render("R - для перезапуска",True, BLACK)
-        controls_text4 = self.small_font.render("ESC - для выхода",True, BLACK)
-        self.screen.blit(controls_text1, (WINDOW_WIDTH // 2 - controls_text1.get_width() // 2, 370))
-        self.screen.blit(controls_text2, (WINDOW_WIDTH // 2 - controls_text2.get_width() // 2, 390))
-        self.screen.blit(controls_text3, (WINDOW_WIDTH // 2 - controls_text3.get_width() // 2, 410))
-        self.screen.blit(controls_text4, (WINDOW_WIDTH // 2 - controls_text4.get_width() // 2, 430))
-        pygame.display.flip()
-
-    def draw_level_select(self):
-        """Отрисовка меню выбора уровня"""
-        # Фон с градиентом
-        for y in range(WINDOW_HEIGHT):
-            color_value = 150 + (y * 105 // WINDOW_HEIGHT)
-            pygame.draw.line(self.screen, (color_value, 255, color_value),
-                             (0, y), (WINDOW_WIDTH, y))
-
-        # Заголовок
-        title_text = self.title_font.render("ВЫБОР УРОВНЯ", True, DARK_GREEN)
-        self.screen.blit(title_text, (WINDOW_WIDTH // 2 - title_text.get_width() // 2, 30))
-
-        # Кнопка возврата в меню
-        back_button = pygame.Rect(WINDOW_WIDTH//2 - 51, 300, 100, 30)
-        pygame.draw.rect(self.screen, PURPLE, back_button, border_radius=10)
-        pygame.draw.rect(self.screen, DARK_BLUE, back_button, 2, border_radius=10)
-        back_text = self.small_font.render("Назад", True, WHITE)
-        self.screen.blit(back_text, (back_button.centerx - back_text.get_width() // 2,
-                                     back_button.centery - back_text.get_height() // 2))
-
-        # Кнопки уровней сетка
-        levels_per_row = 3
-        level_button_size = 80
-        level_button_margin = 20
-        start_x = (WINDOW_WIDTH - (
-                    levels_per_row * level_button_size + (levels_per_row - 1) * level_button_margin)) // 2
-        start_y = 100
-
-        for i in range(self.total_levels):
-            row = i // levels_per_row
-            col = i % levels_per_row
-
-            level_button = pygame.Rect(
-                start_x + col * (level_button_size + level_button_margin),
-                start_y + row * (level_button_size + level_button_margin),
-                level_button_size, level_button_size
-            )
-
-            # Разные цвета для разных уровней
-            colors = [BLUE, GREEN, ORANGE, PURPLE, RED, GOLD]
-            color = colors[i % len(colors)]
-            dark_color = (max(0, color[0] - 40), max(0, color[1] - 40), max(0, color[2] - 40))
-
-            pygame.draw.rect(self.screen, color, level_button, border_radius=15)
-            pygame.draw.rect(self.screen, dark_color, level_button, 3, border_radius=15)
-
-            level_text = self.font.render(str(i + 1), True, WHITE)
-            self.screen.blit(level_text, (level_button.centerx - level_text.get_width() // 2,
-                                          level_button.centery - level_text.get_height() // 2))
-
-        pygame.display.flip()
-
-    def handle_menu_events(self, event):
-        """Обработка событий в меню"""
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            x, y = event.pos
-
-            # Координаты кнопок
-            button_width, button_height = 200, 50
-            button_x = WINDOW_WIDTH // 2 - button_width // 2
-
-            # Проверка нажатия на кнопки
-            if button_x <= x <= button_x + button_width:
-                if 150 <= y <= 150 + button_height:  # Продолжить
-                    self.game_state = STATE_PLAYING
-                elif 220 <= y <= 220 + button_height:  # Выбор уровня
-                    self.game_state = STATE_LEVEL_SELECT
-                elif 290 <= y <= 290 + button_height:  # Выход
-                    return False
-
-        return True
-
-    def handle_level_select_events(self, event):
-        """Обработка ивентов в меню выбора уровня"""
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            x, y = event.pos
-
-            # Проверка кнопки "Назад"
-            back_button_x = WINDOW_WIDTH // 2 - 51
-            back_button_y = 300
-            if (back_button_x <= x <= back_button_x + 100 and
-                    back_button_y <= y <= back_button_y + 30):
-                self.game_state = STATE_MENU
-                return True
-
-            # Проверка выбора уровня
-            levels_per_row = 3
-            level_button_size = 80
-            level_button_margin = 20
-            start_x = (WINDOW_WIDTH - (
-                        levels_per_row * level_button_size + (levels_per_row - 1) * level_button_margin)) // 2
-            start_y = 100
-
-            for i in range(self.total_levels):
-                row = i // levels_per_row
-                col = i % levels_per_row
-
-                button_x = start_x + col * (level_button_size + level_button_margin)
-                button_y = start_y + row * (level_button_size + level_button_margin)
-
-                if button_x <= x <= button_x + level_button_size and button_y <= y <= button_y + level_button_size:
-                    self.load_level(i)
-                    self.game_state = STATE_PLAYING
-                    break
-
-        return True
-
-    def handle_playing_events(self, event):
-        """Обработка событий во время игры"""
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            # Проверка кнопки "В меню" (активна)
-
-            if (WINDOW_WIDTH - 110 <= event.pos[0] <= WINDOW_WIDTH - 10 and
-                INFO_HEIGHT - 40 <= event.pos[1] <= INFO_HEIGHT - 10):
-                self.game_state = STATE_MENU
-                return True
-
-            # Обработка клика по клетке если игра активна
-            if not self.droplet_pos and not self.is_animating and not self.game_over and not self.check_win():
-                cell = self.get_cell_from_mouse(event.pos)
-                if cell and self.board[cell[0]][cell[1]] == 0:
-                    self.droplet_pos = cell
-                    self.visited.add(cell)
-
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                self.game_state = STATE_MENU
-            elif event.key == pygame.K_r:  # Перезапуск уровня
-                self.load_level(self.current_level)
-            elif event.key == pygame.K_SPACE and self.check_win() and not self.is_animating:
-                self.load_level(self.current_level + 1)
-            elif self.droplet_pos and not self.check_win() and not self.is_animating and not self.game_over:
-                if event.key == pygame.K_UP:
-                    self.move_droplet((-1, 0))
-                elif event.key == pygame.K_DOWN:
-                    self.move_droplet((1, 0))
-                elif event.key == pygame.K_LEFT:
-                    self.move_droplet((0, -1))
-                elif event.key == pygame.K_RIGHT:
-                    self.move_droplet((0, 1))
-
-        return True
-
-    def handle_events(self):
-        """Обработка событий"""
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return False
-
-            if self.game_state == STATE_MENU:
-                if not self.handle_menu_events(event):
-                    return False
-            elif self.game_state == STATE_LEVEL_SELECT:
-                if not self.handle_level_select_events(event):
-                    return False
-            elif self.game_state == STATE_PLAYING:
-                if not self.handle_playing_events(event):
-                    return False
-
-        # Проверка на поражение после обработки событий
-        if self.game_state == STATE_PLAYING and not self.game_over and not self.is_animating and self.droplet_pos and not self.check_win():
-            self.game_over = self.check_game_over()
-            if self.game_over:
-                self.game_over_time = 0
-
-        return True
-
-    def run(self):
-        """Главный игровой цикл"""
-        running = True
-        while running:
-            running = self.handle_events()
-
-            if self.game_state == STATE_PLAYING:
-                self.update_animation()
-                self.draw_board()
-            elif self.game_state == STATE_MENU:
-                self.draw_menu()
-            elif self.game_state == STATE_LEVEL_SELECT:
-                self.draw_level_select()
-
-            self.clock.tick(FPS)
-
-        pygame.quit()
-        sys.exit()
-
-
-if __name__ == "__main__":
-    game = DropletGame()
-    game.run()
+import argparse
+import pygame
+import sys
+import math
+import random
+import time
+
+# Откладывать импорт частиц и списка уровней незачем: numpy загружает ещё сам
+# import pygame (pygame.surfarray), а эти модули добавляют к нему меньше миллисекунды
+from browser import BrowserLayout, ThumbnailCache
+from camera import Camera
+from engine import Board, GameState, UP, DOWN, LEFT, RIGHT
+from hints import (HintCache, HINT_LOST, HINT_MOVE, HINT_PENDING, HINT_START,
+                   HINT_UNAVAILABLE)
+from levelpack import LevelPack
+from levels import LEVELS, load_levels
+from particles import ParticleSystem
+from profiler import FrameProfiler, PHASES
+from replay import Replay, RESULT_DEAD_END, RESULT_PLAYING, RESULT_WON, save_replay
+from sprites import PULSE_STEPS, WAVE_SHIFT, SpriteCache, fill_step, pulse_step
+from textcache import TextCache
+from tween import Animator, Tween
+
+# Константы
+VIEW_SIZE = 500  # сторона области поля в пикселях; размер клетки задаёт камера
+INFO_HEIGHT = 80
+WINDOW_WIDTH = VIEW_SIZE
+WINDOW_HEIGHT = VIEW_SIZE + INFO_HEIGHT
+FPS = 60
+ZOOM_STEP = 1.25  # множитель масштаба за одно деление колеса или нажатие +/-
+
+# Время анимаций в секундах
+CELL_DURATION = 10 / 60               # проход капли через одну клетку
+PULSE_PERIOD = 2 * math.pi / 10       # пульсация капли и волны победы
+ALARM_PERIOD = 2 * math.pi / 20       # мигание надписи о тупике
+CONFETTI_INTERVAL = 10 / 60           # новые хлопушки при победе
+CONFETTI_PARTICLES = 60               # частиц в одной хлопушке
+SPARK_PARTICLES = 160                 # искр при тупике
+MAX_FRAME_TIME = 0.25                 # больший шаг времени за кадр не учитывается
+IDLE_TIMEOUT = 250                    # мс ожидания события в режиме простоя
+HUD_REFRESH = 0.25                    # обновление текста отладочной панели
+
+# Цвет-ключ прозрачности для слоя сетки
+COLORKEY = (255, 0, 255)
+
+# Цвета
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GRAY = (150, 150, 150)
+LIGHT_GRAY = (230, 230, 230)
+BLUE = (65, 105, 225)
+DARK_BLUE = (30, 70, 180)
+RED = (220, 60, 60)
+DARK_RED = (180, 30, 30)
+LIGHT_BLUE = (135, 206, 250)
+GREEN = (60, 180, 75)
+DARK_GREEN = (30, 130, 45)
+GOLD = (255, 215, 0)
+ORANGE = (255, 140, 0)
+DARK_ORANGE = (200, 100, 0)
+PURPLE = (128, 0, 128)
+LIGHT_PURPLE = (200, 160, 255)
+
+# Размеры шрифтов; шрифты загружаются при первом обращении
+FONT_SIZES = {"font": 32, "small_font": 25, "bold_font": 36, "win_font": 30, "title_font": 48}
+
+# Список уровней: плитки, миниатюры и нижняя панель кнопок
+BROWSER_TOP = 90
+BROWSER_BOTTOM = WINDOW_HEIGHT - 70
+BROWSER_COLUMNS = 4
+BROWSER_TILE = 100
+BROWSER_GAP = 16
+THUMB_SIZE = 64
+
+# Направления в тексте подсказки
+DIRECTION_WORDS = {UP: "вверх", DOWN: "вниз", LEFT: "влево", RIGHT: "вправо"}
+
+# Состояния игры
+STATE_MENU = 0
+STATE_PLAYING = 1
+STATE_LEVEL_SELECT = 2
+
+
+class DropletGame:
+    def __init__(self, dirty_rects=False, idle=False, levels=None, record=None,
+                 hud=False, timings=None):
+        # Pygame инициализируется только здесь и только нужными подсистемами:
+        # pygame.init() поднял бы ещё звук и джойстики, которые игре не нужны
+        pygame.display.init()
+        pygame.font.init()
+        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        pygame.display.set_caption("Путешествие капли")
+        self.clock = pygame.time.Clock()
+        self.fonts = {}
+        self.text = TextCache()
+        self.sprites = SpriteCache(LIGHT_BLUE, BLUE, BLUE)
+
+        # Состояние игры
+        self.game_state = STATE_MENU
+
+        # Текущий уровень
+        self.levels = levels or LEVELS
+        self.current_level = 0
+        self.total_levels = len(self.levels)
+
+        # Игровое поле и состояние партии (правила в engine); размеры берутся из уровня
+        self.board = self.level_board(0)
+        self.state = GameState(self.board)
+        self.droplet_pos = None  # отображаемая позиция капли
+
+        # Камера: масштаб и прокрутка поля, рисуются только видимые клетки
+        self.camera = Camera((0, INFO_HEIGHT, WINDOW_WIDTH, WINDOW_HEIGHT - INFO_HEIGHT),
+                             self.board.height, self.board.width)
+        self.panning = False
+
+        # Анимация движения
+        self.is_animating = False
+        self.animation_path = []
+        self.animation_mask = 0  # клетки хода, которые ещё закрашиваются
+        self.filling_cells = {}  # клетка -> анимация закрашивания
+        self.slide_tween = None
+
+        # Все анимации идут по времени через общий Animator
+        self.animator = Animator()
+        self.pulse = self.animator.add(Tween(PULSE_PERIOD, loop=True))
+        self.alarm = self.animator.add(Tween(ALARM_PERIOD, loop=True))
+        self.animator.add(Tween(CONFETTI_INTERVAL, loop=True, on_complete=self.launch_confetti))
+
+        # Частицы хлопушек и искр тупика; цвета переводятся в формат экрана один раз
+        self.particles = ParticleSystem()
+        self.confetti_colors = ParticleSystem.palette(self.screen, (GOLD, GREEN, BLUE, RED))
+        self.spark_colors = ParticleSystem.palette(self.screen, (RED, DARK_RED, ORANGE, GOLD))
+        self.last_particles_rect = None
+
+        # Эффекты
+        self.game_over = False
+        self.game_over_time = 0
+        self.game_over_text = None  # своя копия надписи о тупике: у неё меняется прозрачность
+
+        # Кэш статичных слоёв: фоны меню и слои поля текущего уровня
+        self.backgrounds = {}
+        self.board_layer = None
+        self.overlay_layer = None
+        self.layers_key = None
+
+        # Вывод только изменившихся прямоугольников вместо flip()
+        self.dirty_rects = dirty_rects
+        self.dirty = []
+        self.full_redraw = True
+        self.presented_key = None
+        self.last_droplet_rect = None
+
+        # Режим простоя: без анимаций цикл спит в ожидании событий
+        self.idle = idle
+        self.frame_dt = 0.0
+
+        # Отладочная панель (F3) и покадровый журнал времени фаз
+        self.profiler = FrameProfiler(log_path=timings)
+        self.hud = False
+        self.hud_surface = None
+        self.hud_updated = 0.0
+        self.set_hud(hud)
+
+        # Список уровней: рисуются только видимые плитки, миниатюры - в фоне
+        self.browser = BrowserLayout((0, BROWSER_TOP, WINDOW_WIDTH, BROWSER_BOTTOM - BROWSER_TOP),
+                                     self.total_levels, BROWSER_COLUMNS, BROWSER_TILE, BROWSER_GAP)
+        self.thumbnails = ThumbnailCache(self.level_board, THUMB_SIZE)
+        buttons_y = BROWSER_BOTTOM + 30
+        self.back_button = pygame.Rect(WINDOW_WIDTH // 2 - 51, buttons_y, 100, 30)
+        self.prev_page_button = pygame.Rect(30, buttons_y, 60, 30)
+        self.next_page_button = pygame.Rect(WINDOW_WIDTH - 90, buttons_y, 60, 30)
+
+        # Подсказки (H): таблицы решений уровней считаются в фоне и кэшируются
+        self.hints = HintCache()
+        self.hint_table = None
+        self.hint = None
+        # Выделенные клетки показанной подсказки: при её смене или скрытии они перерисовываются
+        self.hint_key = None
+        self.hint_rects = []
+
+        # Запись партии: ходы текущей попытки, при record сохраняются в файл
+        self.record = record
+        self.replay = None
+
+        # Загрузка уровня
+        self.load_level(self.current_level)
+
+    def get_font(self, size):
+        """Шрифт по умолчанию размера size, загружается при первом запросе"""
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    @property
+    def font(self):
+        return self.get_font(FONT_SIZES["font"])
+
+    @property
+    def small_font(self):
+        return self.get_font(FONT_SIZES["small_font"])
+
+    @property
+    def bold_font(self):
+        return self.get_font(FONT_SIZES["bold_font"])
+
+    @property
+    def win_font(self):
+        return self.get_font(FONT_SIZES["win_font"])
+
+    @property
+    def title_font(self):
+        return self.get_font(FONT_SIZES["title_font"])
+
+    def load_level(self, level_index):
+        """Загрузка уровня по индексу"""
+        self.finish_replay()
+        self.current_level = level_index % self.total_levels
+        self.board = self.level_board(self.current_level)
+        self.state = GameState(self.board)
+        self.droplet_pos = None
+        self.camera.rows = self.board.height
+        self.camera.cols = self.board.width
+        self.camera.fit()
+        self.is_animating = False
+        self.cancel_animation()
+        self.game_over = False
+        self.game_over_time = 0
+        self.particles.clear()
+        self.full_redraw = True
+        self.hint = None
+        self.hint_table = self.hints.table(self.board)
+        if self.total_levels > 1:
+            self.hints.prefetch(self.level_board((self.current_level + 1) % self.total_levels))
+
+    def level_board(self, level_index):
+        """Поле уровня; из двоичного набора читается только нужная запись"""
+        if isinstance(self.levels, LevelPack):
+            return self.levels.load_level(level_index)
+        return Board.from_grid(self.levels[level_index])
+
+    def finish_replay(self):
+        """Завершение записи текущей попытки с итогом по состоянию партии"""
+        replay = self.replay
+        self.replay = None
+        if replay is None:
+            return None
+        if self.state.won:
+            replay.result = RESULT_WON
+        elif self.state.dead_end:
+            replay.result = RESULT_DEAD_END
+        else:
+            replay.result = RESULT_PLAYING
+        replay.moves = self.state.moves
+        if self.record:
+            save_replay(self.record, replay)
+        return replay
+
+    def check_game_over(self):
+        """Проверка на поражение (игрок в тупике)"""
+        return not self.is_animating and self.state.dead_end
+
+    def get_cell_from_mouse(self, mouse_pos):
+        """Преобразование координат мыши в координаты клетки"""
+        return self.camera.cell_at(mouse_pos)
+
+    def calculate_movement_path(self, direction):
+        """Вычисление полного пути движения"""
+        return self.state.path(direction)
+
+    def start_animation(self, path):
+        """Запуск анимации движения"""
+        if len(path) > 1:
+            self.cancel_animation()
+            self.is_animating = True
+            self.animation_path = path
+            total = len(path) * CELL_DURATION
+
+            # Клетка начинает закрашиваться, когда капля её достигает, и
+            # закрашивается за половину времени хода. Смещения считаются один раз.
+            for index, cell in enumerate(path[1:], 1):
+                self.filling_cells[cell] = self.animator.add(
+                    Tween(total / 2, delay=index / len(path) * total))
+                self.animation_mask |= 1 << self.board.index(cell)
+
+            self.slide_tween = self.animator.add(
+                Tween(total, on_update=self.update_slide, on_complete=self.finish_animation))
+
+    def update_slide(self, progress):
+        """Положение капли на пути по доле пройденного времени"""
+        path = self.animation_path
+        self.droplet_pos = path[min(int(progress * len(path)), len(path) - 1)]
+        self.camera.follow(self.droplet_pos)
+
+    def finish_animation(self):
+        """Конец хода: капля в конечной клетке, закрашивание завершено"""
+        # Ход уже применён к self.state, остаётся только показать результат
+        self.droplet_pos = self.animation_path[-1]
+        for cell in self.animation_path:
+            self.mark_dirty(self.cell_rect(cell))
+        self.cancel_animation()
+
+    def cancel_animation(self):
+        """Остановка анимации хода без изменения состояния партии"""
+        for tween in self.filling_cells.values():
+            tween.cancel()
+        if self.slide_tween:
+            self.slide_tween.cancel()
+        self.slide_tween = None
+        self.is_animating = False
+        self.animation_path = []
+        self.animation_mask = 0
+        self.filling_cells = {}
+
+    def launch_confetti(self):
+        """Новая хлопушка в случайной точке поля, пока показывается победа"""
+        if (self.game_state != STATE_PLAYING or self.droplet_pos is None or self.is_animating
+                or not self.check_win()):
+            return
+        view = pygame.Rect(self.camera.viewport)
+        x = random.randint(view.left + 40, view.right - 40)
+        y = random.randint(view.top + view.height // 3, view.bottom - 40)
+        self.particles.emit(CONFETTI_PARTICLES, x, y, 420, self.confetti_colors,
+                            angle=-math.pi / 2, spread=math.pi * 0.8)
+
+    def launch_sparks(self):
+        """Искры из клетки капли, когда она зашла в тупик"""
+        if self.droplet_pos is None:
+            return
+        x, y = self.cell_rect(self.droplet_pos).center
+        self.particles.emit(SPARK_PARTICLES, x, y, 300, self.spark_colors)
+
+    def update_animation(self, dt=1 / FPS):
+        """Продвижение всех анимаций на dt секунд"""
+        dt = min(dt, MAX_FRAME_TIME)
+        self.animator.update(dt)
+        self.particles.update(dt)
+        return self.is_animating
+
+    def move_droplet(self, direction):
+        """Запуск движения капли в заданном направлении"""
+        if self.state.pos is None or self.is_animating or self.game_over:
+            return False
+
+        path = self.calculate_movement_path(direction)
+        if len(path) > 1:
+            self.state.move(direction)
+            self.hint = None
+            if self.replay:
+                self.replay.record(direction)
+            self.start_animation(path)
+            return True
+        return False
+
+    def undo_move(self):
+        """Отмена последнего хода; анимация этого хода, если она идёт, обрывается"""
+        if self.state.pos is None:
+            return False
+        # Ход применён к состоянию уже в начале анимации, поэтому достаточно
+        # остановить анимацию и вернуть снимок до хода
+        self.cancel_animation()
+        if self.state.undo() is None:
+            return False
+        if self.replay:
+            self.replay.undo()
+        self.history_changed()
+        return True
+
+    def redo_move(self):
+        """Повтор отменённого хода с анимацией; идущая анимация сначала доигрывается"""
+        direction = self.state.redo_direction
+        if direction is None:
+            return False
+        if self.slide_tween:
+            self.slide_tween.finish()
+        path = self.calculate_movement_path(direction)
+        self.state.redo()
+        if self.replay:
+            self.replay.record(direction)
+        self.history_changed()
+        self.start_animation(path)
+        return True
+
+    def history_changed(self):
+        """Состояние партии сменилось отменой или повтором хода"""
+        self.droplet_pos = self.state.cell
+        self.camera.follow(self.droplet_pos)
+        self.game_over = False
+        self.game_over_time = 0
+        self.particles.clear()
+        self.hint = None
+        self.full_redraw = True
+
+    def query_hint(self):
+        """Подсказка для текущего состояния: лучший старт или следующий ход"""
+        if self.state.pos is None:
+            return self.hint_table.best_start()
+        return self.hint_table.query(self.state.pos, self.state.visited)
+
+    def check_win(self):
+        """Проверка условия победы"""
+        return self.state.won
+
+    def cell_rect(self, cell):
+        """Прямоугольник клетки на экране"""
+        x, y = self.camera.cell_origin(cell)
+        size = self.camera.cell_size
+        return pygame.Rect(x, y, size, size)
+
+    def is_visible(self, cell):
+        """Попадает ли клетка в область вывода камеры"""
+        rows, cols = self.camera.visible()
+        return cell[0] in rows and cell[1] in cols
+
+    def board_clip(self):
+        """Часть экрана, занятая полем (клетки на краю обрезаются по ней)"""
+        return pygame.Rect(self.camera.viewport)
+
+    def mark_dirty(self, rect):
+        """Область экрана, изменившаяся в этом кадре"""
+        self.dirty.append(rect)
+
+    def present(self):
+        """Вывод кадра: целиком или только изменившиеся прямоугольники"""
+        key = (self.game_state, self.screen.get_size())
+        if key != self.presented_key:
+            self.presented_key = key
+            self.full_redraw = True
+
+        if self.hud:
+            self.draw_hud()
+        self.profiler.mark("draw")
+
+        if not self.dirty_rects or self.full_redraw:
+            pygame.display.flip()
+        elif self.dirty:
+            pygame.display.update(self.dirty)
+
+        self.full_redraw = False
+        self.dirty = []
+        self.profiler.mark("present")
+
+    def set_hud(self, enabled):
+        """Показ или скрытие отладочной панели"""
+        self.hud = enabled
+        self.hud_surface = None
+        self.profiler.set_enabled(enabled)
+        self.full_redraw = True
+
+    def draw_hud(self):
+        """Отладочная панель: время фаз, процентили кадра, вызовы отрисовки"""
+        now = time.perf_counter()
+        if self.hud_surface is None or now - self.hud_updated >= HUD_REFRESH:
+            # Текст меняется постоянно, поэтому он не идёт в кэш надписей
+            # и перерисовывается несколько раз в секунду, а не каждый кадр
+            self.hud_updated = now
+            profiler = self.profiler
+            averages = profiler.averages()
+            p50, p95, p99 = profiler.percentiles().values()
+            lines = [f"кадр p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f} мс",
+                     "  ".join(f"{phase} {averages[phase]:.2f}" for phase in PHASES[:3]),
+                     "  ".join(f"{phase} {averages[phase]:.2f}" for phase in PHASES[3:]),
+                     f"вызовов draw {profiler.draw_calls():.0f}, надписи в кэше {len(self.text)}"]
+            rendered = [self.small_font.render(line, True, WHITE) for line in lines]
+            width = max(text.get_width() for text in rendered) + 12
+            height = sum(text.get_height() for text in rendered) + 8
+            surface = pygame.Surface((width, height)).convert()
+            surface.fill(BLACK)
+            y = 4
+            for text in rendered:
+                surface.blit(text, (6, y))
+                y += text.get_height()
+            surface.set_alpha(200)
+            self.hud_surface = surface
+        rect = self.hud_surface.get_rect(bottomleft=(0, WINDOW_HEIGHT))
+        self.screen.blit(self.hud_surface, rect)
+        self.mark_dirty(rect)
+
+    def gradient_background(self, kind):
+        """Фон меню с вертикальным градиентом, рисуется один раз на размер окна"""
+        size = self.screen.get_size()
+        key = (kind, size)
+        background = self.backgrounds.get(key)
+        if background is None:
+            background = pygame.Surface(size).convert()
+            width, height = size
+            for y in range(height):
+                color_value = 150 + (y * 105 // height)
+                if kind == STATE_MENU:
+                    color = (color_value, color_value, 255)
+                else:
+                    color = (color_value, 255, color_value)
+                pygame.draw.line(background, color, (0, y), (width, y))
+            self.backgrounds[key] = background
+        return background
+
+    def build_layers(self):
+        """Пересборка слоёв поля при смене уровня, размера окна или положения камеры"""
+        key = (self.screen.get_size(), self.board, self.camera.key)
+        if key == self.layers_key:
+            return
+        self.layers_key = key
+        self.full_redraw = True
+
+        # Нижний слой: фон, панель и препятствия
+        layer = pygame.Surface(self.screen.get_size()).convert()
+        layer.fill(LIGHT_GRAY)
+        self.draw_panel_background(layer)
+        layer.set_clip(self.board_clip())
+        self.draw_obstacles(layer)
+        layer.set_clip(None)
+        self.board_layer = layer
+
+        # Верхний слой: сетка и кнопка меню поверх следа
+        overlay = pygame.Surface(self.screen.get_size()).convert()
+        overlay.fill(COLORKEY)
+        overlay.set_clip(self.board_clip())
+        self.draw_grid(overlay)
+        overlay.set_clip(None)
+        self.draw_back_button(overlay)
+        overlay.set_colorkey(COLORKEY, pygame.RLEACCEL)
+        self.overlay_layer = overlay
+
+    def draw_panel_background(self, surface):
+        """Фон верхней панели с градиентом"""
+        for i in range(INFO_HEIGHT):
+            color_value = 200 + (i * 55 // INFO_HEIGHT)
+            pygame.draw.line(surface, (color_value, color_value, color_value),
+                             (0, i), (WINDOW_WIDTH, i))
+
+        pygame.draw.line(surface, DARK_BLUE, (0, INFO_HEIGHT), (WINDOW_WIDTH, INFO_HEIGHT), 3)
+
+    def draw_obstacles(self, surface):
+        """Препятствия с тенью (только попавшие в камеру)"""
+        size = self.camera.cell_size
+        shadow = max(1, size * 3 // 100)
+        detail = size // 10
+        for cell in self.board.window_cells(self.board.obstacles, *self.camera.visible()):
+            x, y = self.camera.cell_origin(cell)
+            # Тень
+            pygame.draw.rect(surface, DARK_RED,
+                             (x + shadow, y + shadow, size - 2 * shadow, size - 2 * shadow))
+            # Основной блок
+            pygame.draw.rect(surface, RED,
+                             (x, y, size - 2 * shadow, size - 2 * shadow))
+            # Детали (на мелких клетках не видны)
+            if size >= 20:
+                pygame.draw.rect(surface, (255, 100, 100),
+                                 (x + detail, y + detail, size - 2 * detail, size - 2 * detail), 2)
+
+    def draw_grid(self, surface):
+        """Линии сетки в пределах видимой части поля"""
+        size = self.camera.cell_size
+        if size < 6:
+            return
+        width = 2 if size >= 20 else 1
+        rows, cols = self.camera.visible()
+        left, top = self.camera.cell_origin((rows.start, cols.start))
+        right, bottom = self.camera.cell_origin((rows.stop, cols.stop))
+        for col in cols:
+            x = left + (col - cols.start) * size
+            pygame.draw.line(surface, GRAY, (x, top), (x, bottom), width)
+        for row in rows:
+            y = top + (row - rows.start) * size
+            pygame.draw.line(surface, GRAY, (left, y), (right, y), width)
+
+    def draw_back_button(self, surface):
+        """Кнопка возврата в меню"""
+        back_button = pygame.Rect(WINDOW_WIDTH - 110, INFO_HEIGHT - 40, 100, 30)
+        pygame.draw.rect(surface, PURPLE, back_button, border_radius=10)
+        pygame.draw.rect(surface, DARK_BLUE, back_button, 2, border_radius=10)
+        back_text = self.text.render(self.small_font, "В меню", True, WHITE)
+        surface.blit(back_text, (back_button.centerx - back_text.get_width() // 2,
+                                 back_button.centery - back_text.get_height() // 2))
+
+    def draw_info_panel(self):
+        """Отрисовка надписей верхней панели (фон уже в слое поля)"""
+        self.mark_dirty(pygame.Rect(0, 0, WINDOW_WIDTH, INFO_HEIGHT + 2))
+
+        if not self.droplet_pos:
+            text = self.text.render(self.small_font, "Кликните на свободную клетку для начала игры", True, DARK_BLUE)
+            self.screen.blit(text, (WINDOW_WIDTH // 2 - text.get_width() // 2, 15))
+            if self.hint:
+                self.draw_hint_text()
+        else:
+            # Счетчик ходов
+            moves_text = self.text.render(self.small_font, f"Ходы: {self.state.moves}", True, BLACK)
+            self.screen.blit(moves_text, (10, 10))
+
+            # Прогресс
+            # Клетки текущего хода считаются посещёнными, когда закрасятся
+            free_cells = self.state.free_count
+            visited_count = self.state.visited_count - len(self.filling_cells)
+            progress = f"Прогресс: {visited_count}/{free_cells}"
+            progress_text = self.text.render(self.small_font, progress, True, BLACK)
+            self.screen.blit(progress_text, (180, 10))
+
+            # Уровень
+            level_text = self.text.render(self.small_font,
+                                          f"Уровень: {self.current_level + 1}/{self.total_levels}", True, BLACK)
+            self.screen.blit(level_text, (WINDOW_WIDTH - 120, 10))
+
+            # Индикаторы
+            if self.game_over:
+                game_over_text = self.text.render(self.small_font, "Нажмите R для перезапуска", True, RED)
+                self.screen.blit(game_over_text, (WINDOW_WIDTH // 2 - 120, 30))
+            elif visited_count == free_cells:
+                complete_text = self.text.render(self.small_font, "ВСЕ КЛЕТКИ ПОСЕЩЕНЫ!", True, GREEN)
+                self.screen.blit(complete_text, (WINDOW_WIDTH // 2 - 110, 40))
+            elif self.is_animating:
+                moving_text = self.text.render(self.small_font, "Движение...", True, BLUE)
+                self.screen.blit(moving_text, (WINDOW_WIDTH // 2 - 50, 30))
+            elif self.hint:
+                self.draw_hint_text()
+            elif self.state.lost:
+                lost_text = self.text.render(self.small_font, "Все клетки уже не обойти, R - заново", True, DARK_ORANGE)
+                self.screen.blit(lost_text, (10, 40))
+
+    def draw_hint_text(self):
+        """Строка подсказки в верхней панели"""
+        hint = self.hint
+        if hint.status == HINT_MOVE:
+            message = f"Подсказка: {DIRECTION_WORDS[hint.direction]}, до победы ходов: {hint.moves}"
+        elif hint.status == HINT_START:
+            message = f"Подсказка: начните с выделенной клетки, ходов: {hint.moves}"
+        elif hint.status == HINT_LOST:
+            message = "Подсказка: победить уже нельзя, R - заново"
+        elif hint.status == HINT_PENDING:
+            message = "Подсказка считается..."
+        elif hint.status == HINT_UNAVAILABLE:
+            message = "Подсказка недоступна для такого большого поля"
+        else:
+            return
+        text = self.text.render(self.small_font, message, True, DARK_GREEN)
+        self.screen.blit(text, (10, 40))
+
+    def draw_hint(self):
+        """Выделение клеток подсказанного хода или стартовой клетки"""
+        hint = self.hint if not self.is_animating else None
+        key = hint and (hint.status, hint.cell, hint.direction, self.state.pos)
+        if key != self.hint_key:
+            # Подсказка сменилась или пропала: прошлое выделение стирается с экрана
+            for rect in self.hint_rects:
+                self.mark_dirty(rect)
+            self.hint_key = key
+            self.hint_rects = []
+        if hint is None:
+            return
+        if hint.status == HINT_MOVE:
+            cells = self.state.path(hint.direction)[1:]
+        elif hint.status == HINT_START:
+            cells = [hint.cell]
+        else:
+            return
+        width = max(1, self.camera.cell_size // 25)
+        rects = [self.cell_rect(cell) for cell in cells if self.is_visible(cell)]
+        self.screen.set_clip(self.board_clip())
+        for rect in rects:
+            pygame.draw.rect(self.screen, GREEN, rect.inflate(-2 * width, -2 * width), width)
+            self.mark_dirty(rect)
+        self.screen.set_clip(None)
+        self.hint_rects = rects
+
+    def draw_board(self):
+        """Отрисовка игрового поля"""
+        # Ответ подсказки, которая ещё считалась в прошлом кадре
+        if self.hint and self.hint.status == HINT_PENDING:
+            self.hint = self.query_hint()
+
+        # Фон, панель и препятствия из готового слоя
+        self.build_layers()
+        self.screen.blit(self.board_layer, (0, 0))
+
+        # Отрисовка верхней панели
+        self.draw_info_panel()
+
+        # Рендер следа капли с анимацией: только клетки в камере
+        self.screen.set_clip(self.board_clip())
+        cell_size = self.camera.cell_size
+        # Кадры анимаций клетки нарисованы заранее для текущего размера клетки
+        atlas = self.sprites.atlas(cell_size)
+        trail = self.state.visited & ~self.animation_mask
+        step = pulse_step(self.pulse.value)
+        celebrating = self.check_win() and not self.is_animating
+        if celebrating:
+            # Волны и хлопушки меняют всё поле
+            self.mark_dirty(self.screen.get_rect())
+        width = self.board.width
+        blit = self.screen.blit
+        for row, col in self.board.window_cells(trail, *self.camera.visible()):
+            x, y = self.camera.cell_origin((row, col))
+            if celebrating:
+                # Волна победы: фаза зависит от клетки, а не от порядка обхода
+                blit(atlas.wave(int(step + (row * width + col) * WAVE_SHIFT) % PULSE_STEPS),
+                     (x + 2, y + 2))
+            else:
+                blit(atlas.trail, (x + 2, y + 2))
+        for cell, tween in self.filling_cells.items():
+            if not self.is_visible(cell):
+                continue
+            # Волна может немного выводить закрашивание за границы клетки
+            self.mark_dirty(self.cell_rect(cell).inflate(cell_size // 5, cell_size // 5))
+            # Закрашивание растёт и меняет цвет от белого к голубому
+            frame = atlas.fill(fill_step(tween.value), step)
+            if frame:
+                square, offset = frame
+                x, y = self.camera.cell_origin(cell)
+                blit(square, (x + 2 + offset, y + 2 + offset))
+        self.screen.set_clip(None)
+
+        # Сетка и кнопка меню
+        self.screen.blit(self.overlay_layer, (0, 0))
+
+        self.draw_hint()
+
+        # Капля пульсирует, поэтому её клетка (и прошлая клетка) меняется каждый кадр
+        if self.last_droplet_rect:
+            self.mark_dirty(self.last_droplet_rect)
+        self.last_droplet_rect = None
+
+        # Отрисовка капли с анимацией
+        if self.droplet_pos and self.is_visible(self.droplet_pos):
+            self.last_droplet_rect = self.cell_rect(self.droplet_pos).clip(self.board_clip())
+            self.mark_dirty(self.last_droplet_rect)
+            self.screen.set_clip(self.last_droplet_rect)
+            # Пульсирующая капля с градиентом и бликом
+            self.screen.blit(atlas.droplet(step), self.camera.cell_origin(self.droplet_pos))
+            self.screen.set_clip(None)
+
+        # Анимация победы
+        if self.droplet_pos and celebrating:
+            win_color = (int(GREEN[0]), int(GREEN[1]), int(GREEN[2]))
+
+            # Разделяем текст на две строки
+            win_text1 = self.text.render(self.win_font, "ПОБЕДА!", True, win_color)
+            win_text2 = self.text.render(self.win_font, "Нажмите ПРОБЕЛ для следующего уровня", True, win_color)
+
+            # Вычисляем общий размер для фона
+            text_width = max(win_text1.get_width(), win_text2.get_width()) + 40
+            text_height = win_text1.get_height() + win_text2.get_height() + 30
+
+            # Создаем общий прямоугольник для фона
+            background_rect = pygame.Rect(0, 0, text_width, text_height)
+            background_rect.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
+
+            # Фон надписи (общая рамка)
+            pygame.draw.rect(self.screen, (255, 255, 255, 200),
+                             background_rect, border_radius=15)
+            pygame.draw.rect(self.screen, win_color,
+                             background_rect, 3, border_radius=15)
+
+            # Располагаем текст внутри фона
+            text1_rect = win_text1.get_rect(center=(WINDOW_WIDTH // 2, background_rect.top + 25))
+            text2_rect = win_text2.get_rect(center=(WINDOW_WIDTH // 2, background_rect.top + 47))
+
+            self.screen.blit(win_text1, text1_rect)
+            self.screen.blit(win_text2, text2_rect)
+
+        # Частицы: хлопушки победы и искры тупика (место прошлого кадра тоже перерисовывается)
+        if self.last_particles_rect:
+            self.mark_dirty(self.last_particles_rect)
+        self.last_particles_rect = self.particles.draw(self.screen, self.camera.viewport)
+        if self.last_particles_rect:
+            self.mark_dirty(self.last_particles_rect)
+
+        # Анимация поражения
+        if self.game_over:
+            self.game_over_time += 1
+
+            # Пульсация надпись
+            pulse = (math.sin(2 * math.pi * self.alarm.value) + 1) * 0.3 + 0.7
+            game_over_color = (
+                min(255, int(RED[0] * pulse)),
+                min(255, int(RED[1] * pulse)),
+                min(255, int(RED[2] * pulse))
+            )
+
+            # Надпись рисуется один раз в постоянном цвете, пульсирует её прозрачность:
+            # пульсирующий цвет давал бы новый ключ кэша каждый кадр. Прозрачность
+            # меняется у копии, поверхность из кэша остаётся общей и неизменной
+            if self.game_over_text is None:
+                self.game_over_text = self.text.render(
+                    self.bold_font, "ТУПИК! Нажмите R для перезапуска", True, RED).copy()
+            game_over_text = self.game_over_text
+            game_over_text.set_alpha(int(255 * (pulse - 0.4) / 0.9))
+            text_rect = game_over_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+
+            # Фон надписи
+            pygame.draw.rect(self.screen, (255, 255, 255, 200),
+                             text_rect.inflate(30, 20),
+                             border_radius=15)
+            pygame.draw.rect(self.screen, game_over_color,
+                             text_rect.inflate(30, 20),
+                             3, border_radius=15)
+
+            self.screen.blit(game_over_text, text_rect)
+            self.mark_dirty(text_rect.inflate(30, 20))
+
+        self.present()
+
+    def draw_menu(self):
+        """Отрисовка главного меню"""
+        # Фон с градиентом
+        self.screen.blit(self.gradient_background(STATE_MENU), (0, 0))
+
+        # Заголовок
+        title_text = self.text.render(self.title_font, "ПУТЕШЕСТВИЕ КАПЛИ", True, DARK_BLUE)
+        self.screen.blit(title_text, (WINDOW_WIDTH // 2 - title_text.get_width() // 2, 50))
+
+        # Кнопки
+        button_width, button_height = 200, 50
+        button_x = WINDOW_WIDTH // 2 - button_width // 2
+
+        # Кнопка "Продолжить"
+        continue_button = pygame.Rect(button_x, 150, button_width, button_height)
+        pygame.draw.rect(self.screen, BLUE, continue_button, border_radius=15)
+        pygame.draw.rect(self.screen, DARK_BLUE, continue_button, 3, border_radius=15)
+        continue_text = self.text.render(self.font, "Продолжить", True, WHITE)
+        self.screen.blit(continue_text, (continue_button.centerx - continue_text.get_width() // 2,
+                                         continue_button.centery - continue_text.get_height() // 2))
+
+        # Кнопка "Выбор уровня"
+        level_select_button = pygame.Rect(button_x, 220, button_width, button_height)
+        pygame.draw.rect(self.screen, GREEN, level_select_button, border_radius=15)
+        pygame.draw.rect(self.screen, DARK_GREEN, level_select_button, 3, border_radius=15)
+        level_select_text = self.text.render(self.font, "Выбор уровня", True, WHITE)
+        self.screen.blit(level_select_text, (level_select_button.centerx - level_select_text.get_width() // 2,
+                                             level_select_button.centery - level_select_text.get_height() // 2))
+
+        # Кнопка "Выход"
+        exit_button = pygame.Rect(button_x, 290, button_width, button_height)
+        pygame.draw.rect(self.screen, RED, exit_button, border_radius=15)
+        pygame.draw.rect(self.screen, DARK_RED, exit_button, 3, border_radius=15)
+        exit_text = self.text.render(self.font, "Выход", True, WHITE)
+        self.screen.blit(exit_text, (exit_button.centerx - exit_text.get_width() // 2,
+                                     exit_button.centery - exit_text.get_height() // 2))
+
+        # Информация об управлении
+        controls_text1 = self.text.render(self.small_font, "Управление:",True, BLACK)
+        controls_text2 = self.text.render(self.small_font, "Стрелки - для движения",True, BLACK)
+        controls_text3 = self.text.render(self.small_font, "R - для перезапуска, H - подсказка",True, BLACK)
+        controls_text4 = self.text.render(self.small_font, "Z - отмена хода, Y - повтор, ESC - выход",True, BLACK)
+        controls_text5 = self.text.render(self.small_font, "Колесо, +/- и правая кнопка - масштаб и прокрутка", True, BLACK)
+        self.screen.blit(controls_text1, (WINDOW_WIDTH // 2 - controls_text1.get_width() // 2, 370))
+        self.screen.blit(controls_text2, (WINDOW_WIDTH // 2 - controls_text2.get_width() // 2, 390))
+        self.screen.blit(controls_text3, (WINDOW_WIDTH // 2 - controls_text3.get_width() // 2, 410))
+        self.screen.blit(controls_text4, (WINDOW_WIDTH // 2 - controls_text4.get_width() // 2, 430))
+        self.screen.blit(controls_text5, (WINDOW_WIDTH // 2 - controls_text5.get_width() // 2, 450))
+        self.present()
+
+    def draw_level_select(self):
+        """Отрисовка меню выбора уровня: только видимые плитки списка"""
+        # Фон с градиентом
+        self.screen.blit(self.gradient_background(STATE_LEVEL_SELECT), (0, 0))
+        self.mark_dirty(self.screen.get_rect())
+
+        # Заголовок и номер страницы
+        title_text = self.text.render(self.title_font, "ВЫБОР УРОВНЯ", True, DARK_GREEN)
+        self.screen.blit(title_text, (WINDOW_WIDTH // 2 - title_text.get_width() // 2, 20))
+        browser = self.browser
+        page_text = self.text.render(self.small_font, f"Страница {browser.page + 1} из {browser.pages}",
+                                     True, DARK_GREEN)
+        self.screen.blit(page_text, (WINDOW_WIDTH // 2 - page_text.get_width() // 2, 62))
+
+        # Плитки уровней: миниатюры приходят из фонового потока по мере готовности
+        self.thumbnails.collect()
+        visible = browser.visible()
+        self.thumbnails.want(visible)
+        colors = [BLUE, GREEN, ORANGE, PURPLE, RED, GOLD]
+        self.screen.set_clip(browser.view)
+        for i in visible:
+            level_button = browser.tile_rect(i)
+
+            # Разные цвета для разных уровней
+            color = colors[i % len(colors)]
+            dark_color = (max(0, color[0] - 40), max(0, color[1] - 40), max(0, color[2] - 40))
+            border = GOLD if i == self.current_level else dark_color
+
+            pygame.draw.rect(self.screen, color, level_button, border_radius=15)
+            pygame.draw.rect(self.screen, border, level_button, 3, border_radius=15)
+
+            thumbnail = self.thumbnails.get(i)
+            if thumbnail is not None:
+                self.screen.blit(thumbnail, thumbnail.get_rect(center=(level_button.centerx,
+                                                                      level_button.y + 8 + THUMB_SIZE // 2)))
+
+            level_text = self.text.render(self.small_font, str(i + 1), True, WHITE)
+            self.screen.blit(level_text, (level_button.centerx - level_text.get_width() // 2,
+                                          level_button.bottom - 6 - level_text.get_height()))
+        self.screen.set_clip(None)
+
+        # Кнопки страниц и возврата в меню
+        for rect, label, color in ((self.prev_page_button, "<", BLUE),
+                                   (self.back_button, "Назад", PURPLE),
+                                   (self.next_page_button, ">", BLUE)):
+            pygame.draw.rect(self.screen, color, rect, border_radius=10)
+            pygame.draw.rect(self.screen, DARK_BLUE, rect, 2, border_radius=10)
+            text = self.text.render(self.small_font, label, True, WHITE)
+            self.screen.blit(text, (rect.centerx - text.get_width() // 2,
+                                    rect.centery - text.get_height() // 2))
+
+        self.present()
+
+    def handle_menu_events(self, event):
+        """Обработка событий в меню"""
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            x, y = event.pos
+
+            # Координаты кнопок
+            button_width, button_height = 200, 50
+            button_x = WINDOW_WIDTH // 2 - button_width // 2
+
+            # Проверка нажатия на кнопки
+            if button_x <= x <= button_x + button_width:
+                if 150 <= y <= 150 + button_height:  # Продолжить
+                    self.game_state = STATE_PLAYING
+                elif 220 <= y <= 220 + button_height:  # Выбор уровня
+                    self.game_state = STATE_LEVEL_SELECT
+                    self.browser.show_index(self.current_level)
+                elif 290 <= y <= 290 + button_height:  # Выход
+                    return False
+
+        return True
+
+    def handle_level_select_events(self, event):
+        """Обработка ивентов в меню выбора уровня"""
+        browser = self.browser
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            # Кнопки "Назад" и страниц
+            if self.back_button.collidepoint(event.pos):
+                self.game_state = STATE_MENU
+                return True
+            if self.prev_page_button.collidepoint(event.pos):
+                browser.show_page(browser.page - 1)
+                return True
+            if self.next_page_button.collidepoint(event.pos):
+                browser.show_page(browser.page + 1)
+                return True
+
+            # Выбор уровня: плитка находится по координатам, без перебора списка
+            index = browser.index_at(event.pos)
+            if index is not None:
+                self.load_level(index)
+                self.game_state = STATE_PLAYING
+
+        elif event.type == pygame.MOUSEWHEEL:
+            browser.scroll(-event.y * browser.step // 2)
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                self.game_state = STATE_MENU
+            elif event.key == pygame.K_PAGEUP:
+                browser.show_page(browser.page - 1)
+            elif event.key == pygame.K_PAGEDOWN:
+                browser.show_page(browser.page + 1)
+            elif event.key == pygame.K_HOME:
+                browser.show_page(0)
+            elif event.key == pygame.K_END:
+                browser.show_page(browser.pages - 1)
+            elif event.key == pygame.K_UP:
+                browser.scroll(-browser.step)
+            elif event.key == pygame.K_DOWN:
+                browser.scroll(browser.step)
+
+        return True
+
+    def handle_playing_events(self, event):
+        """Обработка событий во время игры"""
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            # Проверка кнопки "В меню" (активна)
+
+            if (WINDOW_WIDTH - 110 <= event.pos[0] <= WINDOW_WIDTH - 10 and
+                INFO_HEIGHT - 40 <= event.pos[1] <= INFO_HEIGHT - 10):
+                self.game_state = STATE_MENU
+                return True
+
+            # Обработка клика по клетке если игра активна
+            if not self.droplet_pos and not self.is_animating and not self.game_over and not self.check_win():
+                cell = self.get_cell_from_mouse(event.pos)
+                if cell and self.state.start(cell):
+                    self.droplet_pos = cell
+                    self.hint = None
+                    self.replay = Replay(self.current_level, cell)
+
+        # Камера: колесо - масштаб у курсора, правая или средняя кнопка - прокрутка
+        elif event.type == pygame.MOUSEWHEEL:
+            if event.y:
+                self.camera.zoom(ZOOM_STEP ** event.y, pygame.mouse.get_pos())
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (2, 3):
+            self.panning = True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button in (2, 3):
+            self.panning = False
+        elif event.type == pygame.MOUSEMOTION and self.panning:
+            self.camera.pan(-event.rel[0], -event.rel[1])
+
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                self.game_state = STATE_MENU
+            elif event.key == pygame.K_r:  # Перезапуск уровня
+                self.load_level(self.current_level)
+            elif event.key == pygame.K_SPACE and self.check_win() and not self.is_animating:
+                self.load_level(self.current_level + 1)
+            elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                self.camera.zoom(ZOOM_STEP)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                self.camera.zoom(1 / ZOOM_STEP)
+            elif event.key == pygame.K_f:  # Всё поле целиком
+                self.camera.fit()
+            elif event.key == pygame.K_y or (event.key == pygame.K_z and event.mod & pygame.KMOD_SHIFT):
+                self.redo_move()
+            elif event.key in (pygame.K_z, pygame.K_BACKSPACE):
+                self.undo_move()
+            elif event.key == pygame.K_h and not self.is_animating and not self.check_win():
+                self.hint = self.query_hint()
+                if self.hint.status == HINT_START:
+                    self.camera.follow(self.hint.cell)
+            elif self.droplet_pos and not self.check_win() and not self.is_animating and not self.game_over:
+                if event.key == pygame.K_UP:
+                    self.move_droplet(UP)
+                elif event.key == pygame.K_DOWN:
+                    self.move_droplet(DOWN)
+                elif event.key == pygame.K_LEFT:
+                    self.move_droplet(LEFT)
+                elif event.key == pygame.K_RIGHT:
+                    self.move_droplet(RIGHT)
+
+        return True
+
+    def handle_events(self, first_event=None):
+        """Обработка событий (first_event - уже полученное ожиданием событие)"""
+        events = pygame.event.get()
+        if first_event is not None:
+            events.insert(0, first_event)
+        for event in events:
+            if event.type == pygame.QUIT:
+                return False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.set_hud(not self.hud)
+                continue
+
+            if self.game_state == STATE_MENU:
+                if not self.handle_menu_events(event):
+                    return False
+            elif self.game_state == STATE_LEVEL_SELECT:
+                if not self.handle_level_select_events(event):
+                    return False
+            elif self.game_state == STATE_PLAYING:
+                if not self.handle_playing_events(event):
+                    return False
+
+        # Проверка на поражение после обработки событий
+        if self.game_state == STATE_PLAYING and not self.game_over and not self.is_animating and self.droplet_pos and not self.check_win():
+            self.game_over = self.check_game_over()
+            if self.game_over:
+                self.game_over_time = 0
+                self.launch_sparks()
+
+        return True
+
+    def needs_full_rate(self):
+        """Нужна ли полная частота кадров: идёт ход, победа или тупик"""
+        if self.animator.active or self.particles.count:
+            return True
+        if self.hint and self.hint.status == HINT_PENDING:
+            return True
+        if self.game_state == STATE_LEVEL_SELECT and self.thumbnails.pending:
+            return True
+        return self.game_state == STATE_PLAYING and (self.game_over or
+                                                     (self.droplet_pos is not None and self.check_win()))
+
+    def wait_for_event(self):
+        """В режиме простоя блокирует цикл до события или таймаута"""
+        if not self.idle or self.needs_full_rate():
+            return None
+        event = pygame.event.wait(IDLE_TIMEOUT)
+        # Время ожидания - не время анимаций: иначе первый кадр после простоя
+        # продвинул бы начатый ход сразу на MAX_FRAME_TIME
+        self.clock.tick()
+        if event.type == pygame.NOEVENT:
+            return None
+        return event
+
+    def tick(self):
+        """Один проход главного цикла; False - пора выходить"""
+        profiler = self.profiler
+        profiler.begin()
+        event = self.wait_for_event()
+        profiler.mark("wait")
+        running = self.handle_events(event)
+        profiler.mark("events")
+
+        if self.game_state == STATE_PLAYING:
+            self.update_animation(self.frame_dt)
+            profiler.mark("update")
+            self.draw_board()
+        elif self.game_state == STATE_MENU:
+            self.draw_menu()
+        elif self.game_state == STATE_LEVEL_SELECT:
+            self.draw_level_select()
+
+        self.frame_dt = self.clock.tick(FPS) / 1000
+        profiler.mark("sleep")
+        profiler.end()
+        return running
+
+    def run(self):
+        """Главный игровой цикл"""
+        while self.tick():
+            pass
+
+        self.finish_replay()
+        self.profiler.close()
+        pygame.quit()
+        sys.exit()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Путешествие капли")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="выводить на экран только изменившиеся области")
+    parser.add_argument("--idle", action="store_true",
+                        help="экономия энергии: без анимаций не перерисовывать экран 60 раз в секунду")
+    parser.add_argument("--levels", metavar="FILE",
+                        help="набор уровней (.pack или JSON из generator.py) вместо встроенных")
+    parser.add_argument("--record", metavar="FILE",
+                        help="дописывать записи партий в файл (проверка: python replay.py FILE)")
+    parser.add_argument("--hud", action="store_true",
+                        help="сразу показать отладочную панель (переключается клавишей F3)")
+    parser.add_argument("--timings", metavar="FILE",
+                        help="писать время фаз каждого кадра в FILE (.csv или .jsonl)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    levels = load_levels(args.levels) if args.levels else None
+    game = DropletGame(dirty_rects=args.dirty_rects, idle=args.idle, levels=levels,
+                       record=args.record, hud=args.hud, timings=args.timings)
+    game.run()
@@ -0,0 +1,182 @@
+"""Частицы для хлопушек победы и искр тупика.
+
+Все частицы лежат в заранее выделенных массивах NumPy (позиция, скорость,
+оставшееся время жизни, цвет), обновляются и рисуются векторно, без
+объекта Python на частицу, поэтому тысячи частиц укладываются в кадр.
+
+Время жизни у всех частиц одно, поэтому в массивах они упорядочены по
+времени гибели: живые занимают отрезок [head, tail), старые умирают с
+начала, новые добавляются в конец. Когда конец упирается в ёмкость,
+живые частицы сдвигаются в начало массивов.
+"""
+
+import math
+
+import numpy as np
+import pygame
+
+CAPACITY = 8192
+LIFETIME = 1.2      # секунды
+GRAVITY = 700.0     # пикселей в секунду за секунду
+DRAG = 0.3          # доля скорости, остающаяся через секунду
+SIZE = 3            # сторона квадрата частицы в пикселях
+MIN_SPEED = 0.35    # доля скорости вылета, ниже которой частица не бывает
+
+
+class ParticleSystem:
+    """Пул частиц с общим временем жизни"""
+
+    def __init__(self, capacity=CAPACITY, lifetime=LIFETIME, gravity=GRAVITY, drag=DRAG,
+                 size=SIZE, seed=None):
+        self.capacity = capacity
+        self.lifetime = lifetime
+        self.gravity = gravity
+        self.drag = drag
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.vx = np.zeros(capacity, np.float32)
+        self.vy = np.zeros(capacity, np.float32)
+        self.life = np.zeros(capacity, np.float32)
+        self.color = np.zeros(capacity, np.uint32)  # цвет в формате пикселя экрана
+        self.head = 0
+        self.tail = 0
+        # Рабочие массивы, чтобы кадр не выделял память
+        self._scratch = np.zeros(capacity, np.float32)
+        self._ix = np.zeros(capacity, np.intp)
+        self._iy = np.zeros(capacity, np.intp)
+        self._visible = np.zeros(capacity, bool)
+        self._test = np.zeros(capacity, bool)
+        # Видимые частицы, выбранные для рисования
+        self._shown_x = np.zeros(capacity, np.float32)
+        self._shown_y = np.zeros(capacity, np.float32)
+        self._shown_color = np.zeros(capacity, np.uint32)
+
+    @property
+    def count(self):
+        """Число живых частиц"""
+        return self.tail - self.head
+
+    @staticmethod
+    def palette(surface, colors):
+        """Цвета в формате пикселей surface для emit"""
+        return np.array([surface.map_rgb(color) for color in colors], np.uint32)
+
+    def clear(self):
+        self.head = self.tail = 0
+
+    def _compact(self):
+        """Сдвиг живых частиц в начало массивов"""
+        head, tail = self.head, self.tail
+        count = tail - head
+        for array in (self.x, self.y, self.vx, self.vy, self.life, self.color):
+            array[:count] = array[head:tail]
+        self.head, self.tail = 0, count
+
+    def emit(self, count, x, y, speed, palette, angle=0.0, spread=2 * math.pi):
+        """Вспышка из count частиц в точке (x, y)
+
+        Направления равномерно лежат в секторе spread с серединой angle
+        (в радианах, 0 - вправо, -pi/2 - вверх), скорость - от MIN_SPEED * speed
+        до speed пикселей в секунду, цвет - случайный из palette.
+        """
+        if self.tail + count > self.capacity and self.head:
+            self._compact()
+        count = min(count, self.capacity - self.tail)
+        if count <= 0:
+            return 0
+        new = slice(self.tail, self.tail + count)
+        rng = self.rng
+        directions = self._scratch[:count]
+        rng.random(dtype=np.float32, out=directions)
+        directions *= spread
+        directions += angle - spread / 2
+        speeds = self.vy[new]
+        rng.random(dtype=np.float32, out=speeds)
+        speeds *= speed * (1 - MIN_SPEED)
+        speeds += speed * MIN_SPEED
+        np.cos(directions, out=self.vx[new])
+        self.vx[new] *= speeds
+        np.sin(directions, out=directions)
+        speeds *= directions  # vy = sin * скорость
+        # Цвета: случайные номера в палитре
+        rng.random(dtype=np.float32, out=directions)
+        directions *= len(palette)
+        np.copyto(self._ix[:count], directions, casting="unsafe")
+        np.take(palette, self._ix[:count], out=self.color[new], mode="clip")
+        self.x[new] = x
+        self.y[new] = y
+        self.life[new] = self.lifetime
+        self.tail += count
+        return count
+
+    def update(self, dt):
+        """Продвижение всех частиц на dt секунд"""
+        if self.head == self.tail:
+            return
+        live = slice(self.head, self.tail)
+        step = self._scratch[:self.tail - self.head]
+        decay = self.drag ** dt
+        vx, vy = self.vx[live], self.vy[live]
+        vx *= decay
+        vy *= decay
+        vy += self.gravity * dt
+        np.multiply(vx, dt, out=step)
+        self.x[live] += step
+        np.multiply(vy, dt, out=step)
+        self.y[live] += step
+        life = self.life[live]
+        life -= dt
+        # Время жизни не убывает от начала к концу: умершие - в начале отрезка
+        self.head += int(np.searchsorted(life, 0, side="right"))
+        if self.head == self.tail:
+            self.head = self.tail = 0
+
+    def draw(self, surface, rect):
+        """Частицы внутри rect на surface (32 бита на пиксель); грязный прямоугольник или None"""
+        count = self.tail - self.head
+        if not count:
+            return None
+        rect = pygame.Rect(rect)
+        size = self.size
+        live = slice(self.head, self.tail)
+        x, y = self.x[live], self.y[live]
+        ix, iy = self._ix[:count], self._iy[:count]
+        visible, test = self._visible[:count], self._test[:count]
+        right, bottom = rect.right - size, rect.bottom - size
+
+        # Частица видна, если её квадрат целиком внутри rect
+        np.greater_equal(x, rect.left, out=visible)
+        np.less_equal(x, right, out=test)
+        visible &= test
+        np.greater_equal(y, rect.top, out=test)
+        visible &= test
+        np.less_equal(y, bottom, out=test)
+        visible &= test
+        shown = int(np.count_nonzero(visible))
+        if not shown:
+            return None
+        color = self.color[live]
+        if shown < count:
+            # Видимые частицы выбираются в рабочие массивы
+            x = np.compress(visible, x, out=self._shown_x[:shown])
+            y = np.compress(visible, y, out=self._shown_y[:shown])
+            color = np.compress(visible, color, out=self._shown_color[:shown])
+            ix, iy = ix[:shown], iy[:shown]
+
+        np.copyto(ix, x, casting="unsafe")
+        np.copyto(iy, y, casting="unsafe")
+        pixels = pygame.surfarray.pixels2d(surface)
+        for _ in range(size):
+            for _ in range(size):
+                pixels[ix, iy] = color
+                iy += 1
+            iy -= size
+            ix += 1
+        del pixels
+
+        # Грязный прямоугольник: охват видимых частиц
+        left, top = int(x.min()), int(y.min())
+        right, bottom = int(x.max()) + size, int(y.max()) + size
+        return pygame.Rect(left, top, right - left, bottom - top)
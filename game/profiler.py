@@ -0,0 +1,174 @@
+"""Замер времени кадра по фазам главного цикла.
+
+FrameProfiler хранит скользящее окно последних кадров: время каждой фазы,
+полное время кадра и число вызовов pygame.draw. По окну считаются средние
+и процентили для отладочной панели. Покадровые значения можно потоком
+писать в CSV или JSONL через TimingLog (с буферизацией, чтобы запись на
+диск не попадала в каждый кадр).
+"""
+
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+# Фазы главного цикла в порядке выполнения
+PHASES = ("wait", "events", "update", "draw", "present", "sleep")
+
+# Функции pygame.draw, вызовы которых подсчитываются
+DRAW_FUNCTIONS = ("rect", "line", "lines", "circle", "ellipse", "polygon", "arc", "aaline", "aalines")
+
+
+class DrawCounter:
+    """Подсчёт вызовов pygame.draw; функции подменяются только пока счётчик включён"""
+
+    def __init__(self):
+        self.calls = 0
+        self._originals = {}
+
+    def _wrap(self, function):
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return function(*args, **kwargs)
+        return counted
+
+    def install(self):
+        if self._originals:
+            return
+        for name in DRAW_FUNCTIONS:
+            function = getattr(pygame.draw, name)
+            self._originals[name] = function
+            setattr(pygame.draw, name, self._wrap(function))
+
+    def uninstall(self):
+        for name, function in self._originals.items():
+            setattr(pygame.draw, name, function)
+        self._originals = {}
+
+    def take(self):
+        """Число вызовов с прошлого take()"""
+        calls, self.calls = self.calls, 0
+        return calls
+
+
+class TimingLog:
+    """Буферизованная запись покадровых замеров в CSV или JSONL (по расширению файла)"""
+
+    def __init__(self, path, fields, buffer_size=240):
+        self.path = path
+        self.fields = fields
+        self.buffer_size = buffer_size
+        self.rows = []
+        self.jsonl = path.endswith(".jsonl")
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        if not self.jsonl:
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(fields)
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.jsonl:
+            self.file.write("".join(json.dumps(dict(zip(self.fields, row))) + "\n" for row in self.rows))
+        else:
+            self.writer.writerows(self.rows)
+        self.file.flush()
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class FrameProfiler:
+    """Время фаз последних window кадров"""
+
+    def __init__(self, window=120, log_path=None):
+        self.window = window
+        self.frames = deque(maxlen=window)  # (полное время, время фаз, вызовы draw) в мс
+        self.draw = DrawCounter()
+        self.log = None
+        if log_path:
+            self.log = TimingLog(log_path, ("frame", "total_ms") + PHASES + ("draw_calls",))
+        self.frame = 0
+        self.enabled = False
+        self.set_enabled(self.log is not None)
+        self._started = 0.0
+        self._last = 0.0
+        self._phases = dict.fromkeys(PHASES, 0.0)
+
+    def set_enabled(self, enabled):
+        """Замер идёт, пока включена панель или запись в файл"""
+        enabled = enabled or self.log is not None
+        if enabled and not self.enabled:
+            self.draw.install()
+        elif not enabled and self.enabled:
+            self.draw.uninstall()
+            self.frames.clear()
+        self.enabled = enabled
+
+    def begin(self):
+        """Начало кадра"""
+        if not self.enabled:
+            return
+        self._started = self._last = time.perf_counter()
+        for phase in PHASES:
+            self._phases[phase] = 0.0
+
+    def mark(self, phase):
+        """Конец фазы phase: время с прошлой отметки относится к ней"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._phases[phase] += (now - self._last) * 1000
+        self._last = now
+
+    def end(self):
+        """Конец кадра"""
+        if not self.enabled:
+            return
+        total = (time.perf_counter() - self._started) * 1000
+        phases = tuple(self._phases[phase] for phase in PHASES)
+        calls = self.draw.take()
+        self.frames.append((total, phases, calls))
+        self.frame += 1
+        if self.log:
+            self.log.write((self.frame, round(total, 4)) + tuple(round(value, 4) for value in phases) + (calls,))
+
+    def averages(self):
+        """Среднее время каждой фазы по окну, мс"""
+        if not self.frames:
+            return dict.fromkeys(PHASES, 0.0)
+        count = len(self.frames)
+        sums = [0.0] * len(PHASES)
+        for _, phases, _ in self.frames:
+            for number, value in enumerate(phases):
+                sums[number] += value
+        return {phase: total / count for phase, total in zip(PHASES, sums)}
+
+    def percentiles(self, points=(50, 95, 99)):
+        """Процентили полного времени кадра по окну, мс"""
+        totals = sorted(total for total, _, _ in self.frames)
+        if not totals:
+            return dict.fromkeys(points, 0.0)
+        last = len(totals) - 1
+        return {point: totals[min(last, len(totals) * point // 100)] for point in points}
+
+    def draw_calls(self):
+        """Среднее число вызовов pygame.draw за кадр по окну"""
+        if not self.frames:
+            return 0.0
+        return sum(calls for _, _, calls in self.frames) / len(self.frames)
+
+    def close(self):
+        if self.log:
+            self.log.close()
+            self.log = None
+        self.set_enabled(False)
@@ -0,0 +1,229 @@
+"""Запись партий и пакетная проверка записей без графики.
+
+Запись партии - номер уровня, стартовая клетка, последовательность
+направлений (по 2 бита на ход) и заявленный итог с числом ходов. Файл
+записей - просто подряд идущие записи. Проверка заново проигрывает ходы
+прямо на масках Board и сверяет итог и число ходов.
+
+Пример:
+    python replay.py replays.bin --levels levels.pack
+    python replay.py --random 10000
+"""
+
+import argparse
+import random
+import struct
+import time
+
+from engine import Board, DIRECTIONS
+from levelpack import LevelPack
+from levels import LEVELS, load_levels
+
+# Итог партии
+RESULT_PLAYING = 0   # партия не закончена
+RESULT_WON = 1
+RESULT_DEAD_END = 2
+RESULT_INVALID = 3   # при проверке: недопустимый старт или ход
+
+RESULT_NAMES = ("playing", "won", "dead_end", "invalid")
+DIRECTION_NAMES = "UDLR"
+
+RECORD = struct.Struct("<IHHBII")  # уровень, старт (строка, столбец), итог, заявленные ходы, записанные ходы
+
+# Байт упакованных ходов -> четыре направления
+_UNPACK = [bytes((value >> shift) & 3 for shift in (0, 2, 4, 6)) for value in range(256)]
+
+
+def pack_directions(directions):
+    """Направления по 2 бита, первое - в младших битах первого байта"""
+    packed = 0
+    for number, direction in enumerate(directions):
+        packed |= direction << (2 * number)
+    return packed.to_bytes((len(directions) + 3) // 4, "little")
+
+
+def unpack_directions(data, count):
+    return bytearray(b"".join(_UNPACK[value] for value in data)[:count])
+
+
+class Replay:
+    """Запись одной партии"""
+
+    __slots__ = ("level", "start", "directions", "result", "moves")
+
+    def __init__(self, level, start, directions=(), result=RESULT_PLAYING, moves=None):
+        self.level = level
+        self.start = start                   # (row, col)
+        self.directions = bytearray(directions)
+        self.result = result                 # заявленный итог
+        self.moves = len(self.directions) if moves is None else moves  # заявленное число ходов
+
+    def record(self, direction):
+        """Добавление сделанного хода"""
+        self.directions.append(direction)
+        self.moves += 1
+
+    def undo(self):
+        """Удаление последнего хода (ход отменён в игре)"""
+        if self.directions:
+            self.directions.pop()
+            self.moves -= 1
+
+    def encode(self):
+        row, col = self.start
+        return (RECORD.pack(self.level, row, col, self.result, self.moves, len(self.directions)) +
+                pack_directions(self.directions))
+
+    @classmethod
+    def decode(cls, data, offset=0):
+        """Запись из data со смещения offset; возвращает (Replay, смещение следующей)
+
+        Обрезанная или испорченная запись - ValueError со смещением записи.
+        """
+        if len(data) - offset < RECORD.size:
+            raise ValueError(f"запись на смещении {offset}: обрезан заголовок "
+                             f"({len(data) - offset} из {RECORD.size} байт)")
+        level, row, col, result, moves, count = RECORD.unpack_from(data, offset)
+        if result >= len(RESULT_NAMES):
+            raise ValueError(f"запись на смещении {offset}: неизвестный итог {result}")
+        size = (count + 3) // 4
+        start = offset + RECORD.size
+        if len(data) - start < size:
+            raise ValueError(f"запись на смещении {offset}: обрезаны ходы "
+                             f"({len(data) - start} из {size} байт)")
+        directions = unpack_directions(data[start:start + size], count)
+        return cls(level, (row, col), directions, result, moves), start + size
+
+    def __repr__(self):
+        path = "".join(DIRECTION_NAMES[d] for d in self.directions)
+        return (f"Replay(level={self.level}, start={self.start}, path={path}, "
+                f"result={RESULT_NAMES[self.result]})")
+
+
+def save_replay(path, replay):
+    """Дописывание записи в конец файла"""
+    with open(path, "ab") as file:
+        file.write(replay.encode())
+
+
+def read_replays(path):
+    """Все записи из файла"""
+    with open(path, "rb") as file:
+        data = file.read()
+    offset = 0
+    while offset < len(data):
+        try:
+            replay, offset = Replay.decode(data, offset)
+        except ValueError as error:
+            raise ValueError(f"{path}: {error}") from None
+        yield replay
+
+
+def play(board, start, directions):
+    """Проигрывание ходов на поле: (итог, число выполненных ходов)"""
+    if not board.is_free(start):
+        return RESULT_INVALID, 0
+    pos = board.index(start)
+    blocked = board.obstacles | (1 << pos)
+    slide = board.slide
+    for number, direction in enumerate(directions):
+        if direction not in DIRECTIONS:
+            return RESULT_INVALID, number
+        pos, mask = slide(pos, blocked, direction)
+        if not mask:
+            return RESULT_INVALID, number
+        blocked |= mask
+    if blocked == board.full:
+        return RESULT_WON, len(directions)
+    if board.is_stuck(pos, blocked):
+        return RESULT_DEAD_END, len(directions)
+    return RESULT_PLAYING, len(directions)
+
+
+def verify(board, replay):
+    """Совпадают ли заявленные итог и число ходов с проигранными заново"""
+    result, moves = play(board, replay.start, replay.directions)
+    return result == replay.result and moves == replay.moves
+
+
+class ReplayChecker:
+    """Пакетная проверка записей; поля уровней создаются один раз на уровень"""
+
+    def __init__(self, levels):
+        self.levels = levels
+        self.boards = {}
+        self.checked = 0
+        self.failed = []  # записи, не прошедшие проверку
+
+    def board(self, level):
+        board = self.boards.get(level)
+        if board is None:
+            if isinstance(self.levels, LevelPack):
+                board = self.levels.load_level(level)
+            else:
+                board = Board.from_grid(self.levels[level])
+            self.boards[level] = board
+        return board
+
+    def check(self, replay):
+        self.checked += 1
+        ok = 0 <= replay.level < len(self.levels) and verify(self.board(replay.level), replay)
+        if not ok:
+            self.failed.append(replay)
+        return ok
+
+    def check_all(self, replays):
+        for replay in replays:
+            self.check(replay)
+        return not self.failed
+
+
+def random_replay(board, level, rng, limit=None):
+    """Случайная партия до победы или тупика (для проверки и замеров)"""
+    start = rng.choice(list(board.cells(board.free)))
+    replay = Replay(level, start)
+    pos = board.index(start)
+    blocked = board.obstacles | (1 << pos)
+    while limit is None or replay.moves < limit:
+        options = board.successors(pos, blocked)
+        if not options:
+            break
+        direction, pos, mask = rng.choice(options)
+        blocked |= mask
+        replay.record(direction)
+    replay.result = play(board, start, replay.directions)[0]
+    return replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетная проверка записей партий")
+    parser.add_argument("replays", nargs="?", help="файл записей")
+    parser.add_argument("--levels", help="набор уровней (.pack или JSON), по умолчанию встроенные")
+    parser.add_argument("--random", type=int, default=0,
+                        help="проверить столько случайных партий по уровням набора")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    levels = load_levels(args.levels) if args.levels else LEVELS
+    checker = ReplayChecker(levels)
+
+    if args.replays:
+        replays = list(read_replays(args.replays))
+    else:
+        rng = random.Random(args.seed)
+        replays = [random_replay(checker.board(number % len(levels)), number % len(levels), rng)
+                   for number in range(args.random)]
+
+    started = time.perf_counter()
+    checker.check_all(replays)
+    elapsed = time.perf_counter() - started
+
+    rate = checker.checked / elapsed if elapsed else 0
+    print(f"Проверено {checker.checked} записей за {elapsed:.3f} с ({rate:.0f} записей/с), "
+          f"расхождений {len(checker.failed)}")
+    for replay in checker.failed[:10]:
+        print("  ", replay)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""Сервер партий: много независимых партий в одном процессе.
+
+Клиенты подключаются по TCP или через Unix-сокет и обмениваются строками
+JSON: одна строка запроса - одна строка ответа. Партия не привязана к
+соединению: номер партии, полученный в ответ на start, годится в любом
+соединении, поэтому один клиент может вести тысячи партий, а партия
+переживает переподключение.
+
+Партия в памяти - номер уровня, стартовая клетка, позиция капли, маска
+посещённых клеток и сделанные ходы по байту на ход. Отмена хода заново
+проигрывает оставшиеся ходы от старта: поля маленькие, а снимки для отмены
+заняли бы больше памяти, чем все остальные данные партии. Объект партии без
+ходов с маской занимает около сотни байт, вместе с номером партии и местом в
+словаре партий - 150-200 байт (это и считает stats). Резидентная память
+процесса растёт сильнее из-за распределителя памяти и буферов соединений: в
+замерах loadtest на 20 000 партий и больше - от 200 до 650 байт на партию.
+
+Команды (поле id запроса, если оно есть, повторяется в ответе):
+    {"cmd": "start", "level": 0, "cell": [0, 0]}   новая партия; без cell старт случайный
+    {"cmd": "move", "session": 1, "direction": "D"}  ход (U, D, L, R или 0-3)
+    {"cmd": "undo", "session": 1}
+    {"cmd": "state", "session": 1}
+    {"cmd": "close", "session": 1}
+    {"cmd": "stats"}
+
+Ответ - {"ok": true, ...} с состоянием партии (level, cell, moves, visited,
+free, won, dead_end); на move ещё moved и path - клетки скольжения. Ошибка -
+{"ok": false, "error": "..."}.
+
+Пример:
+    python server.py --port 7777 --levels levels.pack
+    python server.py --unix /tmp/droplet.sock
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+
+from engine import Board, DIRECTIONS
+from levelpack import LevelPack
+from levels import LEVELS, load_levels
+from replay import DIRECTION_NAMES
+
+MAX_SESSIONS = 1_000_000
+MAX_LINE = 64 * 1024  # длина строки запроса в байтах
+
+
+class RequestError(Exception):
+    """Ошибка в запросе клиента; текст уходит клиенту"""
+
+
+def encode(response):
+    """Ответ -> строка JSON с переводом строки"""
+    return (json.dumps(response, ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+
+
+class Session:
+    """Одна партия"""
+
+    __slots__ = ("level", "start", "pos", "visited", "directions")
+
+    def __init__(self, level, start):
+        self.level = level
+        self.start = start          # номер бита стартовой клетки
+        self.pos = start
+        self.visited = 1 << start
+        # По байту на ход. Пока ходов нет, это общая для всех партий пустая строка
+        # байтов; свой bytearray появляется с первым ходом
+        self.directions = b""
+
+
+class GameServer:
+    """Партии и разбор команд; сетевая часть - в serve_connection"""
+
+    def __init__(self, levels=None, max_sessions=MAX_SESSIONS, seed=None):
+        self.levels = levels or LEVELS
+        self.max_sessions = max_sessions
+        self.boards = {}
+        self.sessions = {}
+        self.next_session = 1
+        self.rng = random.Random(seed)
+        self.connections = 0
+        self.requests = 0
+        self.commands = {"start": self.start, "move": self.move, "undo": self.undo,
+                         "state": self.state, "close": self.close, "stats": self.stats}
+
+    def board(self, level):
+        board = self.boards.get(level)
+        if board is None:
+            if isinstance(self.levels, LevelPack):
+                board = self.levels.load_level(level)
+            else:
+                board = Board.from_grid(self.levels[level])
+            self.boards[level] = board
+        return board
+
+    def handle(self, request):
+        """Ответ на разобранный запрос (словарь)"""
+        self.requests += 1
+        try:
+            if not isinstance(request, dict):
+                raise RequestError("запрос должен быть объектом JSON")
+            name = request.get("cmd")
+            command = self.commands.get(name) if isinstance(name, str) else None
+            if command is None:
+                raise RequestError(f"неизвестная команда {name!r}")
+            response = command(request)
+            response["ok"] = True
+        except RequestError as error:
+            response = {"ok": False, "error": str(error)}
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    def handle_line(self, line):
+        """Строка запроса -> строка ответа (с переводом строки)"""
+        try:
+            request = json.loads(line)
+        except ValueError:
+            self.requests += 1
+            response = {"ok": False, "error": "строка не является JSON"}
+        else:
+            response = self.handle(request)
+        return encode(response)
+
+    # Команды
+
+    def _session(self, request):
+        number = request.get("session")
+        valid = isinstance(number, int) and not isinstance(number, bool)
+        session = self.sessions.get(number) if valid else None
+        if session is None:
+            raise RequestError(f"нет партии {request.get('session')!r}")
+        return session
+
+    def _describe(self, session):
+        board = self.board(session.level)
+        won = session.visited == board.free
+        return {"level": session.level, "cell": board.cell(session.pos),
+                "moves": len(session.directions), "visited": session.visited.bit_count(),
+                "free": board.free_count, "won": won,
+                "dead_end": not won and board.is_stuck(session.pos, board.obstacles | session.visited)}
+
+    def start(self, request):
+        level = request.get("level", 0)
+        if not isinstance(level, int) or isinstance(level, bool) or not 0 <= level < len(self.levels):
+            raise RequestError(f"нет уровня {level!r}")
+        if len(self.sessions) >= self.max_sessions:
+            raise RequestError("слишком много партий")
+        board = self.board(level)
+        cell = request.get("cell")
+        if cell is None:
+            if not board.free_count:
+                raise RequestError(f"на уровне {level} нет свободных клеток")
+            cell = self.rng.choice(list(board.cells(board.free)))
+        if (not isinstance(cell, (list, tuple)) or len(cell) != 2 or
+                not all(isinstance(value, int) and not isinstance(value, bool) for value in cell) or
+                not board.is_free(cell)):
+            raise RequestError(f"клетка {cell!r} занята или вне поля")
+        session = Session(level, board.index(cell))
+        number = self.next_session
+        self.next_session += 1
+        self.sessions[number] = session
+        response = self._describe(session)
+        response["session"] = number
+        return response
+
+    def move(self, request):
+        session = self._session(request)
+        direction = request.get("direction")
+        if isinstance(direction, str) and len(direction) == 1 and direction in DIRECTION_NAMES:
+            direction = DIRECTION_NAMES.index(direction)
+        if not isinstance(direction, int) or isinstance(direction, bool) or direction not in DIRECTIONS:
+            raise RequestError(f"неизвестное направление {request.get('direction')!r}")
+        board = self.board(session.level)
+        start = session.pos
+        end, mask = board.slide(start, board.obstacles | session.visited, direction)
+        if mask:
+            session.pos = end
+            session.visited |= mask
+            if not session.directions:
+                session.directions = bytearray()
+            session.directions.append(direction)
+        response = self._describe(session)
+        response["moved"] = bool(mask)
+        response["path"] = board.path_cells(start, mask, direction) if mask else []
+        return response
+
+    def undo(self, request):
+        session = self._session(request)
+        undone = bool(session.directions)
+        if undone:
+            del session.directions[-1]
+            board = self.board(session.level)
+            pos, blocked = session.start, board.obstacles | (1 << session.start)
+            for direction in session.directions:
+                pos, mask = board.slide(pos, blocked, direction)
+                blocked |= mask
+            session.pos = pos
+            session.visited = blocked & ~board.obstacles
+        response = self._describe(session)
+        response["undone"] = undone
+        return response
+
+    def state(self, request):
+        return self._describe(self._session(request))
+
+    def close(self, request):
+        session = self._session(request)
+        del self.sessions[request["session"]]
+        return {"moves": len(session.directions)}
+
+    def stats(self, request):
+        return {"levels": len(self.levels), "sessions": len(self.sessions), "connections": self.connections,
+                "requests": self.requests, "session_bytes": self.session_bytes()}
+
+    def session_bytes(self):
+        """Примерный объём памяти партий (словарь партий, номера, объекты партий, маски и ходы), байт"""
+        total = sys.getsizeof(self.sessions)
+        for number, session in self.sessions.items():
+            total += sys.getsizeof(number) + sys.getsizeof(session) + sys.getsizeof(session.visited)
+            if session.directions:
+                total += sys.getsizeof(session.directions)
+        return total
+
+    # Сеть
+
+    async def serve_connection(self, reader, writer):
+        """Обработка одного соединения: строка запроса -> строка ответа"""
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Строка длиннее MAX_LINE: продолжать разбор потока нельзя
+                    writer.write(encode({"ok": False, "error": "слишком длинная строка"}))
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    writer.write(self.handle_line(line))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def listen(self, host="127.0.0.1", port=7777, unix=None):
+        """Запуск приёма соединений; возвращает asyncio.Server"""
+        if unix:
+            return await asyncio.start_unix_server(self.serve_connection, unix, limit=MAX_LINE)
+        return await asyncio.start_server(self.serve_connection, host, port, limit=MAX_LINE)
+
+
+async def serve(server, host, port, unix):
+    listener = await server.listen(host, port, unix)
+    where = unix or ", ".join(str(sock.getsockname()) for sock in listener.sockets)
+    print(f"Сервер партий: {where}, уровней {len(server.levels)}", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер партий по протоколу строк JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--unix", metavar="PATH", help="слушать Unix-сокет вместо TCP")
+    parser.add_argument("--levels", help="набор уровней (.pack или JSON), по умолчанию встроенные")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    levels = load_levels(args.levels) if args.levels else LEVELS
+    server = GameServer(levels, args.max_sessions, args.seed)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
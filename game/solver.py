@@ -0,0 +1,196 @@
+"""Точный решатель уровней: перебор ходов с таблицей уже разобранных состояний.
+
+Состояние - позиция капли и маска посещённых клеток. Для каждого состояния
+запоминается минимальное число ходов до победы, поэтому таблица общая для всех
+стартовых клеток уровня.
+"""
+
+import math
+import time
+
+from engine import Board, iter_bits
+from symmetry import Symmetry
+
+# Число ходов для состояния, из которого победить нельзя
+UNSOLVABLE = 1 << 30
+
+DIRECTION_NAMES = "UDLR"
+
+
+class StateLimit(Exception):
+    """Таблица состояний выросла больше предела (max_states решателя или разбора в analyze)"""
+
+
+class StartResult:
+    """Результат для одной стартовой клетки"""
+
+    __slots__ = ("cell", "moves", "path")
+
+    def __init__(self, cell, moves, path):
+        self.cell = cell
+        self.moves = moves  # минимальное число ходов или None
+        self.path = path    # список направлений оптимального решения или None
+
+    @property
+    def solvable(self):
+        return self.moves is not None
+
+    def __repr__(self):
+        if not self.solvable:
+            return f"StartResult({self.cell}, unsolvable)"
+        names = "".join(DIRECTION_NAMES[d] for d in self.path)
+        return f"StartResult({self.cell}, moves={self.moves}, path={names})"
+
+
+class Solver:
+    """Решатель одного уровня"""
+
+    def __init__(self, board, symmetric=True):
+        self.board = board
+        self.table = {}
+        self.lost = set()  # состояния без победы, найденные can_win
+        # Предел размера table: remaining бросает StateLimit, когда он превышен.
+        # Записи таблицы при этом остаются верными, и расчёт можно продолжить
+        self.max_states = math.inf
+        self._shift = board.size.bit_length()
+
+        # Если уровень переходит в себя при поворотах или отражениях,
+        # симметричные состояния хранятся в таблицах под одним ключом
+        self._symmetry = Symmetry.for_board(board)
+        self._transforms = []
+        if symmetric:
+            self._transforms = self._symmetry.stabilizer(board.obstacles)[1:]
+
+    def key(self, pos, visited):
+        """Ключ состояния в таблицах решателя"""
+        if self._transforms:
+            return self._symmetry.state_key(visited, pos, self._transforms)
+        return (visited << self._shift) | pos
+
+    def remaining(self, pos, visited):
+        """Минимальное число ходов до победы из состояния (UNSOLVABLE, если победы нет)"""
+        board = self.board
+        free = board.free
+        table = self.table
+        shift = self._shift
+        key_of = self.key if self._transforms else None
+        successors = board.successors
+        is_lost = board.is_lost
+        obstacles = board.obstacles
+
+        def search(pos, visited):
+            if visited == free:
+                return 0
+            key = key_of(pos, visited) if key_of else (visited << shift) | pos
+            best = table.get(key)
+            if best is not None:
+                return best
+            best = UNSOLVABLE
+            if not is_lost(pos, visited):
+                for _, end, mask in successors(pos, obstacles | visited):
+                    moves = search(end, visited | mask) + 1
+                    if moves < best:
+                        best = moves
+            table[key] = best
+            if len(table) > self.max_states:
+                raise StateLimit
+            return best
+
+        return search(pos, visited)
+
+    def can_win(self, pos, visited):
+        """Есть ли победа из состояния; поиск останавливается на первом решении"""
+        board = self.board
+        free = board.free
+        lost = self.lost
+        shift = self._shift
+        key_of = self.key if self._transforms else None
+        successors = board.successors
+        is_lost = board.is_lost
+        obstacles = board.obstacles
+
+        def search(pos, visited):
+            if visited == free:
+                return True
+            key = key_of(pos, visited) if key_of else (visited << shift) | pos
+            if key in lost:
+                return False
+            if is_lost(pos, visited):
+                lost.add(key)
+                return False
+            for _, end, mask in successors(pos, obstacles | visited):
+                if search(end, visited | mask):
+                    return True
+            lost.add(key)
+            return False
+
+        return search(pos, visited)
+
+    def best_path(self, pos, visited):
+        """Одна из оптимальных последовательностей ходов из состояния или None"""
+        total = self.remaining(pos, visited)
+        if total >= UNSOLVABLE:
+            return None
+        board = self.board
+        path = []
+        while visited != board.free:
+            for direction, end, mask in board.successors(pos, board.obstacles | visited):
+                if self.remaining(end, visited | mask) == total - len(path) - 1:
+                    path.append(direction)
+                    pos, visited = end, visited | mask
+                    break
+        return path
+
+    def solve_from(self, cell):
+        """Решение для стартовой клетки cell"""
+        pos = self.board.index(cell)
+        visited = 1 << pos
+        moves = self.remaining(pos, visited)
+        if moves >= UNSOLVABLE:
+            return StartResult(cell, None, None)
+        return StartResult(cell, moves, self.best_path(pos, visited))
+
+    def solve(self):
+        """Результаты для всех свободных клеток: словарь cell -> StartResult"""
+        return {cell: self.solve_from(cell) for cell in self.board.cells(self.board.free)}
+
+
+def solve_level(grid):
+    """Решение уровня, заданного списком строк"""
+    return Solver(Board.from_grid(grid)).solve()
+
+
+def start_candidates(board):
+    """Стартовые клетки, которые не отбрасываются простыми проверками связности"""
+    free = board.free
+    if free.bit_count() <= 1:
+        return free
+    lowest = free & -free
+    if board.flood(lowest, free) != free:
+        return 0
+    ends = board.dead_ends(free)
+    count = ends.bit_count()
+    if count > 2:
+        return 0
+    if count == 2:
+        return ends
+    return free
+
+
+def is_solvable(board):
+    """Есть ли у уровня хотя бы одна выигрышная стартовая клетка"""
+    solver = Solver(board)
+    return any(solver.can_win(pos, 1 << pos) for pos in iter_bits(start_candidates(board)))
+
+
+if __name__ == "__main__":
+    from levels import LEVELS
+
+    for number, grid in enumerate(LEVELS, 1):
+        started = time.perf_counter()
+        results = solve_level(grid)
+        elapsed = (time.perf_counter() - started) * 1000
+        solvable = [r for r in results.values() if r.solvable]
+        best = min((r.moves for r in solvable), default=None)
+        print(f"Уровень {number}: решаемых стартов {len(solvable)}/{len(results)}, "
+              f"минимум ходов {best}, {elapsed:.1f} мс")
@@ -0,0 +1,152 @@
+"""Заранее отрисованные спрайты капли, следа и закрашивания.
+
+Капля, волна победы и закрашивание клетки анимируются пульсацией. Вместо
+того чтобы каждый кадр рисовать их кругами и прямоугольниками, SpriteAtlas
+один раз на размер клетки рисует их для PULSE_STEPS фаз пульсации (и
+FILL_STEPS стадий закрашивания), а кадр выбирает готовый спрайт и выводит
+его одним blit. Атласы хранятся в SpriteCache по размеру клетки, поэтому
+при смене масштаба камеры или размера поля берётся атлас нужного размера.
+"""
+
+import math
+from collections import OrderedDict
+
+import pygame
+
+# Число фаз пульсации за период и стадий закрашивания клетки
+PULSE_STEPS = 32
+FILL_STEPS = 8
+# Сдвиг фазы волны победы между соседними клетками (в шагах фазы)
+WAVE_SHIFT = 0.5 / (2 * math.pi) * PULSE_STEPS
+# Сколько атласов разных размеров хранится одновременно
+ATLAS_CAPACITY = 4
+
+TRANSPARENT = (255, 0, 255)
+
+
+def pulse_step(value):
+    """Номер фазы пульсации для доли периода value из [0, 1)"""
+    return int(value * PULSE_STEPS) % PULSE_STEPS
+
+
+def fill_step(progress):
+    """Стадия закрашивания: 0 - клетка пуста, FILL_STEPS - закрашена полностью"""
+    return min(FILL_STEPS, int(progress * FILL_STEPS + 0.5))
+
+
+def _phase(step):
+    return 2 * math.pi * step / PULSE_STEPS
+
+
+def _convert(surface):
+    """Перевод в формат экрана, если окно уже создано: так blit быстрее"""
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert()
+
+
+class SpriteAtlas:
+    """Все кадры анимаций клетки одного размера"""
+
+    def __init__(self, cell_size, trail_color, wave_color, droplet_color):
+        self.cell_size = cell_size
+        self.inner = max(1, cell_size - 4)
+        self.trail = self._square(self.inner, trail_color)
+        self.waves = [self._wave(step, trail_color, wave_color) for step in range(PULSE_STEPS)]
+        self.droplets = [self._droplet(step, droplet_color) for step in range(PULSE_STEPS)]
+        self.fills = self._fills(trail_color)
+
+    @staticmethod
+    def _square(size, color):
+        surface = pygame.Surface((size, size))
+        surface.fill(color)
+        return _convert(surface)
+
+    def _wave(self, step, trail_color, wave_color):
+        """Клетка следа с квадратом волны победы"""
+        inner = self.inner
+        surface = pygame.Surface((inner, inner))
+        surface.fill(trail_color)
+        wave = math.sin(_phase(step)) * 0.3 + 0.7
+        size = int(inner * wave)
+        offset = (inner - size) // 2
+        surface.fill(wave_color, (offset, offset, size, size))
+        return _convert(surface)
+
+    def _droplet(self, step, color):
+        """Капля с градиентом и бликом во всю клетку; фон прозрачный"""
+        cell_size = self.cell_size
+        surface = pygame.Surface((cell_size, cell_size))
+        surface.fill(TRANSPARENT)
+        center = cell_size // 2
+        pulse = math.sin(_phase(step)) * 0.1 + 0.9
+        radius = max(1, int(cell_size // 3 * pulse))
+        for i in range(radius, 0, -2):
+            shade = (int(color[0] * (i / radius)),
+                     int(color[1] * (i / radius)),
+                     int(color[2] * (i / radius)))
+            pygame.draw.circle(surface, shade, (center, center), i)
+        pygame.draw.circle(surface, (255, 255, 255),
+                           (center - radius // 3, center - radius // 3), radius // 4)
+        surface = _convert(surface)
+        surface.set_colorkey(TRANSPARENT, pygame.RLEACCEL)
+        return surface
+
+    def _fills(self, color):
+        """fills[стадия][фаза] = (квадрат закрашивания, его сдвиг внутри клетки)
+
+        Квадраты одного размера на одной стадии не дублируются.
+        """
+        inner = self.inner
+        fills = [[None] * PULSE_STEPS]
+        for stage in range(1, FILL_STEPS):
+            progress = stage / FILL_STEPS
+            shade = tuple(int(channel * progress) for channel in color)
+            base_size = int(inner * progress)
+            squares = {}
+            frames = []
+            for step in range(PULSE_STEPS):
+                size = int(base_size * (math.sin(_phase(step)) * 0.1 + 1.0))
+                if size <= 0:
+                    frames.append(None)
+                    continue
+                if size not in squares:
+                    squares[size] = self._square(size, shade)
+                frames.append((squares[size], (inner - size) // 2))
+            fills.append(frames)
+        return fills
+
+    def droplet(self, step):
+        return self.droplets[step]
+
+    def wave(self, step):
+        return self.waves[step]
+
+    def fill(self, stage, step):
+        """Кадр закрашивания или None, если рисовать нечего; стадия FILL_STEPS - след"""
+        if stage >= FILL_STEPS:
+            return self.trail, 0
+        return self.fills[stage][step]
+
+
+class SpriteCache:
+    """Атласы по размеру клетки; давно не использованные вытесняются"""
+
+    def __init__(self, trail_color, wave_color, droplet_color, capacity=ATLAS_CAPACITY):
+        self.colors = (trail_color, wave_color, droplet_color)
+        self.capacity = capacity
+        self.atlases = OrderedDict()
+
+    def atlas(self, cell_size):
+        atlas = self.atlases.get(cell_size)
+        if atlas is not None:
+            self.atlases.move_to_end(cell_size)
+            return atlas
+        atlas = SpriteAtlas(cell_size, *self.colors)
+        self.atlases[cell_size] = atlas
+        if len(self.atlases) > self.capacity:
+            self.atlases.popitem(last=False)
+        return atlas
+
+    def clear(self):
+        self.atlases.clear()
@@ -0,0 +1,137 @@
+"""Канонизация уровней и состояний относительно поворотов и отражений поля.
+
+Квадратное поле играется одинаково во всех восьми положениях группы
+симметрий квадрата (четыре поворота и четыре отражения). Для прямоугольного
+поля остаются четыре преобразования, сохраняющие размеры. Канонической формой
+считается минимальная маска среди всех образов.
+"""
+
+from engine import TABLE_LIMIT, iter_bits
+
+# Преобразования клетки (row, col) поля высоты h и ширины w
+TRANSFORMS = (
+    lambda r, c, h, w: (r, c),                  # тождественное
+    lambda r, c, h, w: (c, h - 1 - r),          # поворот на 90
+    lambda r, c, h, w: (h - 1 - r, w - 1 - c),  # поворот на 180
+    lambda r, c, h, w: (w - 1 - c, r),          # поворот на 270
+    lambda r, c, h, w: (r, w - 1 - c),          # отражение слева направо
+    lambda r, c, h, w: (h - 1 - r, c),          # отражение сверху вниз
+    lambda r, c, h, w: (c, r),                  # транспонирование
+    lambda r, c, h, w: (w - 1 - c, h - 1 - r),  # побочная диагональ
+)
+
+# Преобразования, не меняющие размеров прямоугольного поля
+RECTANGLE_TRANSFORMS = (0, 2, 4, 5)
+
+# Ширина блока битов для таблиц преобразования масок
+CHUNK = 8
+CHUNK_MASK = (1 << CHUNK) - 1
+
+
+class Symmetry:
+    """Преобразования масок для поля фиксированного размера"""
+
+    _cache = {}
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = width * height
+        ids = range(len(TRANSFORMS)) if width == height else RECTANGLE_TRANSFORMS
+        # Для каждого преобразования: номер бита -> номер бита образа
+        self.permutations = []
+        for transform in ids:
+            function = TRANSFORMS[transform]
+            permutation = []
+            for index in range(self.size):
+                row, col = function(*divmod(index, width), height, width)
+                permutation.append(row * width + col)
+            self.permutations.append(permutation)
+
+        # Таблицы по блокам из CHUNK битов: образ маски собирается из size / CHUNK поисков
+        self._tables = None
+        if self.size <= TABLE_LIMIT:
+            self._tables = [self._chunk_tables(permutation) for permutation in self.permutations[1:]]
+
+    @classmethod
+    def for_size(cls, width, height):
+        """Общий экземпляр для размеров поля"""
+        key = (width, height)
+        symmetry = cls._cache.get(key)
+        if symmetry is None:
+            symmetry = cls._cache[key] = cls(width, height)
+        return symmetry
+
+    @classmethod
+    def for_board(cls, board):
+        return cls.for_size(board.width, board.height)
+
+    def _chunk_tables(self, permutation):
+        tables = []
+        for start in range(0, self.size, CHUNK):
+            bits = permutation[start:start + CHUNK]
+            table = [0] * (1 << len(bits))
+            for value in range(1, len(table)):
+                low = value & -value
+                table[value] = table[value ^ low] | (1 << bits[low.bit_length() - 1])
+            tables.append(table)
+        return tables
+
+    def apply(self, transform, mask):
+        """Образ маски при преобразовании с номером transform (в self.permutations)"""
+        if transform == 0:
+            return mask
+        if self._tables is not None:
+            result = 0
+            for table in self._tables[transform - 1]:
+                result |= table[mask & CHUNK_MASK]
+                mask >>= CHUNK
+            return result
+        permutation = self.permutations[transform]
+        result = 0
+        for index in iter_bits(mask):
+            result |= 1 << permutation[index]
+        return result
+
+    def images(self, mask):
+        """Образы маски при всех преобразованиях"""
+        return [self.apply(transform, mask) for transform in range(len(self.permutations))]
+
+    def canonical(self, mask):
+        """Каноническая маска и номер преобразования, переводящего в неё исходную"""
+        best, best_transform = mask, 0
+        for transform in range(1, len(self.permutations)):
+            image = self.apply(transform, mask)
+            if image < best:
+                best, best_transform = image, transform
+        return best, best_transform
+
+    def stabilizer(self, mask):
+        """Преобразования, оставляющие маску на месте (тождественное всегда первое)"""
+        return [transform for transform in range(len(self.permutations))
+                if self.apply(transform, mask) == mask]
+
+    def state_key(self, visited, pos, transforms):
+        """Канонический ключ состояния (visited, pos) относительно transforms.
+
+        transforms должны сохранять препятствия уровня (см. stabilizer), иначе
+        склеятся состояния разных уровней.
+        """
+        shift = self.size.bit_length()
+        best = (visited << shift) | pos
+        for transform in transforms:
+            if transform:
+                key = (self.apply(transform, visited) << shift) | self.permutations[transform][pos]
+                if key < best:
+                    best = key
+        return best
+
+
+def canonical_obstacles(board):
+    """Каноническая маска препятствий уровня"""
+    return Symmetry.for_board(board).canonical(board.obstacles)[0]
+
+
+def board_key(board):
+    """Хеш-ключ уровня, одинаковый для всех его поворотов и отражений"""
+    return board.width, board.height, canonical_obstacles(board)
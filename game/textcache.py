@@ -0,0 +1,49 @@
+"""Кэш отрисованных надписей.
+
+Font.render заново растеризует строку при каждом вызове, а почти все надписи
+игры не меняются от кадра к кадру. Готовые поверхности хранятся по ключу
+(шрифт, текст, сглаживание, цвет, фон) и вытесняются по принципу LRU.
+"""
+
+from collections import OrderedDict
+
+DEFAULT_CAPACITY = 256
+
+
+class TextCache:
+    """Ограниченный LRU-кэш поверхностей Font.render"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, antialias, color, background=None):
+        """То же, что font.render(text, antialias, color, background), но с кэшем
+
+        Поверхность общая для всех вызовов с тем же ключом, поэтому менять её
+        (set_alpha, рисовать поверх) нельзя - для этого нужна своя копия.
+        """
+        key = (font, text, antialias, tuple(color), background and tuple(background))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        if background is None:
+            surface = font.render(text, antialias, color)
+        else:
+            surface = font.render(text, antialias, color, background)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def __len__(self):
+        return len(self.surfaces)
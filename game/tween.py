@@ -0,0 +1,135 @@
+"""Анимации по прошедшему времени, а не по числу кадров.
+
+Tween плавно меняет value от 0 до 1 за duration секунд (после задержки delay)
+по заданной кривой. Зацикленный Tween бесконечно проходит период duration и
+подходит для пульсаций. Animator обновляет все активные анимации разом.
+"""
+
+import math
+
+
+# Кривые: отображение [0, 1] -> [0, 1]
+def linear(t):
+    return t
+
+
+def ease_in_quad(t):
+    return t * t
+
+
+def ease_out_quad(t):
+    return t * (2 - t)
+
+
+def ease_in_out_quad(t):
+    return 2 * t * t if t < 0.5 else 1 - 2 * (1 - t) * (1 - t)
+
+
+def ease_out_cubic(t):
+    return 1 - (1 - t) ** 3
+
+
+def ease_in_out_sine(t):
+    return 0.5 - math.cos(math.pi * t) / 2
+
+
+EASINGS = {
+    "linear": linear,
+    "ease_in_quad": ease_in_quad,
+    "ease_out_quad": ease_out_quad,
+    "ease_in_out_quad": ease_in_out_quad,
+    "ease_out_cubic": ease_out_cubic,
+    "ease_in_out_sine": ease_in_out_sine,
+}
+
+
+class Tween:
+    """Одна анимация величины value от 0 до 1"""
+
+    __slots__ = ("duration", "delay", "easing", "loop", "elapsed", "value", "done",
+                 "on_update", "on_complete")
+
+    def __init__(self, duration, delay=0.0, easing=linear, loop=False,
+                 on_update=None, on_complete=None):
+        self.duration = duration
+        self.delay = delay
+        self.easing = easing
+        self.loop = loop
+        self.elapsed = 0.0
+        self.value = 0.0
+        self.done = False
+        self.on_update = on_update
+        self.on_complete = on_complete  # у зацикленной анимации вызывается в конце каждого периода
+
+    @property
+    def progress(self):
+        """Доля пройденного времени без учёта кривой"""
+        if self.elapsed <= self.delay:
+            return 0.0
+        if self.loop:
+            return ((self.elapsed - self.delay) % self.duration) / self.duration
+        return min(1.0, (self.elapsed - self.delay) / self.duration) if self.duration > 0 else 1.0
+
+    def update(self, dt):
+        """Продвижение на dt секунд"""
+        if self.done:
+            return
+        before = self.elapsed
+        self.elapsed += dt
+        self.value = self.easing(self.progress)
+        if self.on_update:
+            self.on_update(self.value)
+
+        if self.loop:
+            if self.on_complete and self.elapsed > self.delay:
+                periods = int((self.elapsed - self.delay) // self.duration)
+                previous = int(max(0.0, before - self.delay) // self.duration)
+                for _ in range(periods - previous):
+                    self.on_complete()
+        elif self.elapsed >= self.delay + self.duration:
+            self.done = True
+            if self.on_complete:
+                self.on_complete()
+
+    def finish(self):
+        """Мгновенное завершение (для зацикленной - остановка)"""
+        if self.done:
+            return
+        if self.loop:
+            self.done = True
+            return
+        self.update(self.delay + self.duration - self.elapsed)
+
+    def cancel(self):
+        """Остановка без вызова on_complete"""
+        self.done = True
+
+
+class Animator:
+    """Набор одновременно идущих анимаций и общие часы"""
+
+    def __init__(self):
+        self.tweens = []
+        self.time = 0.0
+
+    def add(self, tween):
+        self.tweens.append(tween)
+        return tween
+
+    def update(self, dt):
+        """Продвижение всех анимаций; завершённые удаляются"""
+        self.time += dt
+        for tween in list(self.tweens):
+            tween.update(dt)
+        if any(tween.done for tween in self.tweens):
+            self.tweens = [tween for tween in self.tweens if not tween.done]
+
+    @property
+    def active(self):
+        """Идёт ли хотя бы одна конечная (не зацикленная) анимация"""
+        return any(not tween.loop for tween in self.tweens)
+
+    def clear(self):
+        for tween in self.tweens:
+            tween.cancel()
+        self.tweens = []
@@ -0,0 +1,7 @@
+"""Модули игры импортируются без пакета (как при запуске из game/); окно - без дисплея"""
+
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "game"))
@@ -0,0 +1,72 @@
+"""Пакетный разбор уровней против решателя и перебора"""
+
+import csv
+import json
+import math
+
+import pytest
+
+import analyze
+import solver
+from analyze import FIELDS, analyze_board, analyze_levels, save_rows
+from levels import LEVELS
+from solver import UNSOLVABLE, Solver
+
+from test_solver import small_boards
+
+
+def count_games(board, pos, visited):
+    """(число выигрышных партий, вероятность победы при случайных ходах) перебором"""
+    if visited == board.free:
+        return 1, 1.0
+    options = board.successors(pos, board.obstacles | visited)
+    wins, chance = 0, 0.0
+    for _, end, mask in options:
+        count, probability = count_games(board, end, visited | mask)
+        wins += count
+        chance += probability
+    return wins, chance / len(options) if options else 0.0
+
+
+def test_rows_match_solver_and_brute_force():
+    for board in small_boards(7, 60):
+        row = analyze_board(board)
+        best = Solver(board)
+        starts = [pos for pos in range(board.size) if board.free >> pos & 1]
+        moves = [best.remaining(pos, 1 << pos) for pos in starts]
+        games = [count_games(board, pos, 1 << pos) for pos in starts]
+        solvable = [pos for pos, count in zip(starts, moves) if count < UNSOLVABLE]
+        assert row["solvable_starts"] == len(solvable)
+        assert row["start_mask"] == sum(1 << pos for pos in solvable)
+        assert row["min_moves"] == min((count for count in moves if count < UNSOLVABLE), default=None)
+        assert row["solutions"] == sum(count for count, _ in games)
+        probability = sum(chance for _, chance in games) / len(games)
+        assert row["win_probability"] == pytest.approx(probability, abs=1e-9)
+        if probability:
+            assert row["difficulty"] == pytest.approx(-math.log2(probability), abs=1e-3)
+        assert not row["truncated"]
+
+
+def test_state_limit_truncates():
+    board = next(board for board in small_boards(8, 200) if board.free_count >= 8)
+    row = analyze_board(board, max_states=2)
+    assert row["truncated"] and row["solvable_starts"] is None
+    # Предел - то же исключение, что у решателя
+    assert analyze.StateLimit is solver.StateLimit
+
+
+def test_pool_keeps_level_order(tmp_path):
+    rows = analyze_levels(LEVELS, workers=2)
+    assert [row["level"] for row in rows] == list(range(len(LEVELS)))
+    single = analyze_levels(LEVELS, workers=1)
+    for pooled, alone in zip(rows, single):
+        assert {key: value for key, value in pooled.items() if key != "elapsed_ms"} == \
+            {key: value for key, value in alone.items() if key != "elapsed_ms"}
+
+    for name in ("rows.csv", "rows.json"):
+        path = str(tmp_path / name)
+        save_rows(path, rows)
+        with open(path, encoding="utf-8") as file:
+            loaded = json.load(file) if name.endswith(".json") else list(csv.DictReader(file))
+        assert len(loaded) == len(rows)
+        assert list(loaded[0]) == list(FIELDS)
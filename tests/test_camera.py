@@ -0,0 +1,90 @@
+"""Камера большого поля: видимые клетки, прокрутка, масштаб"""
+
+import random
+
+import pytest
+
+from camera import MAX_CELL_SIZE, MIN_CELL_SIZE, Camera
+from engine import Board
+from generator import random_obstacles
+
+VIEWPORT = (0, 80, 500, 500)
+
+
+def overlaps(camera, cell):
+    """Пересекается ли клетка с областью вывода (проверка по пикселям)"""
+    vx, vy, width, height = camera.viewport
+    x, y = camera.cell_origin(cell)
+    size = camera.cell_size
+    return x < vx + width and x + size > vx and y < vy + height and y + size > vy
+
+
+def random_cameras(seed, count=40):
+    rng = random.Random(seed)
+    for _ in range(count):
+        camera = Camera(VIEWPORT, rng.randint(1, 120), rng.randint(1, 120))
+        camera.fit()
+        for _ in range(rng.randint(0, 5)):
+            camera.zoom(rng.choice((0.5, 0.8, 1.25, 2.0)), (rng.randrange(500), 80 + rng.randrange(500)))
+            camera.pan(rng.randint(-400, 400), rng.randint(-400, 400))
+        yield camera
+
+
+def test_visible_cells_are_exactly_those_on_screen():
+    for camera in random_cameras(1):
+        rows, cols = camera.visible()
+        for row in range(camera.rows):
+            for col in range(camera.cols):
+                assert (row in rows and col in cols) == overlaps(camera, (row, col))
+
+
+def test_cell_at_inverts_cell_origin():
+    vx, vy, width, height = VIEWPORT
+    for camera in random_cameras(2):
+        rows, cols = camera.visible()
+        half = camera.cell_size // 2
+        for row in rows:
+            for col in cols:
+                x, y = camera.cell_origin((row, col))
+                if vx <= x + half < vx + width and vy <= y + half < vy + height:
+                    assert camera.cell_at((x + half, y + half)) == (row, col)
+        assert camera.cell_at((vx - 1, vy)) is None
+
+
+def test_zoom_keeps_anchor_in_place():
+    camera = Camera(VIEWPORT, 400, 400, cell_size=20)
+    camera.pan(3000, 3000)
+    anchor = (123, 321)
+    cell = camera.cell_at(anchor)
+    for factor in (1.25, 1.25, 0.8, 2.0):
+        camera.zoom(factor, anchor)
+        assert camera.cell_at(anchor) == cell
+    assert MIN_CELL_SIZE <= camera.cell_size <= MAX_CELL_SIZE
+
+
+def test_small_board_is_centred_and_follow_shows_cell():
+    camera = Camera(VIEWPORT, 3, 4)
+    camera.fit()
+    x, y = camera.cell_origin((0, 0))
+    right, bottom = camera.cell_origin((3, 4))
+    assert x - VIEWPORT[0] == VIEWPORT[0] + VIEWPORT[2] - right
+    assert y - VIEWPORT[1] == VIEWPORT[1] + VIEWPORT[3] - bottom
+
+    camera = Camera(VIEWPORT, 500, 500, cell_size=25)
+    for cell in ((499, 499), (0, 250), (250, 0), (17, 480)):
+        camera.follow(cell)
+        rows, cols = camera.visible()
+        assert cell[0] in rows and cell[1] in cols and overlaps(camera, cell)
+
+
+@pytest.mark.parametrize("width, height", [(7, 5), (300, 200)])
+def test_window_cells_match_full_scan(width, height):
+    rng = random.Random(width)
+    board = Board(width, height, random_obstacles(rng, width, height, 0.3))
+    obstacles = list(board.cells(board.obstacles))
+    for _ in range(30):
+        top, left = rng.randrange(height), rng.randrange(width)
+        rows = range(top, rng.randint(top, height))
+        cols = range(left, rng.randint(left, width))
+        expected = [cell for cell in obstacles if cell[0] in rows and cell[1] in cols]
+        assert sorted(board.window_cells(board.obstacles, rows, cols)) == sorted(expected)
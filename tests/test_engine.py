@@ -0,0 +1,138 @@
+"""Битовый движок против сеточных правил исходной игры"""
+
+import random
+
+import pytest
+
+from engine import DELTAS, DIRECTIONS, Board, GameState
+from generator import random_obstacles
+from solver import UNSOLVABLE, Solver
+
+
+def grid_path(grid, visited, cell, direction):
+    """Путь хода как в calculate_movement_path исходной игры"""
+    height, width = len(grid), len(grid[0])
+    row, col = cell
+    dr, dc = DELTAS[direction]
+    path = [cell]
+    while True:
+        row, col = row + dr, col + dc
+        if not (0 <= row < height and 0 <= col < width) or grid[row][col] or (row, col) in visited:
+            return path
+        path.append((row, col))
+
+
+def grid_stuck(grid, visited, cell):
+    """Тупик как в check_game_over исходной игры"""
+    return all(len(grid_path(grid, visited, cell, direction)) == 1 for direction in DIRECTIONS)
+
+
+def random_board(rng, width, height):
+    return Board(width, height, random_obstacles(rng, width, height, rng.choice((0.0, 0.15, 0.3))))
+
+
+@pytest.mark.parametrize("width, height", [(5, 5), (7, 3), (1, 6), (40, 30)])
+def test_slides_match_grid_rules(width, height):
+    rng = random.Random(width * 100 + height)
+    for _ in range(30):
+        board = random_board(rng, width, height)
+        if not board.free_count:
+            continue
+        grid = board.to_grid()
+        state = GameState(board)
+        start = rng.choice(list(board.cells(board.free)))
+        assert state.start(start)
+        visited = {start}
+        while True:
+            for direction in DIRECTIONS:
+                assert state.path(direction) == grid_path(grid, visited, state.cell, direction)
+            assert state.dead_end == (len(visited) < board.free_count and grid_stuck(grid, visited, state.cell))
+            assert state.won == (len(visited) == board.free_count)
+            if not state.options:
+                break
+            path = grid_path(grid, visited, state.cell, rng.choice(list(state.options)))
+            direction = DIRECTIONS[DELTAS.index((path[1][0] - path[0][0], path[1][1] - path[0][1]))]
+            state.move(direction)
+            visited.update(path)
+            assert state.cell == path[-1]
+            assert set(board.cells(state.visited)) == visited
+
+
+@pytest.mark.parametrize("width, height", [(6, 6), (40, 30)])
+def test_successors_match_slides(width, height):
+    """С таблицами лучей (маленькое поле) и без них (больше TABLE_LIMIT клеток)"""
+    rng = random.Random(width)
+    board = random_board(rng, width, height)
+    blocked = board.obstacles | random_obstacles(rng, width, height, 0.2)
+    for index in range(board.size):
+        expected = []
+        for direction in DIRECTIONS:
+            end, mask = board.slide(index, blocked, direction)
+            if mask:
+                expected.append((direction, end, mask))
+        assert board.successors(index, blocked) == expected
+
+
+def test_lost_states_are_unwinnable():
+    rng = random.Random(6)
+    for _ in range(200):
+        width, height = rng.randint(2, 4), rng.randint(2, 4)
+        board = random_board(rng, width, height)
+        if not board.free_count:
+            continue
+        solver = Solver(board)
+        state = GameState(board)
+        state.start(rng.choice(list(board.cells(board.free))))
+        while state.options:
+            if state.lost:
+                assert solver.remaining(state.pos, state.visited) == UNSOLVABLE
+            state.move(rng.choice(list(state.options)))
+
+
+def test_incremental_lost_matches_full_check():
+    rng = random.Random(7)
+    for _ in range(500):
+        width, height = rng.randint(2, 8), rng.randint(2, 8)
+        board = random_board(rng, width, height)
+        if not board.free_count:
+            continue
+        state = GameState(board)
+        state.start(rng.choice(list(board.cells(board.free))))
+        for _ in range(40):
+            action = rng.random()
+            if action < 0.15:
+                state.undo()
+            elif action < 0.25:
+                state.redo()
+            elif state.options:
+                state.move(rng.choice(list(state.options)))
+            else:
+                break
+            expected = state.dead_end or (not state.won and board.is_lost(state.pos, state.visited))
+            assert state.lost == expected
+
+
+def test_undo_redo_restore_state():
+    rng = random.Random(18)
+    board = random_board(rng, 8, 8)
+    state = GameState(board)
+    state.start(rng.choice(list(board.cells(board.free))))
+    snapshots = []
+    while state.options:
+        snapshots.append((state.pos, state.visited, state.moves, state.lost, state.won, state.dead_end))
+        state.move(rng.choice(list(state.options)))
+    final = (state.pos, state.visited, state.moves, state.lost, state.won, state.dead_end)
+    directions = []
+    for snapshot in reversed(snapshots):
+        directions.append(state.undo())
+        assert (state.pos, state.visited, state.moves, state.lost, state.won, state.dead_end) == snapshot
+    assert state.undo() is None
+    for direction in reversed(directions):
+        assert state.redo_direction == direction
+        assert state.redo() == direction
+    assert state.redo() is None
+    assert (state.pos, state.visited, state.moves, state.lost, state.won, state.dead_end) == final
+    # Новый ход после отмены стирает повтор
+    state.undo()
+    state.move(state.redo_direction)
+    assert state.redo() is None
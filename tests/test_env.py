@@ -0,0 +1,79 @@
+"""Среды для автоматических игроков против GameState"""
+
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import env as env_module
+from engine import Board, GameState
+from env import BatchEnv, DropletEnv, bit_counts
+from generator import random_obstacles
+
+
+def small_levels(seed, count=8, width=6, height=5):
+    rng = random.Random(seed)
+    return [Board(width, height, random_obstacles(rng, width, height, 0.2)) for _ in range(count)]
+
+
+def mirror(batch, index):
+    """GameState в начале партии index пакета"""
+    board = batch.boards[int(batch.level[index])]
+    state = GameState(board)
+    state.start(board.cell(int(batch.pos[index])))
+    return state
+
+
+def test_batch_env_matches_game_state():
+    levels = small_levels(1)
+    batch = BatchEnv(levels, count=256, max_steps=1000, seed=0)
+    batch.reset()
+    states = [mirror(batch, index) for index in range(batch.count)]
+    rng = np.random.default_rng(1)
+    for _ in range(60):
+        mask = batch.action_mask()
+        for index, state in enumerate(states):
+            assert mask[index].tolist() == [direction in state.options for direction in range(4)]
+        actions = rng.integers(4, size=batch.count)
+        paths = batch.slide(actions)
+        _, reward, terminated, _, info = batch.step(actions)
+        for index, state in enumerate(states):
+            moved = state.move(int(actions[index]))
+            assert int(paths[index]) == moved
+            assert bool(info["won"][index]) == state.won
+            assert bool(terminated[index]) == (state.won or state.dead_end)
+            expected = moved.bit_count() / state.free_count + state.won * env_module.WIN_REWARD
+            assert reward[index] == pytest.approx(expected)
+            if terminated[index]:
+                states[index] = mirror(batch, index)
+            else:
+                assert int(batch.visited[index]) == state.visited and int(batch.pos[index]) == state.pos
+
+
+def test_bit_counts_without_bitwise_count(monkeypatch):
+    masks = np.array([0, 1, 0b1011, (1 << 64) - 1, 0x8000_0000_0000_0001], np.uint64)
+    expected = [0, 1, 3, 64, 2]
+    assert bit_counts(masks).tolist() == expected
+    monkeypatch.delattr(np, "bitwise_count", raising=False)
+    assert bit_counts(masks).tolist() == expected
+
+
+def test_droplet_env_plays_like_game_state():
+    levels = small_levels(2, count=3)
+    droplet = DropletEnv(levels, seed=3)
+    rng = random.Random(4)
+    for episode in range(20):
+        observation, info = droplet.reset()
+        state = GameState(droplet.board)
+        state.start(droplet.state.cell)
+        assert observation.shape == (3, droplet.board.height, droplet.board.width)
+        while True:
+            action = rng.choice(np.flatnonzero(info["action_mask"]).tolist() or [0])
+            observation, reward, terminated, truncated, info = droplet.step(action)
+            state.move(action)
+            assert info["visited"] == state.visited_count
+            assert terminated == (state.won or state.dead_end)
+            assert int(observation[1].sum()) == state.visited_count
+            if terminated or truncated:
+                break
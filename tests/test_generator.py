@@ -0,0 +1,47 @@
+"""Генератор: только решаемые уровни без повторов между порциями"""
+
+import random
+
+from engine import Board
+from generator import SATURATION, draw_layouts, generate_levels, random_obstacles, solve_batch
+from solver import is_solvable
+from symmetry import Symmetry
+
+
+def test_draw_layouts_never_repeats_known_layouts():
+    rng = random.Random(1)
+    symmetry = Symmetry.for_size(4, 4)
+    known = set()
+    drawn = []
+    for _ in range(20):
+        layouts, draws = draw_layouts(rng, symmetry, 4, 4, 0.3, known, 25, 1000)
+        assert draws >= len(layouts)
+        drawn.extend(layouts)
+    assert len(drawn) == len(set(drawn)) == len(known)
+    assert all(symmetry.canonical(obstacles)[0] == obstacles for obstacles in drawn)
+
+
+def test_solve_batch_keeps_only_solvable():
+    rng = random.Random(2)
+    layouts = [random_obstacles(rng, 4, 4, 0.3) for _ in range(60)]
+    found = solve_batch((4, 4, layouts))
+    assert found == [obstacles for obstacles in layouts
+                     if Board(4, 4, obstacles).free_count and is_solvable(Board(4, 4, obstacles))]
+
+
+def test_levels_are_distinct_across_batches():
+    levels, stats = generate_levels(4, 4, 0.25, 60, workers=2, seed=3, batch_size=10)
+    assert len(levels) == 60
+    assert len(set(levels)) == len(levels)
+    symmetry = Symmetry.for_size(4, 4)
+    assert all(symmetry.canonical(obstacles)[0] == obstacles for obstacles in levels)
+    assert all(is_solvable(Board(4, 4, obstacles)) for obstacles in levels)
+    assert stats.checked == stats.attempts - stats.duplicates
+
+
+def test_small_boards_saturate():
+    # На поле 2x2 расположений меньше, чем попыток в одной порции
+    levels, stats = generate_levels(2, 2, 0.3, 100, workers=2, seed=4, batch_size=10)
+    assert stats.saturated
+    assert stats.attempts <= SATURATION * 10 * 2
+    assert len(set(levels)) == len(levels) == stats.solvable < 100
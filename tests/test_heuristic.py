@@ -0,0 +1,60 @@
+"""Эвристический решатель: найденный путь проходится, покрытие посчитано верно"""
+
+import random
+
+from engine import Board
+from generator import random_obstacles
+from heuristic import anytime_search, beam_search, planted_board, solve_large, state_budget
+from replay import RESULT_WON, play
+from solver import is_solvable
+
+
+def covered_cells(board, result):
+    """Клетки, посещённые проходом пути результата"""
+    pos = board.index(result.cell)
+    blocked = board.obstacles | (1 << pos)
+    for direction in result.path:
+        pos, mask = board.slide(pos, blocked, direction)
+        assert mask
+        blocked |= mask
+    return (blocked & board.free).bit_count()
+
+
+def test_planted_boards_are_solvable():
+    rng = random.Random(1)
+    for _ in range(20):
+        board = planted_board(5, 5, rng)
+        assert board.free_count and is_solvable(board)
+
+
+def test_beam_paths_replay_to_reported_coverage():
+    rng = random.Random(2)
+    for _ in range(30):
+        board = Board(12, 12, random_obstacles(rng, 12, 12, 0.2))
+        if not board.free_count:
+            continue
+        result, states = beam_search(board, 16, float("inf"), rng)
+        assert states > 0 or board.free_count == 1
+        assert covered_cells(board, result) == result.covered <= result.free == board.free_count
+
+
+def test_wide_beam_solves_small_solvable_boards():
+    rng = random.Random(3)
+    for _ in range(20):
+        board = planted_board(6, 6, rng)
+        result = anytime_search(board, seconds=5, width=256, seed=4)
+        assert result.solved
+        assert play(board, result.cell, result.path)[0] == RESULT_WON
+
+
+def test_memory_budget_limits_width():
+    board = Board(50, 50, 0)
+    assert state_budget(board, 1) < state_budget(board, 2)
+    assert state_budget(board, 0) == 1
+
+
+def test_pool_finds_full_coverage():
+    board = planted_board(20, 20, random.Random(5))
+    result = solve_large(board, seconds=20, workers=2, seed=6)
+    assert result.solved
+    assert play(board, result.cell, result.path)[0] == RESULT_WON
@@ -0,0 +1,122 @@
+"""Подсказки: ответы таблицы и фоновый кэш с лимитом и приоритетами"""
+
+import math
+import random
+import threading
+import time
+
+from engine import Board
+from generator import random_obstacles
+from hints import (HINT_LOST, HINT_MOVE, HINT_START, HINT_UNAVAILABLE, HINT_WON, HintCache,
+                   HintTable)
+from solver import UNSOLVABLE, Solver
+
+TIMEOUT = 30
+
+
+def boards(seed, count, width=5, height=5, density=0.15):
+    rng = random.Random(seed)
+    result = []
+    while len(result) < count:
+        board = Board(width, height, random_obstacles(rng, width, height, density))
+        if 8 <= board.free_count:
+            result.append(board)
+    return result
+
+
+def full_size(board):
+    """Число состояний полностью посчитанной таблицы уровня"""
+    table = HintTable(board)
+    assert table.compute(lambda table: math.inf)
+    return table.size
+
+
+def wait_for(condition, timeout=TIMEOUT):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "фоновый расчёт не закончился"
+        time.sleep(0.001)
+
+
+def test_hints_follow_a_shortest_solution():
+    for board in boards(1, 10):
+        table = HintTable(board)
+        table.compute(lambda table: math.inf)
+        solver = Solver(board)
+        start = table.best_start()
+        best = min(solver.remaining(pos, 1 << pos) for pos in range(board.size) if board.free >> pos & 1)
+        if best >= UNSOLVABLE:
+            assert start.status == HINT_LOST
+            continue
+        assert (start.status, start.moves) == (HINT_START, best)
+        pos = board.index(start.cell)
+        visited = 1 << pos
+        for moves in range(best, 0, -1):
+            hint = table.query(pos, visited)
+            assert (hint.status, hint.moves) == (HINT_MOVE, moves)
+            pos, mask = board.slide(pos, board.obstacles | visited, hint.direction)
+            visited |= mask
+        assert table.query(pos, visited).status == HINT_WON
+
+
+def test_cache_stays_within_budget():
+    levels = boards(2, 8)
+    sizes = [full_size(board) for board in levels]
+    cache = HintCache(max_states=int(max(sizes) * 1.5))
+    peak = 0
+    for board in levels:
+        table = cache.table(board)
+        while not table.done:
+            with cache._lock:
+                peak = max(peak, sum(other.size for other in cache.tables.values()))
+            time.sleep(0)
+        assert table.available and table.size == full_size(board)
+        # Таблица текущего уровня остаётся в кэше
+        assert cache.table(board) is table
+    assert len(cache.tables) < len(levels)
+    # Решатель может записать одно состояние сверх предела, прежде чем остановиться
+    assert peak <= cache.max_states + 1
+    with cache._lock:
+        assert sum(table.size for table in cache.tables.values()) <= cache.max_states
+
+
+def test_table_larger_than_budget_gives_up():
+    board = boards(3, 1)[0]
+    cache = HintCache(max_states=full_size(board) // 2)
+    table = cache.table(board)
+    wait_for(lambda: table.done)
+    assert not table.available
+    pos = board.index(next(board.cells(board.free)))
+    assert table.query(pos, 1 << pos).status in (HINT_UNAVAILABLE, HINT_LOST)
+
+
+def test_current_level_preempts_prefetch(monkeypatch):
+    slow, current = boards(4, 2)
+    cache = HintCache()
+    finished = []
+    compute = HintTable.compute
+
+    def logged(table, room):
+        done = compute(table, room)
+        finished.append((table.board, done))
+        return done
+
+    monkeypatch.setattr(HintTable, "compute", logged)
+    # Заблаговременный расчёт останавливается на первом запросе места, пока не
+    # запрошен текущий уровень
+    started, requested = threading.Event(), threading.Event()
+    room = cache._room
+
+    def held(table):
+        if table.board is slow and not requested.is_set():
+            started.set()
+            requested.wait(TIMEOUT)
+        return room(table)
+
+    monkeypatch.setattr(cache, "_room", held)
+    cache.prefetch(slow)
+    assert started.wait(TIMEOUT)
+    table = cache.table(current)
+    requested.set()
+    wait_for(lambda: table.done and cache.tables[HintCache._key(slow)].done)
+    assert finished == [(slow, False), (current, True), (slow, True)]
@@ -0,0 +1,66 @@
+"""Двоичный набор уровней: запись и чтение обратно"""
+
+import json
+import random
+
+import pytest
+
+from engine import Board
+from generator import random_obstacles
+from levelpack import HEADER, LevelInfo, LevelPack, level_boards, write_pack
+from levels import LEVELS, load_levels
+
+
+def test_pack_round_trip(tmp_path):
+    rng = random.Random(1)
+    boards = [Board(width, height, random_obstacles(rng, width, height, 0.2))
+              for width, height in ((5, 5), (7, 3), (12, 9), (1, 1))]
+    infos = [LevelInfo(starts=boards[0].free & 0b1011, moves=7, difficulty=2.5), None,
+             LevelInfo(moves=3), LevelInfo()]
+    path = tmp_path / "levels.pack"
+    assert write_pack(path, boards, infos) == len(boards)
+
+    pack = load_levels(path)
+    assert isinstance(pack, LevelPack)
+    with pack:
+        assert len(pack) == len(boards)
+        for number, board in enumerate(boards):
+            loaded = pack.load_level(number)
+            assert (loaded.width, loaded.height, loaded.obstacles) == (board.width, board.height, board.obstacles)
+            assert pack[number] == board.to_grid()
+        assert [board.obstacles for board in level_boards(pack)] == [board.obstacles for board in boards]
+        assert (pack.info(0).starts, pack.info(0).moves, pack.info(0).difficulty) == (boards[0].free & 0b1011, 7, 2.5)
+        assert pack.info(1) is None
+        assert (pack.info(2).starts, pack.info(2).moves, pack.info(2).difficulty) == (None, 3, None)
+        with pytest.raises(IndexError):
+            pack.load_level(len(boards))
+
+
+def test_builtin_levels_survive_pack(tmp_path):
+    path = tmp_path / "builtin.pack"
+    write_pack(path, LEVELS)
+    with LevelPack(path) as pack:
+        assert list(pack) == LEVELS
+
+
+def test_empty_levels_are_rejected(tmp_path):
+    pack = tmp_path / "empty.pack"
+    write_pack(pack, [])
+    grids = tmp_path / "empty.json"
+    grids.write_text(json.dumps([]), encoding="utf-8")
+    for path in (pack, grids):
+        with pytest.raises(ValueError):
+            load_levels(path)
+
+
+def test_short_files_are_not_packs(tmp_path):
+    path = tmp_path / "short.pack"
+    write_pack(path, LEVELS)
+    data = path.read_bytes()
+    for size in (0, 3, HEADER.size - 1):
+        path.write_bytes(data[:size])
+        with pytest.raises(ValueError, match="не набор уровней"):
+            LevelPack(path)
+    path.write_bytes(data[:HEADER.size + 1])
+    with pytest.raises(ValueError, match="файл обрезан"):
+        LevelPack(path)
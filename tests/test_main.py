@@ -0,0 +1,157 @@
+"""Игровое окно под SDL_VIDEODRIVER=dummy: вывод кадров и анимации"""
+
+import time
+
+import pygame
+import pytest
+
+import main
+from engine import DIRECTIONS
+from hints import HINT_MOVE, HINT_START
+
+
+class Display:
+    """Экран, который видит игрок: в него копируется то, что игра выводит"""
+
+    def __init__(self, game, monkeypatch):
+        self.game = game
+        self.front = game.screen.copy()
+        monkeypatch.setattr(pygame.display, "flip", self.flip)
+        monkeypatch.setattr(pygame.display, "update", self.update)
+
+    def flip(self):
+        self.front.blit(self.game.screen, (0, 0))
+
+    def update(self, rects):
+        for rect in rects:
+            self.front.blit(self.game.screen, rect, rect)
+
+    def stale_pixels(self):
+        """Сколько пикселей выведенного кадра отличается от заднего буфера"""
+        front = pygame.surfarray.array3d(self.front)
+        back = pygame.surfarray.array3d(self.game.screen)
+        return int((front != back).any(axis=2).sum())
+
+
+@pytest.fixture
+def game():
+    # Открытое поле 3x3: из центра ходы во все стороны, и победа есть
+    game = main.DropletGame(dirty_rects=True, levels=[[[0] * 3 for _ in range(3)]])
+    game.game_state = main.STATE_PLAYING
+    yield game
+    pygame.quit()
+
+
+def frames(game, count=1):
+    for _ in range(count):
+        game.update_animation(1 / main.FPS)
+        game.draw_board()
+
+
+def settle(game):
+    """Кадры до конца хода"""
+    while game.is_animating:
+        frames(game)
+    frames(game)
+
+
+def test_changed_hint_is_erased_from_screen(game, monkeypatch):
+    display = Display(game, monkeypatch)
+    table = game.hint_table
+    deadline = time.perf_counter() + 30
+    while not table.done:
+        assert time.perf_counter() < deadline
+        time.sleep(0.001)
+    frames(game)
+
+    # Подсказка старта, затем старт на другой клетке
+    game.hint = game.query_hint()
+    assert game.hint.status == HINT_START
+    frames(game)
+    cell = next(cell for cell in game.board.cells(game.board.free) if cell != game.hint.cell)
+    game.state.start(cell)
+    game.droplet_pos = cell
+    game.hint = None
+    frames(game)
+    assert display.stale_pixels() == 0
+
+    # Подсказка хода, затем ход в другую сторону
+    game.load_level(game.current_level)
+    game.state.start((1, 1))
+    game.droplet_pos = game.state.cell
+    frames(game)
+    game.hint = game.query_hint()
+    assert game.hint.status == HINT_MOVE
+    frames(game)
+    other = next(direction for direction in DIRECTIONS
+                 if direction != game.hint.direction and direction in game.state.options)
+    assert game.move_droplet(other)
+    settle(game)
+    assert display.stale_pixels() == 0
+
+
+class FakeClock:
+    """pygame.time.Clock с ручным временем; работа кадра времени не занимает"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.last = 0.0
+
+    def tick(self, framerate=0):
+        if framerate:
+            # Ожидание до конца кадра, как у настоящих часов
+            self.now = max(self.now, self.last + 1000 / framerate)
+        elapsed = self.now - self.last
+        self.last = self.now
+        return elapsed
+
+
+def slide_elapsed(idle, monkeypatch):
+    """Время анимации хода после каждого кадра; ход начинается нажатием клавиши"""
+    game = main.DropletGame(idle=idle, levels=[[[0] * 3 for _ in range(3)]])
+    game.game_state = main.STATE_PLAYING
+    game.state.start((1, 1))
+    game.droplet_pos = (1, 1)
+    game.clock = FakeClock()
+    key = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RIGHT, mod=0, unicode="", scancode=0)
+    pressed = []
+
+    def wait(timeout):
+        # Клавиша нажата после нескольких секунд простоя
+        game.clock.now += 5000
+        return pressed.pop() if pressed else pygame.event.Event(pygame.NOEVENT)
+
+    monkeypatch.setattr(pygame.event, "wait", wait)
+    for _ in range(3):
+        game.tick()
+    pygame.event.clear()
+    if idle:
+        pressed.append(key)
+    else:
+        pygame.event.post(key)
+    elapsed = []
+    while True:
+        game.tick()
+        tween = game.slide_tween
+        if tween is None:
+            break
+        elapsed.append(round(tween.elapsed, 6))
+    pygame.quit()
+    return elapsed
+
+
+def test_move_after_idle_animates_like_full_rate(monkeypatch):
+    full = slide_elapsed(False, monkeypatch)
+    assert len(full) > 3
+    assert slide_elapsed(True, monkeypatch) == full
+
+
+def test_dead_end_banner_leaves_cached_text_unchanged(game):
+    # Надпись о тупике пульсирует, пока game_over
+    game.state.start((1, 1))
+    game.droplet_pos = (1, 1)
+    game.game_over = True
+    frames(game, 10)
+    cached = game.text.render(game.bold_font, "ТУПИК! Нажмите R для перезапуска", True, main.RED)
+    assert cached.get_alpha() in (None, 255)
+    assert game.game_over_text is not cached
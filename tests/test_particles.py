@@ -0,0 +1,67 @@
+"""Пул частиц: время жизни, ёмкость и отрисовка только видимых"""
+
+import math
+
+import numpy as np
+import pygame
+import pytest
+
+from particles import ParticleSystem
+
+
+@pytest.fixture
+def surface():
+    return pygame.Surface((200, 150), 0, 32)
+
+
+def test_emit_respects_capacity_and_compacts(surface):
+    system = ParticleSystem(capacity=100, lifetime=1.0, seed=0)
+    palette = ParticleSystem.palette(surface, [(255, 0, 0)])
+    assert system.emit(60, 10, 10, 100, palette) == 60
+    system.update(0.5)
+    assert system.emit(60, 10, 10, 100, palette) == 40
+    assert system.count == 100
+    # Первая вспышка умирает, вторая живёт; место освобождается сдвигом в начало
+    system.update(0.6)
+    assert system.count == 40
+    assert system.emit(50, 10, 10, 100, palette) == 50
+    assert system.head == 0 and system.count == 90
+    system.update(2.0)
+    assert system.count == 0
+
+
+def test_motion_follows_speed_and_gravity():
+    system = ParticleSystem(gravity=100.0, drag=1.0, seed=1)
+    palette = np.array([1], np.uint32)
+    system.emit(200, 50, 50, 80, palette, angle=-math.pi / 2, spread=0.0)
+    live = slice(system.head, system.tail)
+    speeds = -system.vy[live].copy()
+    assert (speeds >= 80 * 0.35 - 1e-3).all() and (speeds <= 80 + 1e-3).all()
+    system.update(0.5)
+    np.testing.assert_allclose(system.y[live], 50 - speeds * 0.5 + 100 * 0.25, rtol=1e-4)
+    np.testing.assert_allclose(system.x[live], 50, atol=1e-4)
+
+
+def test_draw_paints_only_visible_particles(surface):
+    system = ParticleSystem(size=2, seed=2)
+    surface.fill((0, 0, 0))
+    red, green = ParticleSystem.palette(surface, [(255, 0, 0), (0, 255, 0)])
+    rect = pygame.Rect(20, 20, 100, 100)
+    # Видимая частица в левом верхнем углу rect и одна за его пределами
+    system.emit(1, 20, 20, 0, np.array([red]))
+    system.emit(1, 150, 100, 0, np.array([green]))
+    dirty = system.draw(surface, rect)
+    assert dirty == pygame.Rect(20, 20, 2, 2)
+    assert surface.get_at((20, 20))[:3] == (255, 0, 0)
+    assert surface.get_at((21, 21))[:3] == (255, 0, 0)
+    assert surface.get_at((150, 100))[:3] == (0, 0, 0)
+    assert pygame.mask.from_threshold(surface, (0, 0, 0), (1, 1, 1, 255)).count() == 200 * 150 - 4
+
+
+def test_nothing_visible_draws_nothing(surface):
+    system = ParticleSystem(seed=3)
+    surface.fill((0, 0, 0))
+    assert system.draw(surface, surface.get_rect()) is None
+    system.emit(10, -50, -50, 0, np.array([1], np.uint32))
+    assert system.draw(surface, surface.get_rect()) is None
+    assert pygame.mask.from_threshold(surface, (0, 0, 0), (1, 1, 1, 255)).count() == 200 * 150
@@ -0,0 +1,49 @@
+"""Записи партий: запись в файл, чтение и проверка проигрыванием"""
+
+import random
+
+import pytest
+
+from engine import Board
+from levels import LEVELS
+from replay import (RESULT_DEAD_END, RESULT_WON, Replay, ReplayChecker, play, random_replay,
+                    read_replays, save_replay)
+from solver import Solver
+
+
+def test_replays_round_trip_and_verify(tmp_path):
+    rng = random.Random(2)
+    boards = [Board.from_grid(grid) for grid in LEVELS]
+    replays = [random_replay(boards[number % len(boards)], number % len(boards), rng) for number in range(50)]
+    # Выигранная партия по решению решателя
+    result = Solver(boards[0]).solve()
+    cell, best = next((cell, result) for cell, result in result.items() if result.solvable)
+    replays.append(Replay(0, cell, best.path, RESULT_WON))
+
+    path = tmp_path / "replays.bin"
+    for replay in replays:
+        save_replay(path, replay)
+    loaded = list(read_replays(path))
+    assert len(loaded) == len(replays)
+    for original, replay in zip(replays, loaded):
+        assert (replay.level, replay.start, replay.directions, replay.result, replay.moves) == \
+            (original.level, original.start, original.directions, original.result, original.moves)
+        assert play(boards[replay.level], replay.start, replay.directions) == (replay.result, replay.moves)
+    assert loaded[-1].result == RESULT_WON
+    assert any(replay.result == RESULT_DEAD_END for replay in loaded)
+
+    checker = ReplayChecker(LEVELS)
+    checker.check_all(loaded)
+    assert checker.checked == len(loaded) and not checker.failed
+
+
+def test_truncated_replay_file_names_the_record(tmp_path):
+    path = tmp_path / "replays.bin"
+    for _ in range(2):
+        save_replay(path, Replay(0, (0, 0), [1, 3, 0, 2, 1], RESULT_WON))
+    data = path.read_bytes()
+    record = len(data) // 2
+    for size in (len(data) - 1, record + 3):
+        path.write_bytes(data[:size])
+        with pytest.raises(ValueError, match=f"смещении {record}"):
+            list(read_replays(path))
@@ -0,0 +1,80 @@
+"""Разбор запросов сервера партий и нагрузочный клиент"""
+
+import asyncio
+import random
+import time
+
+import pytest
+
+import loadtest
+from server import GameServer
+
+
+@pytest.fixture
+def server():
+    return GameServer(seed=0)
+
+
+@pytest.mark.parametrize("request_", [[], {"cmd": []}, {"cmd": {}}, {"cmd": "fly"}, {}])
+def test_malformed_command_is_an_error(server, request_):
+    response = server.handle(request_)
+    assert response["ok"] is False
+
+
+@pytest.mark.parametrize("request_", [{"cmd": "state", "session": True},
+                                      {"cmd": "move", "session": True, "direction": "D"},
+                                      {"cmd": "start", "cell": [True, False]},
+                                      {"cmd": "start", "level": False}])
+def test_bools_are_not_numbers(server, request_):
+    server.handle({"cmd": "start", "cell": [0, 0], "level": 1})
+    assert server.handle(request_)["ok"] is False
+
+
+def test_session_plays_and_undoes(server):
+    started = server.handle({"cmd": "start", "level": 0, "cell": [0, 0], "id": 7})
+    assert started["ok"] and started["id"] == 7 and started["moves"] == 0
+    number = started["session"]
+    for direction in "DRUL":
+        moved = server.handle({"cmd": "move", "session": number, "direction": direction})
+        if moved["moved"]:
+            break
+    assert moved["moves"] == 1
+    undone = server.handle({"cmd": "undo", "session": number})
+    assert undone["undone"] and undone["cell"] == started["cell"] and undone["visited"] == 1
+    assert server.handle({"cmd": "close", "session": number})["ok"]
+    assert server.handle({"cmd": "state", "session": number})["ok"] is False
+
+
+def test_long_session_undo_replays_moves(server):
+    number = server.handle({"cmd": "start", "level": 0, "cell": [0, 0]})["session"]
+    session = server.sessions[number]
+    for step in range(300):
+        server.handle({"cmd": "move", "session": number, "direction": step % 4})
+        if step % 3 == 2:
+            server.handle({"cmd": "undo", "session": number})
+    board = server.board(0)
+    pos, blocked = session.start, board.obstacles | (1 << session.start)
+    for direction in session.directions:
+        pos, mask = board.slide(pos, blocked, direction)
+        blocked |= mask
+    assert (session.pos, session.visited) == (pos, blocked & ~board.obstacles)
+
+
+class RefusingClient:
+    """Клиент нагрузочного теста, которому сервер отказывает в открытии партии"""
+
+    def __init__(self):
+        self.requests = []
+
+    async def request(self, **request):
+        self.requests.append(request)
+        return {"ok": False, "error": "слишком много партий"}
+
+
+def test_load_test_counts_refused_starts():
+    client = RefusingClient()
+    results = {"won": 0, "dead_end": 0, "errors": 0}
+    deadline = time.perf_counter() + 0.05
+    asyncio.run(loadtest.play(client, 1, deadline, random.Random(0), [], results))
+    assert results["errors"] == len(client.requests) > 0
+    assert all(request["cmd"] == "start" for request in client.requests)
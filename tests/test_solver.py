@@ -0,0 +1,61 @@
+"""Точный решатель против полного перебора"""
+
+import random
+
+from engine import Board
+from generator import random_obstacles
+from solver import UNSOLVABLE, Solver, is_solvable, start_candidates
+
+
+def brute_force(board, pos, visited):
+    """Минимум ходов до победы перебором всех партий, без таблиц и отсечений"""
+    if visited == board.free:
+        return 0
+    best = UNSOLVABLE
+    for _, end, mask in board.successors(pos, board.obstacles | visited):
+        best = min(best, brute_force(board, end, visited | mask) + 1)
+    return best
+
+
+def small_boards(seed, count):
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        width, height = rng.randint(2, 4), rng.randint(2, 4)
+        board = Board(width, height, random_obstacles(rng, width, height, rng.choice((0.0, 0.2, 0.35))))
+        if board.free_count:
+            boards.append(board)
+    return boards
+
+
+def test_solver_matches_brute_force():
+    for board in small_boards(1, 120):
+        solver = Solver(board)
+        for pos in range(board.size):
+            if board.free >> pos & 1:
+                assert solver.remaining(pos, 1 << pos) == brute_force(board, pos, 1 << pos)
+
+
+def test_solutions_replay_to_a_win():
+    for board in small_boards(2, 80):
+        results = Solver(board).solve()
+        assert is_solvable(board) == any(result.solvable for result in results.values())
+        for cell, result in results.items():
+            if not result.solvable:
+                continue
+            assert len(result.path) == result.moves
+            pos, visited = board.index(cell), 1 << board.index(cell)
+            for direction in result.path:
+                pos, mask = board.slide(pos, board.obstacles | visited, direction)
+                assert mask
+                visited |= mask
+            assert visited == board.free
+
+
+def test_start_candidates_keep_every_winning_start():
+    for board in small_boards(3, 120):
+        candidates = start_candidates(board)
+        solver = Solver(board)
+        for pos in range(board.size):
+            if board.free >> pos & 1 and solver.remaining(pos, 1 << pos) < UNSOLVABLE:
+                assert candidates >> pos & 1
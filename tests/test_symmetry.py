@@ -0,0 +1,46 @@
+"""Симметрии поля: канонические маски и решатель с таблицей по классам симметрии"""
+
+import random
+
+import pytest
+
+from engine import Board
+from generator import random_obstacles
+from solver import Solver
+from symmetry import Symmetry
+
+from test_solver import brute_force, small_boards
+
+
+@pytest.mark.parametrize("width, height", [(4, 4), (3, 5)])
+def test_canonical_mask_is_shared_by_all_images(width, height):
+    rng = random.Random(width * height)
+    symmetry = Symmetry.for_size(width, height)
+    for _ in range(50):
+        mask = random_obstacles(rng, width, height, 0.4)
+        canonical = symmetry.canonical(mask)[0]
+        for transform in range(len(symmetry.permutations)):
+            image = symmetry.apply(transform, mask)
+            assert image.bit_count() == mask.bit_count()
+            assert symmetry.canonical(image)[0] == canonical
+
+
+def test_symmetric_boards_have_equal_solutions():
+    rng = random.Random(4)
+    symmetry = Symmetry.for_size(4, 4)
+    for _ in range(30):
+        obstacles = random_obstacles(rng, 4, 4, 0.2)
+        best = [min((result.moves for result in Solver(Board(4, 4, image)).solve().values()
+                     if result.solvable), default=None)
+                for image in {symmetry.apply(transform, obstacles)
+                              for transform in range(len(symmetry.permutations))}]
+        assert len(set(best)) == 1
+
+
+def test_symmetric_table_does_not_change_results():
+    for board in small_boards(5, 80):
+        plain, symmetric = Solver(board, symmetric=False), Solver(board, symmetric=True)
+        for pos in range(board.size):
+            if board.free >> pos & 1:
+                expected = brute_force(board, pos, 1 << pos)
+                assert plain.remaining(pos, 1 << pos) == symmetric.remaining(pos, 1 << pos) == expected
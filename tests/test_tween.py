@@ -0,0 +1,69 @@
+"""Анимации по времени: результат не зависит от частоты кадров"""
+
+import pytest
+
+from tween import EASINGS, Animator, Tween
+
+
+def run(tween, dt, seconds):
+    """Значения tween после каждого кадра длиной dt"""
+    values = []
+    for _ in range(round(seconds / dt)):
+        tween.update(dt)
+        values.append(tween.value)
+    return values
+
+
+@pytest.mark.parametrize("name", sorted(EASINGS))
+def test_easings_start_at_zero_and_end_at_one(name):
+    easing = EASINGS[name]
+    assert easing(0) == pytest.approx(0)
+    assert easing(1) == pytest.approx(1)
+
+
+def test_value_depends_on_time_not_frames():
+    slow, fast = Tween(1.0, delay=0.25), Tween(1.0, delay=0.25)
+    run(slow, 1 / 20, 0.75)
+    run(fast, 1 / 120, 0.75)
+    assert slow.value == pytest.approx(fast.value) == pytest.approx(0.5)
+    assert not slow.done
+
+
+def test_completion_fires_once():
+    completed = []
+    tween = Tween(0.5, on_complete=lambda: completed.append(True))
+    run(tween, 0.1, 2.0)
+    assert tween.done and tween.value == 1.0 and completed == [True]
+
+
+def test_loop_fires_once_per_period_even_with_long_frames():
+    periods = []
+    tween = Tween(0.25, loop=True, on_complete=lambda: periods.append(True))
+    tween.update(0.875)
+    assert len(periods) == 3 and tween.value == 0.5
+    tween.update(0.125)
+    assert len(periods) == 4 and tween.value == 0.0 and not tween.done
+
+
+def test_finish_and_cancel():
+    updates, completed = [], []
+    tween = Tween(1.0, on_update=updates.append, on_complete=lambda: completed.append(True))
+    tween.finish()
+    assert tween.done and updates[-1] == 1.0 and completed == [True]
+    cancelled = Tween(1.0, on_complete=lambda: completed.append(False))
+    cancelled.cancel()
+    cancelled.update(5)
+    assert completed == [True]
+
+
+def test_animator_drops_finished_and_keeps_loops():
+    animator = Animator()
+    pulse = animator.add(Tween(0.5, loop=True))
+    move = animator.add(Tween(0.2))
+    assert animator.active
+    animator.update(0.3)
+    assert move.done and animator.tweens == [pulse]
+    assert not animator.active
+    assert animator.time == pytest.approx(0.3)
+    animator.clear()
+    assert pulse.done and not animator.tweens